@@ -0,0 +1,161 @@
+"""
+Analytics report benchmark for TimeToShopping_bot
+Seeds a temporary SQLite database and compares row-by-row report code over
+ORM objects with the columnar NumPy path of bot.utils.analytics_compute
+
+Usage:
+    python benchmarks/analytics_compute.py [--events N] [--posts N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+WORKDIR = tempfile.mkdtemp(prefix="analytics_benchmark_")
+DATABASE_PATH = os.path.join(WORKDIR, "bench.db")
+
+# Dummy settings so config.validate() passes without a real .env
+for key, value in {
+    "BOT_TOKEN": "1:benchmark",
+    "OPENAI_API_KEY": "sk-benchmark",
+    "AUTHORIZED_USERS": "1",
+    "LOG_LEVEL": "WARNING",
+    "LOG_FILE": os.path.join(WORKDIR, "analytics_benchmark.log"),
+    "DATABASE_URL": f"sqlite:///{DATABASE_PATH}",
+}.items():
+    os.environ[key] = value
+
+from sqlalchemy import create_engine, insert, select
+
+from bot.database.db import db
+from bot.database.models import Base, Post, Analytics
+from bot.utils.analytics_compute import load_report_frames, format_stats, top_posts, daily_counts
+
+FORMATS = ("selling", "collection", "info", "promo", None)
+DAYS = 30
+
+def seed(engine, posts: int, events: int, batch_size: int = 50_000):
+    """Insert posts and click/view events spread over the last DAYS days"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Post), [
+            {
+                "title": f"Post {i}",
+                "text": f"Benchmark post {i}",
+                "status": "published" if i % 4 else "draft",
+                "post_format": FORMATS[i % len(FORMATS)],
+            }
+            for i in range(posts)
+        ])
+        for offset in range(0, events, batch_size):
+            conn.execute(insert(Analytics), [
+                {
+                    "post_id": int(rng.paretovariate(1.2)) % posts + 1,
+                    "action": "click_CTA" if rng.random() < 0.3 else "view",
+                    "created_at": now - timedelta(seconds=rng.randrange(DAYS * 86400)),
+                }
+                for _ in range(min(batch_size, events - offset))
+            ])
+
+async def row_by_row(days: int):
+    """Report metrics the previous way: ORM objects and Python loops"""
+    started = time.perf_counter()
+    async with db.async_session() as session:
+        posts = (await session.execute(select(Post))).scalars().all()
+        analytics = (await session.execute(select(Analytics))).scalars().all()
+    loaded = time.perf_counter()
+
+    since = datetime.utcnow() - timedelta(days=days)
+    clicks, views = Counter(), Counter()
+    daily = Counter()
+    for event in analytics:
+        if event.action == "click_CTA":
+            clicks[event.post_id] += 1
+            if event.created_at >= since:
+                daily[event.created_at.date()] += 1
+        elif event.action == "view":
+            views[event.post_id] += 1
+
+    stats = defaultdict(lambda: {"posts": 0, "published": 0, "clicks": 0, "views": 0, "per_post": []})
+    for post in posts:
+        stat = stats[post.post_format]
+        stat["posts"] += 1
+        stat["clicks"] += clicks[post.id]
+        stat["views"] += views[post.id]
+        if post.status == "published":
+            stat["published"] += 1
+            stat["per_post"].append(clicks[post.id])
+    total_posts = sum(stat["posts"] for stat in stats.values())
+    total_clicks = sum(stat["clicks"] for stat in stats.values())
+    for stat in stats.values():
+        stat["posts_percent"] = stat["posts"] / total_posts * 100 if total_posts else 0
+        stat["clicks_percent"] = stat["clicks"] / total_clicks * 100 if total_clicks else 0
+        stat["avg"] = stat["clicks"] / stat["published"] if stat["published"] else 0
+        stat["rate"] = stat["clicks"] / stat["views"] * 100 if stat["views"] else 0
+        ordered = sorted(stat["per_post"])
+        stat["p50"] = ordered[len(ordered) // 2] if ordered else 0
+
+    top = sorted(((-clicks[post.id], post.id) for post in posts if clicks[post.id]))[:10]
+    series = [daily[(datetime.utcnow() - timedelta(days=offset)).date()] for offset in range(days)]
+    rolling = [sum(series[i:i + 7]) / len(series[i:i + 7]) for i in range(days)]
+    return loaded - started, time.perf_counter() - loaded, len(analytics), top
+
+async def columnar(days: int):
+    """Report metrics through analytics_compute"""
+    started = time.perf_counter()
+    posts, events = await load_report_frames()
+    loaded = time.perf_counter()
+
+    since = datetime.utcnow() - timedelta(days=days)
+    format_stats(posts, events)
+    top = top_posts(posts, events, limit=10)
+    daily_counts(events, "click_CTA", days)
+    events.count("click_CTA", since)
+    return loaded - started, time.perf_counter() - loaded, len(events), top
+
+async def run():
+    try:
+        print(f"{'path':<14} {'events':>9} {'load s':>8} {'compute s':>10} {'total s':>8}")
+        results = {}
+        for name, path in (("row-by-row", row_by_row), ("columnar", columnar)):
+            load_s, compute_s, rows, top = await path(DAYS)
+            results[name] = top
+            print(f"{name:<14} {rows:9d} {load_s:8.2f} {compute_s:10.3f} {load_s + compute_s:8.2f}")
+
+        same = [post_id for _, post_id in results["row-by-row"]] == [post_id for post_id, _ in results["columnar"]]
+        print(f"\nTop posts match: {same}")
+    finally:
+        await db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics report benchmark")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--posts", type=int, default=5_000)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{DATABASE_PATH}")
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    seed(engine, args.posts, args.events)
+    engine.dispose()
+    print(f"Seeded {args.posts} posts and {args.events} events in {time.perf_counter() - started:.1f}s\n")
+
+    try:
+        asyncio.run(run())
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Full-text search benchmark for TimeToShopping_bot
+Seeds a temporary SQLite database and compares FTS5 search with a LIKE scan
+
+Usage:
+    python benchmarks/fts_search.py [--posts N] [--queries N]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Dummy settings so config.validate() passes without a real .env
+for key, value in {
+    "BOT_TOKEN": "1:benchmark",
+    "OPENAI_API_KEY": "sk-benchmark",
+    "AUTHORIZED_USERS": "1",
+    "LOG_LEVEL": "WARNING",
+    "LOG_FILE": os.path.join(tempfile.gettempdir(), "fts_benchmark.log"),
+}.items():
+    os.environ.setdefault(key, value)
+
+from sqlalchemy import create_engine, insert, text
+
+from bot.database.models import Base, Post
+from bot.database.fulltext import ensure_fulltext, query_terms, build_match_query, search_statement
+
+WORDS = [
+    "կոշիկ", "պայուսակ", "զգեստ", "վերնաշապիկ", "ժամացույց", "ակնոց", "գլխարկ", "շալվար",
+    "զեղչ", "ակցիա", "նոր", "հավաքածու", "գարուն", "ամառ", "աշուն", "ձմեռ", "կաշվե", "բամբակյա",
+    "սև", "սպիտակ", "կարմիր", "կապույտ", "Երևան", "առաքում", "անվճար", "գին", "դրամ", "լավագույն",
+    "նվեր", "կանացի", "տղամարդու", "մանկական", "սպորտային", "դասական", "էլեգանտ", "հարմարավետ",
+]
+
+QUERIES = ["կոշիկ", "կաշվե պայուսակ", "ձմեռ զեղչ", "նվեր", "սպորտային կոշիկ անվճար", "էլեգ"]
+
+ARMENIAN_LETTERS = "աբգդեզէըթժիլխծկհձղճմյնշոչպջռսվտրցւփքօֆ"
+
+def vocabulary(rng: random.Random, size: int = 20000):
+    """Real words first, then synthetic ones; Zipf weights make later words rare"""
+    words = list(WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choices(ARMENIAN_LETTERS, k=rng.randint(4, 10))))
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, cum_weights
+
+def seed(engine, count: int, batch_size: int = 5000):
+    """
+    Insert count posts in batches (FTS triggers index every row)
+
+    Returns:
+        Vocabulary ordered from most to least frequent
+    """
+    rng = random.Random(42)
+    words, cum_weights = vocabulary(rng)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, count, batch_size):
+            rows = []
+            for i in range(offset, min(count, offset + batch_size)):
+                rows.append({
+                    "title": " ".join(rng.choices(words, cum_weights=cum_weights, k=3)),
+                    "keywords": ", ".join(rng.choices(words, cum_weights=cum_weights, k=4)),
+                    "text": " ".join(rng.choices(words, cum_weights=cum_weights, k=60)),
+                    "status": rng.choice(("draft", "scheduled", "published")),
+                    "created_at": start + timedelta(minutes=i),
+                })
+            conn.execute(insert(Post), rows)
+    return words
+
+def timed(conn, statement, params, repeat: int):
+    """Median milliseconds of a statement and its row count"""
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(statement, params).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS5 search benchmark")
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=5, help="Repetitions per query")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            ensure_fulltext(conn)
+
+        started = time.perf_counter()
+        words = seed(engine, args.posts)
+        print(f"Seeded {args.posts} posts with FTS triggers in {time.perf_counter() - started:.1f}s\n")
+
+        like = text(
+            "SELECT id FROM posts WHERE "
+            + " AND ".join(f"(title LIKE :t{i} OR keywords LIKE :t{i} OR text LIKE :t{i})" for i in range(3))
+            + " ORDER BY created_at DESC LIMIT :limit"
+        )
+
+        print(f"{'query':<28} {'hits':>7} {'fts ms':>8} {'page 2':>8} {'like ms':>8}")
+        with engine.connect() as conn:
+            # Mid-frequency and rare synthetic words show the index at its best
+            for query in QUERIES + [words[500], words[5000], f"{words[100]} {words[2000]}"]:
+                terms = query_terms(query)
+                statement, params = search_statement("sqlite", build_match_query(terms), args.limit + 1)
+                fts_ms, _ = timed(conn, statement, params, args.queries)
+                hits = conn.execute(
+                    text("SELECT count(*) FROM posts_fts WHERE posts_fts MATCH :match"), {"match": params["match"]}
+                ).scalar()
+
+                # Second page continues from the last (rank, id) of the first
+                first_page = conn.execute(statement, params).all()
+                page_ms = 0.0
+                if len(first_page) > args.limit:
+                    last = first_page[args.limit - 1]
+                    statement, params = search_statement(
+                        "sqlite", build_match_query(terms), args.limit + 1, after=(last.rank, last.id)
+                    )
+                    page_ms, _ = timed(conn, statement, params, args.queries)
+
+                like_params = {"limit": args.limit}
+                for i in range(3):
+                    like_params[f"t{i}"] = f"%{terms[i % len(terms)]}%"
+                like_ms, _ = timed(conn, like, like_params, args.queries)
+
+                print(f"{query:<28} {hits:7d} {fts_ms:8.2f} {page_ms:8.2f} {like_ms:8.2f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Import-time benchmark for TimeToShopping_bot
+Runs `python -X importtime` in a fresh interpreter and reports the slowest imports
+
+Usage:
+    python benchmarks/import_time.py [module] [--top N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Dummy settings so config.validate() passes without a real .env
+DEFAULT_ENV = {
+    "BOT_TOKEN": "1:benchmark",
+    "OPENAI_API_KEY": "sk-benchmark",
+    "AUTHORIZED_USERS": "1",
+    "LOG_LEVEL": "WARNING",
+}
+
+class ImportEntry:
+    """Single line of -X importtime output"""
+
+    def __init__(self, module: str, self_us: int, cumulative_us: int, depth: int):
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+def parse_importtime(output: str) -> List[ImportEntry]:
+    """
+    Parse `-X importtime` stderr output
+
+    Args:
+        output: Raw stderr text
+
+    Returns:
+        Entries in the order they were printed (children before parents)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append(ImportEntry(name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+def measure_import(module: str = "main") -> Tuple[int, Dict[str, ImportEntry]]:
+    """
+    Import module in a fresh interpreter with -X importtime
+
+    Args:
+        module: Module to import
+
+    Returns:
+        Tuple of (cumulative microseconds of the module, entries by module name)
+    """
+    env = dict(os.environ)
+    for key, value in DEFAULT_ENV.items():
+        env.setdefault(key, value)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH", "")]))
+
+    # Run outside the repo so log files are not written into the tree
+    with tempfile.TemporaryDirectory() as workdir:
+        env.setdefault("LOG_FILE", os.path.join(workdir, "bot.log"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    by_name = {}
+    for entry in entries:
+        # Keep the first (actual) import of each module
+        by_name.setdefault(entry.module, entry)
+
+    if module not in by_name:
+        raise RuntimeError(f"{module} not found in importtime output")
+    return by_name[module].cumulative_us, by_name
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile")
+    parser.add_argument("module", nargs="?", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    total_us, entries = measure_import(args.module)
+
+    print(f"import {args.module}: {total_us / 1000:.1f} ms\n")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for entry in sorted(entries.values(), key=lambda e: e.self_us, reverse=True)[:args.top]:
+        print(f"{entry.self_us / 1000:9.1f} {entry.cumulative_us / 1000:9.1f}  {entry.module}")
+
+    top_level = {}
+    for entry in entries.values():
+        package = entry.module.split(".")[0]
+        top_level[package] = top_level.get(package, 0) + entry.self_us
+    print("\nBy top-level package (self time):")
+    for package, self_us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:15]:
+        print(f"{self_us / 1000:9.1f}  {package}")
+
+if __name__ == "__main__":
+    main()
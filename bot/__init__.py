@@ -48,7 +48,7 @@ LOG_ROTATION = "10 MB"
 LOG_RETENTION = "30 days"
 
 # Export formats
-EXPORT_FORMATS = ["csv", "json", "xlsx"]
+EXPORT_FORMATS = ["csv", "json", "parquet", "arrow"]
 
 # Rate limits
 MAX_POSTS_PER_DAY = 50
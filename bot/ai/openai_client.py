@@ -4,21 +4,99 @@ Handles text generation using GPT-4o-mini
 """
 
 import asyncio
-from typing import Optional, Dict, Any
-from openai import AsyncOpenAI
+import json
+import time
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from config import config  # ИСПРАВЛЕНО: убрал bot.
 from bot.ai.prompts import get_system_prompt, get_user_prompt
 from logging_config import logger  # ИСПРАВЛЕНО: убрал bot.
+from metrics import openai_requests_total, openai_request_duration, openai_tokens_total, record_span
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+class TokenUsage:
+    """Token usage and cost accumulated by a unit of work (e.g. a pre-generation batch)"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+    
+    def add(self, prompt_tokens: int, completion_tokens: int):
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+    
+    @property
+    def cost(self) -> float:
+        """Estimated cost in USD from OPENAI_PRICE_*_PER_1M"""
+        return (
+            self.prompt_tokens * config.OPENAI_PRICE_INPUT_PER_1M
+            + self.completion_tokens * config.OPENAI_PRICE_OUTPUT_PER_1M
+        ) / 1_000_000
+
+# Completions made while a TokenUsage is set here also add their usage to it;
+# tasks inherit the value, so concurrent batches do not mix
+usage_sink: ContextVar[Optional[TokenUsage]] = ContextVar("openai_usage_sink", default=None)
 
 class OpenAIClient:
     """OpenAI API client for text generation"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.api_key = config.OPENAI_API_KEY
+        self._client: Optional["AsyncOpenAI"] = None
         self.model = config.OPENAI_MODEL
         self.max_tokens = config.OPENAI_MAX_TOKENS
         self.temperature = config.OPENAI_TEMPERATURE
     
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """AsyncOpenAI client, created on first use (openai is imported lazily)"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.api_key)
+        return self._client
+    
+    async def _create_completion(self, operation: str, **kwargs):
+        """
+        Create chat completion and record latency and token usage
+        
+        Args:
+            operation: Metrics label (generate, improve, translate, ...)
+            **kwargs: Arguments for chat.completions.create
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(**kwargs)
+        except Exception:
+            openai_requests_total.inc(operation=operation, status="error")
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            openai_request_duration.observe(elapsed, operation=operation)
+            record_span("ai", elapsed)
+        
+        openai_requests_total.inc(operation=operation, status="ok")
+        
+        usage = getattr(response, "usage", None)
+        for kind in ("prompt_tokens", "completion_tokens"):
+            tokens = getattr(usage, kind, None)
+            if isinstance(tokens, int):
+                openai_tokens_total.inc(tokens, operation=operation, kind=kind.split("_")[0])
+        
+        sink = usage_sink.get()
+        if sink is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", 0)
+            completion_tokens = getattr(usage, "completion_tokens", 0)
+            sink.add(
+                prompt_tokens if isinstance(prompt_tokens, int) else 0,
+                completion_tokens if isinstance(completion_tokens, int) else 0
+            )
+        
+        return response
+    
     async def generate_post_text(
         self, 
         post_format: str, 
@@ -43,7 +121,8 @@ class OpenAIClient:
             logger.info(f"Generating text for format: {post_format}")
             logger.debug(f"Keywords: {keywords}")
             
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
+                "generate",
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -99,7 +178,8 @@ class OpenAIClient:
             Գրիր բարելավված տարբերակը:
             """
             
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
+                "improve",
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -141,7 +221,8 @@ class OpenAIClient:
             
             user_prompt = f"Թարգմանիր այս տեքստը:\n\n{text}"
             
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
+                "translate",
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -185,7 +266,8 @@ class OpenAIClient:
             
             user_prompt = f"Գնահատիր այս տեքստը:\n\n{text}"
             
-            response = await self.client.chat.completions.create(
+            response = await self._create_completion(
+                "quality",
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -196,7 +278,6 @@ class OpenAIClient:
             )
             
             # Try to parse JSON response
-            import json
             try:
                 quality_analysis = json.loads(response.choices[0].message.content)
             except json.JSONDecodeError:
@@ -221,15 +302,12 @@ class OpenAIClient:
             }
     
     async def test_connection(self) -> bool:
-        """Test OpenAI API connection"""
+        """Test OpenAI API connection (models endpoint, no tokens billed)"""
+        started = time.perf_counter()
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": "Ծրագրավորում"}],
-                max_tokens=10
-            )
+            await self.client.models.retrieve(self.model)
             
-            logger.info("OpenAI API connection test successful")
+            logger.info(f"OpenAI API connection test successful ({(time.perf_counter() - started) * 1000:.0f}ms)")
             return True
             
         except Exception as e:
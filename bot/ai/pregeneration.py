@@ -0,0 +1,244 @@
+"""
+Ahead-of-time post generation for TimeToShopping_bot
+Background queue that turns batches of (format, keywords, details) into drafts
+"""
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from config import config
+from logging_config import logger
+from metrics import metrics
+from bot.ai.openai_client import openai_client, TokenUsage, usage_sink
+from bot.ai.prompts import get_all_formats
+from bot.database.db import db
+
+pregen_items_total = metrics.counter(
+    "bot_pregen_items_total", "Pre-generated posts by outcome", ("status",)
+)
+pregen_queue_depth = metrics.gauge(
+    "bot_pregen_queue_depth", "Items waiting in the pre-generation queue"
+)
+
+# Finished batches kept for /pregen reports
+MAX_KEPT_BATCHES = 20
+
+class PregenItem:
+    """Single post to generate"""
+
+    __slots__ = ("post_format", "keywords", "details", "status", "post_id", "error")
+
+    def __init__(self, post_format: str, keywords: str, details: str = ""):
+        self.post_format = post_format
+        self.keywords = keywords
+        self.details = details
+        self.status = "queued"  # queued, done, failed
+        self.post_id: Optional[int] = None
+        self.error: Optional[str] = None
+
+class PregenBatch:
+    """Batch submitted by an admin, with throughput and cost accounting"""
+
+    def __init__(self, batch_id: int, items: List[PregenItem], created_by: Optional[int] = None):
+        self.id = batch_id
+        self.items = items
+        self.created_by = created_by
+        self.created_at = datetime.utcnow()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.usage = TokenUsage()
+        self.on_complete: Optional[Callable[["PregenBatch"], Awaitable[None]]] = None
+
+    @property
+    def done(self) -> int:
+        return sum(1 for item in self.items if item.status == "done")
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for item in self.items if item.status == "failed")
+
+    @property
+    def is_complete(self) -> bool:
+        return self.done + self.failed == len(self.items)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from the first item start to the last item end (or now)"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Finished posts per minute"""
+        return (self.done + self.failed) / self.elapsed * 60 if self.elapsed else 0.0
+
+    @property
+    def post_ids(self) -> List[int]:
+        return [item.post_id for item in self.items if item.post_id]
+
+    def report(self) -> str:
+        """Armenian one-batch summary for /pregen"""
+        state = "✅ Ավարտված" if self.is_complete else "⏳ Ընթացքում"
+        return (
+            f"<b>Խմբաքանակ #{self.id}</b> — {state}\n"
+            f"• Պատրաստ: {self.done}/{len(self.items)} | Ձախողված: {self.failed}\n"
+            f"• Ժամանակ: {self.elapsed:.0f} վրկ | Արագություն: {self.throughput:.1f} փոստ/րոպե\n"
+            f"• Տոկեններ: {self.usage.prompt_tokens} + {self.usage.completion_tokens} | "
+            f"Արժեք: ${self.usage.cost:.4f}"
+        )
+
+def parse_pregen_lines(text: str) -> Tuple[List[PregenItem], List[str]]:
+    """
+    Parse batch lines "format | keywords | details"
+
+    Args:
+        text: One post per line; details are optional
+
+    Returns:
+        Tuple of (items, error messages for rejected lines)
+    """
+    formats = get_all_formats()
+    items, errors = [], []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) < 2 or not fields[1]:
+            errors.append(f"{number}: պետք է լինի «ձևաչափ | բառեր | մանրամասներ»")
+            continue
+        if fields[0] not in formats:
+            errors.append(f"{number}: անհայտ ձևաչափ «{fields[0]}»")
+            continue
+        items.append(PregenItem(fields[0], fields[1], " | ".join(fields[2:])))
+    return items, errors
+
+class PregenerationQueue:
+    """
+    Bounded-concurrency generation queue
+
+    A fixed pool of worker tasks pulls items from one asyncio.Queue, so at
+    most `concurrency` OpenAI calls run at a time regardless of how many
+    batches are waiting. Each worker sets the batch's TokenUsage as the
+    usage sink while generating, which attributes tokens to the batch.
+    """
+
+    def __init__(self, concurrency: int = 3):
+        """
+        Args:
+            concurrency: Number of worker tasks (parallel generations)
+        """
+        self.concurrency = concurrency
+        self.batches: "OrderedDict[int, PregenBatch]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._ids = itertools.count(1)
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker(), name=f"pregen-{len(self._workers)}"))
+
+    def submit(self, items: List[PregenItem], created_by: Optional[int] = None,
+               on_complete: Optional[Callable[[PregenBatch], Awaitable[None]]] = None) -> PregenBatch:
+        """
+        Queue a batch for generation
+
+        Args:
+            items: Posts to generate
+            created_by: Telegram ID of the admin, stored on the drafts
+            on_complete: Coroutine called with the batch once every item finished
+
+        Returns:
+            The queued batch
+        """
+        self._ensure_started()
+
+        batch = PregenBatch(next(self._ids), items, created_by)
+        batch.on_complete = on_complete
+        self.batches[batch.id] = batch
+        while len(self.batches) > MAX_KEPT_BATCHES:
+            oldest = next(iter(self.batches.values()))
+            if not oldest.is_complete:
+                break
+            self.batches.popitem(last=False)
+
+        for item in items:
+            self._queue.put_nowait((batch, item))
+        pregen_queue_depth.set(self._queue.qsize())
+
+        logger.info(f"Pre-generation batch {batch.id} queued: {len(items)} posts")
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch, item = await self._queue.get()
+            pregen_queue_depth.set(self._queue.qsize())
+            try:
+                await self._generate(batch, item)
+            except Exception as e:
+                item.status = "failed"
+                item.error = str(e)
+                logger.error(f"Pre-generation of batch {batch.id} item failed: {e}")
+            finally:
+                pregen_items_total.inc(status=item.status)
+                self._queue.task_done()
+
+            if batch.is_complete and batch.finished is None:
+                batch.finished = time.monotonic()
+                logger.info(
+                    f"Pre-generation batch {batch.id} finished: {batch.done} done, {batch.failed} failed, "
+                    f"{batch.elapsed:.1f}s, {batch.usage.prompt_tokens}+{batch.usage.completion_tokens} tokens, "
+                    f"${batch.usage.cost:.4f}"
+                )
+                if batch.on_complete:
+                    try:
+                        await batch.on_complete(batch)
+                    except Exception as e:
+                        logger.error(f"Pre-generation batch {batch.id} callback failed: {e}")
+
+    async def _generate(self, batch: PregenBatch, item: PregenItem):
+        if batch.started is None:
+            batch.started = time.monotonic()
+
+        token = usage_sink.set(batch.usage)
+        try:
+            text = await openai_client.generate_post_text(item.post_format, item.keywords, item.details)
+        finally:
+            usage_sink.reset(token)
+
+        if not text:
+            item.status = "failed"
+            item.error = "empty generation"
+            return
+
+        post = await db.create_post({
+            "title": item.keywords[:100],
+            "keywords": item.keywords,
+            "text": text,
+            "status": "draft",
+            "post_format": item.post_format,
+            "created_by": batch.created_by
+        })
+        item.post_id = post.id
+        item.status = "done"
+
+    def pending(self) -> int:
+        """Items waiting in the queue"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def stop(self):
+        """Cancel workers; queued items are dropped"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+# Global pre-generation queue instance
+pregeneration_queue = PregenerationQueue(concurrency=config.PREGEN_CONCURRENCY)
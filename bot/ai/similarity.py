@@ -0,0 +1,201 @@
+"""
+Near-duplicate detection for TimeToShopping_bot
+MinHash signatures over character shingles with an LSH band index
+"""
+
+import asyncio
+import random
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import config
+from logging_config import logger
+
+# Character shingle length; Armenian words are long, so 5 keeps shingles selective
+SHINGLE_SIZE = 5
+
+# Signature length = BANDS * ROWS; LSH candidate threshold ≈ (1 / BANDS) ** (1 / ROWS)
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+
+# Universal hashing (a * x + b) % P over 32-bit shingle hashes; a < 2**31 keeps
+# a * x + b inside uint64, so the NumPy path matches pure Python exactly
+_PRIME = 4294967311  # smallest prime above 2**32
+_MAX_HASH = (1 << 32) - 1
+
+# Letters (\w covers Armenian) and digits only; emojis and punctuation are ignored
+_NON_WORD = re.compile(r"\W+")
+
+def _permutations(seed: int = 1) -> List[Tuple[int, int]]:
+    rng = random.Random(seed)
+    return [(rng.randint(1, (1 << 31) - 1), rng.randint(0, _MAX_HASH)) for _ in range(NUM_PERM)]
+
+_PERMUTATIONS = _permutations()
+
+# NumPy is optional and imported on first use (None = not tried yet)
+_numpy = None
+
+def _get_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = (numpy, numpy.array([a for a, _ in _PERMUTATIONS], dtype=numpy.uint64)[:, None],
+                      numpy.array([b for _, b in _PERMUTATIONS], dtype=numpy.uint64)[:, None])
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """
+    Hashed character shingles of normalized text
+
+    Args:
+        text: Post text
+        size: Shingle length in characters
+
+    Returns:
+        Set of 32-bit shingle hashes
+    """
+    normalized = _NON_WORD.sub(" ", text.lower()).strip()
+    if len(normalized) <= size:
+        return {zlib.crc32(normalized.encode("utf-8"))} if normalized else set()
+    return {
+        zlib.crc32(normalized[i:i + size].encode("utf-8"))
+        for i in range(len(normalized) - size + 1)
+    }
+
+def minhash(shingle_hashes: Set[int]) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set"""
+    if not shingle_hashes:
+        return tuple([_MAX_HASH] * NUM_PERM)
+
+    numpy_state = _get_numpy()
+    if numpy_state:
+        np, a, b = numpy_state
+        values = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+        hashed = ((a * values + b) % _PRIME) & _MAX_HASH
+        return tuple(int(value) for value in hashed.min(axis=1))
+
+    return tuple(
+        min(((a * x + b) % _PRIME) & _MAX_HASH for x in shingle_hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def estimate_similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+class SimilarityIndex:
+    """
+    In-memory LSH index of post texts
+
+    Each signature is split into BANDS bands; posts sharing any band are
+    candidates and are then ranked by signature agreement. Lookups touch
+    only BANDS dict entries, independent of the number of posts.
+    """
+
+    def __init__(self, threshold: float = 0.6):
+        """
+        Args:
+            threshold: Minimum estimated similarity reported as near-duplicate
+        """
+        self.threshold = threshold
+        self.signatures: Dict[int, Tuple[int, ...]] = {}
+        self.buckets: List[Dict[Tuple[int, ...], Set[int]]] = [{} for _ in range(BANDS)]
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    @staticmethod
+    def _bands(signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS]
+
+    def add(self, post_id: int, text: Optional[str]):
+        """Add or replace post text in the index"""
+        self.remove(post_id)
+        if not text:
+            return
+
+        signature = minhash(shingles(text))
+        self.signatures[post_id] = signature
+        for band, key in self._bands(signature):
+            self.buckets[band].setdefault(key, set()).add(post_id)
+
+    def remove(self, post_id: int):
+        """Remove post from the index"""
+        signature = self.signatures.pop(post_id, None)
+        if signature is None:
+            return
+        for band, key in self._bands(signature):
+            bucket = self.buckets[band].get(key)
+            if bucket:
+                bucket.discard(post_id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def query(self, text: str, exclude_id: Optional[int] = None,
+              threshold: Optional[float] = None, limit: int = 3) -> List[Tuple[int, float]]:
+        """
+        Find near-duplicates of a text
+
+        Args:
+            text: Text to check
+            exclude_id: Post ID to skip (the post itself)
+            threshold: Override of the index threshold
+            limit: Maximum results
+
+        Returns:
+            List of (post_id, similarity) sorted by similarity
+        """
+        if not text:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+
+        signature = self.signatures.get(exclude_id) if exclude_id is not None else None
+        if signature is None:
+            signature = minhash(shingles(text))
+
+        candidates: Set[int] = set()
+        for band, key in self._bands(signature):
+            candidates.update(self.buckets[band].get(key, ()))
+        candidates.discard(exclude_id)
+
+        matches = []
+        for post_id in candidates:
+            similarity = estimate_similarity(signature, self.signatures[post_id])
+            if similarity >= threshold:
+                matches.append((post_id, similarity))
+
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:limit]
+
+    async def ensure_loaded(self):
+        """Build the index from all posts on first use"""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+
+            from bot.database.db import db
+
+            count = 0
+            async for post_id, text in db.iter_post_texts():
+                # Posts added while loading are already indexed with newer text
+                if post_id not in self.signatures:
+                    self.add(post_id, text)
+                count += 1
+                if count % 1000 == 0:
+                    await asyncio.sleep(0)
+
+            self.loaded = True
+            logger.info(f"Similarity index built: {len(self)} posts")
+
+# Global similarity index instance
+similarity_index = SimilarityIndex(threshold=config.SIMILARITY_THRESHOLD)
@@ -0,0 +1,214 @@
+"""
+Publish-time recommendations for TimeToShopping_bot
+Click counts by hour of week and post format, folded in incrementally
+"""
+
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pytz import timezone, utc
+
+from config import config
+from logging_config import logger
+
+HOURS_PER_WEEK = 168
+
+# Key of the all-formats histogram
+ALL_FORMATS = "*"
+
+# Weight of the all-formats distribution in a format's score (pseudo-clicks);
+# formats with few clicks lean on the channel-wide pattern
+PRIOR_STRENGTH = 20.0
+
+# No recommendations until this many clicks were seen
+MIN_EVENTS = 10
+
+# Click events read per refresh query
+REFRESH_BATCH = 5000
+
+# NumPy is optional and imported on first use (None = not tried yet)
+_numpy = None
+
+def _get_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+def hours_of_week(timestamps: Iterable[datetime], tz) -> List[int]:
+    """
+    Local hour of week (Monday 00:00 = 0) of naive UTC timestamps
+
+    UTC offsets are looked up once per distinct UTC hour, so large batches
+    cost one dict hit per event.
+    """
+    offsets: Dict[datetime, timedelta] = {}
+    result = []
+    for moment in timestamps:
+        hour = moment.replace(minute=0, second=0, microsecond=0)
+        offset = offsets.get(hour)
+        if offset is None:
+            offset = offsets[hour] = utc.localize(hour).astimezone(tz).utcoffset()
+        local = moment + offset
+        result.append(local.weekday() * 24 + local.hour)
+    return result
+
+class TimeRecommender:
+    """
+    Hour-of-week click histograms per post format
+
+    Events are read past a watermark (last analytics ID), so each refresh
+    only scans clicks that arrived since the previous one. Rankings are
+    cached per (format, weekday) until new clicks change the histograms.
+    """
+
+    def __init__(self, tz, refresh_seconds: float = 60):
+        """
+        Args:
+            tz: Local timezone of the recommended slots
+            refresh_seconds: Minimum time between database refreshes
+        """
+        self.tz = tz
+        self.refresh_seconds = refresh_seconds
+        self.counts: Dict[str, object] = {}
+        self.last_event_id = 0
+        self._refreshed_at: Optional[float] = None
+        self._rankings: Dict[Tuple[str, int], List[Tuple[int, float]]] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def total(self) -> int:
+        histogram = self.counts.get(ALL_FORMATS)
+        return int(sum(histogram)) if histogram is not None else 0
+
+    def add_events(self, events: Iterable[Tuple[datetime, Optional[str]]]):
+        """
+        Fold click events into the histograms
+
+        Args:
+            events: (created_at as naive UTC, post format or None)
+        """
+        events = list(events)
+        if not events:
+            return
+
+        slots = hours_of_week([created_at for created_at, _ in events], self.tz)
+        formats = [post_format or ALL_FORMATS for _, post_format in events]
+        np = _get_numpy()
+
+        if np:
+            slots = np.asarray(slots, dtype=np.int64)
+            formats = np.asarray(formats, dtype=object)
+            groups = [(ALL_FORMATS, slots)] + [
+                (post_format, slots[formats == post_format])
+                for post_format in set(formats.tolist()) - {ALL_FORMATS}
+            ]
+            for post_format, group in groups:
+                added = np.bincount(group, minlength=HOURS_PER_WEEK)
+                current = self.counts.get(post_format)
+                self.counts[post_format] = added if current is None else current + added
+        else:
+            for slot, post_format in zip(slots, formats):
+                keys = (ALL_FORMATS,) if post_format == ALL_FORMATS else (ALL_FORMATS, post_format)
+                for key in keys:
+                    self.counts.setdefault(key, [0] * HOURS_PER_WEEK)[slot] += 1
+
+        self._rankings.clear()
+
+    def ranking(self, post_format: Optional[str], weekday: int) -> List[Tuple[int, float]]:
+        """
+        Hours of a weekday by predicted clicks
+
+        Score = format clicks + PRIOR_STRENGTH * share of all clicks in the hour
+
+        Returns:
+            (hour, score) pairs with a positive score, best first
+        """
+        key = (post_format or ALL_FORMATS, weekday)
+        cached = self._rankings.get(key)
+        if cached is not None:
+            return cached
+
+        overall = self.counts.get(ALL_FORMATS)
+        if overall is None or self.total < MIN_EVENTS:
+            return []
+
+        day = slice(weekday * 24, weekday * 24 + 24)
+        own = self.counts.get(key[0])
+        own = own[day] if own is not None and key[0] != ALL_FORMATS else [0] * 24
+        prior = [PRIOR_STRENGTH * count / self.total for count in overall[day]]
+        scores = [float(own_count) + prior_score for own_count, prior_score in zip(own, prior)]
+
+        result = sorted(
+            ((hour, score) for hour, score in enumerate(scores) if score > 0),
+            key=lambda item: (-item[1], item[0])
+        )
+        self._rankings[key] = result
+        return result
+
+    def recommend(self, post_format: Optional[str], day: date, top: int = 3,
+                  after: Optional[datetime] = None) -> List[str]:
+        """
+        Best publication hours of a day
+
+        Args:
+            post_format: Format of the post being scheduled
+            day: Selected publication date
+            top: Number of slots
+            after: Slots at or before this local time are skipped
+
+        Returns:
+            "HH:00" strings, best first
+        """
+        hours = []
+        for hour, _ in self.ranking(post_format, day.weekday()):
+            if after is not None and datetime.combine(day, datetime.min.time()).replace(hour=hour) <= after:
+                continue
+            hours.append(f"{hour:02d}:00")
+            if len(hours) == top:
+                break
+        return hours
+
+    async def refresh(self, force: bool = False):
+        """Fold in clicks logged since the last refresh (throttled to refresh_seconds)"""
+        if not force and self._refreshed_at is not None and \
+                time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+
+        async with self._lock:
+            from bot.database.db import db
+
+            added = 0
+            while True:
+                rows = await db.get_click_events(self.last_event_id, limit=REFRESH_BATCH)
+                if not rows:
+                    break
+                self.add_events((created_at, post_format) for _, created_at, post_format, _ in rows)
+                self.last_event_id = rows[-1][0]
+                added += len(rows)
+                if len(rows) < REFRESH_BATCH:
+                    break
+
+            self._refreshed_at = time.monotonic()
+            if added:
+                logger.debug(f"Time recommender: {added} new clicks, {self.total} total")
+
+    async def recommend_for(self, post_format: Optional[str], day: date, top: int = 3) -> List[str]:
+        """Refresh if due, then recommend future slots of a day"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Time recommender refresh failed: {e}")
+        now = datetime.now(self.tz).replace(tzinfo=None)
+        return self.recommend(post_format, day, top, after=now)
+
+# Global time recommender instance
+time_recommender = TimeRecommender(
+    timezone(config.SCHEDULER_TIMEZONE), refresh_seconds=config.RECOMMENDER_REFRESH_SECONDS
+)
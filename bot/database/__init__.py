@@ -3,10 +3,18 @@ Database package for TimeToShopping_bot
 SQLAlchemy models and database operations
 """
 
+from sqlalchemy import select, func, text, inspect
+
 from .db import db, Database
-from .models import Base, Post, Analytics, User
+from .models import (
+    Base, Post, PostMedia, PostTemplate, Analytics, User, ExportCursor, Channel, PostDelivery, ClickActivity,
+    AnalyticsDaily
+)
 
-__all__ = ["db", "Database", "Base", "Post", "Analytics", "User"]
+__all__ = [
+    "db", "Database", "Base", "Post", "PostMedia", "PostTemplate", "Analytics", "User", "ExportCursor",
+    "Channel", "PostDelivery", "ClickActivity", "AnalyticsDaily"
+]
 
 # Database configuration constants
 DB_CONFIG = {
@@ -29,8 +37,15 @@ DB_CONFIG = {
 # Table creation order (for migrations)
 TABLE_CREATION_ORDER = [
     "users",      # Independent table
-    "posts",      # References users
-    "analytics"   # References posts
+    "post_templates",  # Independent table
+    "posts",      # References users, post_templates
+    "post_media",  # References posts
+    "channels",   # Independent table
+    "analytics",  # References posts, channels
+    "post_deliveries",  # References posts, channels
+    "export_cursors",  # Independent table
+    "click_activity",  # Independent table
+    "analytics_daily"  # Independent table
 ]
 
 # Database maintenance functions
@@ -153,7 +168,6 @@ async def get_database_stats() -> dict:
     """Get database statistics"""
     try:
         async with db.async_session() as session:
-            from sqlalchemy import select, func
             
             # Count tables
             posts_count = await session.execute(select(func.count(Post.id)))
@@ -171,25 +185,21 @@ async def get_database_stats() -> dict:
 
 # Migration utilities
 async def check_database_health() -> dict:
-    """Check database connectivity and table existence"""
+    """
+    Check database connectivity and table existence
+    
+    Uses SELECT 1 and the schema inspector only, so it is cheap enough to run
+    periodically from the health monitor.
+    """
+    
     try:
-        async with db.async_session() as session:
+        async with db.engine.connect() as conn:
             # Check if we can connect
-            await session.execute(select(1))
+            await conn.execute(text("SELECT 1"))
             
             # Check if tables exist
-            tables_exist = {}
-            for table_name in TABLE_CREATION_ORDER:
-                try:
-                    if table_name == "posts":
-                        await session.execute(select(func.count(Post.id)).limit(1))
-                    elif table_name == "analytics":
-                        await session.execute(select(func.count(Analytics.id)).limit(1))
-                    elif table_name == "users":
-                        await session.execute(select(func.count(User.id)).limit(1))
-                    tables_exist[table_name] = True
-                except Exception:
-                    tables_exist[table_name] = False
+            existing = set(await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()))
+            tables_exist = {table_name: table_name in existing for table_name in TABLE_CREATION_ORDER}
             
             return {
                 "status": "healthy",
@@ -201,4 +211,4 @@ async def check_database_health() -> dict:
         return {
             "status": "unhealthy",
             "error": str(e)
-        }
\ No newline at end of file
+        }
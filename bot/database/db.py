@@ -3,14 +3,26 @@ Database operations for TimeToShopping_bot
 Async database operations using SQLAlchemy
 """
 
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select, update, delete, func, and_, desc
+from sqlalchemy import (
+    Date, select, insert, update, delete, func, case, literal, type_coerce, union_all,
+    and_, or_, desc, event, inspect, text
+)
 from config import config  # ИСПРАВЛЕНО: убрал bot.
-from bot.database.models import Base, Post, Analytics, User
+from bot.database.models import (
+    Base, Post, PostMedia, PostTemplate, Analytics, User, ExportCursor, Channel, PostDelivery, ClickActivity,
+    AnalyticsDaily
+)
+from bot.database.pagination import encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor
+from bot.database.fulltext import ensure_fulltext, query_terms, build_match_query, search_statement
+from bot.database.profiling import QueryProfiler
+from bot.ai.similarity import similarity_index
 from logging_config import logger  # ИСПРАВЛЕНО: убрал bot.
+from metrics import db_queries_total, db_query_duration, record_span
 
 class Database:
     """Database operations manager"""
@@ -20,50 +32,178 @@ class Database:
         db_url = config.DATABASE_URL
         if db_url.startswith("sqlite:///"):
             db_url = db_url.replace("sqlite:///", "sqlite+aiosqlite:///")
+        self.db_url = db_url
         
-        self.engine = create_async_engine(
-            db_url,
-            echo=config.DEBUG,
-            future=True
-        )
+        # Engine and session factory are created on first use
+        self._engine = None
+        self._async_session = None
         
-        self.async_session = async_sessionmaker(
-            self.engine,
-            class_=AsyncSession,
-            expire_on_commit=False
+        # Opt-in per-statement profiling and slow query log
+        self.profiler = QueryProfiler(
+            enabled=config.DB_PROFILING,
+            slow_ms=config.DB_SLOW_QUERY_MS
         )
     
+    @property
+    def engine(self):
+        """Async engine, created on first use"""
+        if self._engine is None:
+            self._engine = create_async_engine(
+                self.db_url,
+                echo=config.DEBUG,
+                future=True
+            )
+            self._install_query_hooks()
+        return self._engine
+    
+    @property
+    def async_session(self) -> async_sessionmaker:
+        """Session factory bound to the engine"""
+        if self._async_session is None:
+            self._async_session = async_sessionmaker(
+                self.engine,
+                class_=AsyncSession,
+                expire_on_commit=False
+            )
+        return self._async_session
+    
+    @async_session.setter
+    def async_session(self, factory: async_sessionmaker):
+        self._async_session = factory
+    
+    def _install_query_hooks(self):
+        """Record SQL statement counts and timings in metrics and the profiler"""
+        sync_engine = self._engine.sync_engine
+        
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+        
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_start"].pop()
+            operation = statement.split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            db_queries_total.inc(operation=operation)
+            db_query_duration.observe(elapsed, operation=operation)
+            record_span("db", elapsed)
+            
+            profiler = self.profiler
+            if profiler.enabled or profiler.slow_ms:
+                profiler.record(statement, elapsed, cursor.rowcount, parameters)
+    
     async def init_db(self):
         """Initialize database tables"""
         try:
             async with self.engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(self._migrate_columns)
+                await conn.run_sync(self._ensure_indexes)
+                await conn.run_sync(ensure_fulltext)
+            await self._seed_default_channel()
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Database initialization failed: {e}")
             raise
     
+    @staticmethod
+    def _migrate_columns(sync_conn):
+        """Add nullable columns added to models after their tables already existed"""
+        inspector = inspect(sync_conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable:
+                    logger.error(f"Cannot add NOT NULL column {table.name}.{column.name} to existing table")
+                    continue
+                column_type = column.type.compile(dialect=sync_conn.dialect)
+                sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                logger.info(f"Added column {table.name}.{column.name}")
+    
+    async def _seed_default_channel(self):
+        """Register the configured channel when the registry is empty"""
+        chat_id = config.CHANNEL_CHAT_ID or config.CHANNEL_ID
+        if not chat_id:
+            return
+        async with self.async_session() as session:
+            count = (await session.execute(select(func.count(Channel.id)))).scalar()
+            if not count:
+                session.add(Channel(chat_id=str(chat_id), title=config.CHANNEL_ID or None))
+                await session.commit()
+                logger.info(f"Registered default channel {chat_id}")
+    
+    @staticmethod
+    def _ensure_indexes(sync_conn):
+        """Create indexes added to models after their tables already existed"""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+    
     async def close(self):
         """Close database connections"""
-        await self.engine.dispose()
+        if self._engine is None:
+            return
+        await self._engine.dispose()
         logger.info("Database connections closed")
     
     # Post operations
-    async def create_post(self, post_data: Dict[str, Any]) -> Post:
-        """Create a new post"""
+    async def create_post(self, post_data: Dict[str, Any],
+                          media: Optional[List[Dict[str, Any]]] = None) -> Post:
+        """
+        Create a new post
+        
+        Args:
+            post_data: Post column values
+            media: Album items ({"media_type", "file_id", "file_unique_id"}) in order
+        """
         async with self.async_session() as session:
             post = Post(**post_data)
+            for position, item in enumerate(media or []):
+                post.media.append(PostMedia(position=position, **item))
             session.add(post)
             await session.commit()
             await session.refresh(post)
             logger.info(f"Created post with ID: {post.id}")
+            
+            similarity_index.add(post.id, post.text)
             return post
     
+    async def bulk_create_posts(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many posts in one transaction
+        
+        Rows go through a single executemany-style INSERT ... RETURNING, so a
+        batch costs one round trip instead of one commit per post.
+        
+        Args:
+            rows: Post column values; every row must have the same keys
+            
+        Returns:
+            Created post IDs in row order
+        """
+        if not rows:
+            return []
+        
+        async with self.async_session() as session:
+            result = await session.execute(
+                insert(Post).returning(Post.id, sort_by_parameter_order=True), rows
+            )
+            post_ids = list(result.scalars().all())
+            await session.commit()
+        
+        for post_id, row in zip(post_ids, rows):
+            similarity_index.add(post_id, row["text"])
+        logger.info(f"Bulk created {len(post_ids)} posts")
+        return post_ids
+    
     async def get_post(self, post_id: int) -> Optional[Post]:
         """Get post by ID"""
         async with self.async_session() as session:
             result = await session.execute(
-                select(Post).options(selectinload(Post.analytics)).where(Post.id == post_id)
+                select(Post)
+                .options(selectinload(Post.analytics), selectinload(Post.media))
+                .where(Post.id == post_id)
             )
             return result.scalar_one_or_none()
     
@@ -81,16 +221,45 @@ class Database:
             post = result.scalar_one_or_none()
             if post:
                 logger.info(f"Updated post ID: {post_id}")
+                if "text" in updates:
+                    similarity_index.add(post.id, post.text)
             return post
     
+    async def get_post_media(self, post_id: int) -> List[PostMedia]:
+        """Get album items of a post in order"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(PostMedia).where(PostMedia.post_id == post_id).order_by(PostMedia.position)
+            )
+            return result.scalars().all()
+    
+    async def update_media_file_ids(self, file_ids: Dict[int, str]):
+        """
+        Store file_ids returned by Telegram for album items
+        
+        Args:
+            file_ids: {post_media_id: file_id}
+        """
+        if not file_ids:
+            return
+        async with self.async_session() as session:
+            for media_id, file_id in file_ids.items():
+                await session.execute(
+                    update(PostMedia).where(PostMedia.id == media_id).values(file_id=file_id)
+                )
+            await session.commit()
+    
     async def delete_post(self, post_id: int) -> bool:
         """Delete post"""
         async with self.async_session() as session:
+            await session.execute(delete(PostMedia).where(PostMedia.post_id == post_id))
+            await session.execute(delete(PostDelivery).where(PostDelivery.post_id == post_id))
             result = await session.execute(delete(Post).where(Post.id == post_id))
             await session.commit()
             deleted = result.rowcount > 0
             if deleted:
                 logger.info(f"Deleted post ID: {post_id}")
+                similarity_index.remove(post_id)
             return deleted
     
     async def get_scheduled_posts(self, limit: int = 50) -> List[Post]:
@@ -116,21 +285,164 @@ class Database:
             )
             return result.scalars().all()
     
+    async def get_post_ids_by_status(self, post_ids: List[int], status: str) -> List[int]:
+        """Subset of post IDs that currently have the given status, in input order"""
+        if not post_ids:
+            return []
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(Post.id).where(and_(Post.id.in_(post_ids), Post.status == status))
+            )
+            matching = set(result.scalars().all())
+            return [post_id for post_id in post_ids if post_id in matching]
+    
+    async def get_publish_times(self, after: datetime) -> List[datetime]:
+        """Publication times of scheduled posts at or after a moment"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(Post.publish_at)
+                .where(and_(Post.status == "scheduled", Post.publish_at >= after))
+            )
+            return result.scalars().all()
+    
+    async def bulk_schedule(self, assignments: Dict[int, datetime]) -> List[int]:
+        """
+        Schedule many drafts in one transaction
+        
+        Args:
+            assignments: {post_id: publish_at}
+            
+        Returns:
+            IDs that were scheduled; posts that are no longer drafts are left unchanged
+        """
+        if not assignments:
+            return []
+        
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(Post.id).where(and_(Post.id.in_(list(assignments)), Post.status == "draft"))
+            )
+            post_ids = sorted(result.scalars().all())
+            if post_ids:
+                await session.execute(update(Post), [
+                    {"id": post_id, "status": "scheduled", "publish_at": assignments[post_id]}
+                    for post_id in post_ids
+                ])
+            await session.commit()
+        
+        logger.info(f"Bulk scheduled {len(post_ids)} posts")
+        return post_ids
+    
+    async def get_posts_page(self, status: str, limit: int = 10,
+                             cursor: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        """
+        Get page of posts by status using keyset pagination on (created_at, id)
+        
+        Args:
+            status: Post status
+            limit: Page size
+            cursor: Token of the previous page's last row (None for first page)
+            
+        Returns:
+            Tuple of (posts, next_cursor); next_cursor is None on the last page
+        """
+        async with self.async_session() as session:
+            query = select(Post).where(Post.status == status)
+            
+            position = decode_cursor(cursor)
+            if position:
+                created_at, post_id = position
+                query = query.where(
+                    or_(
+                        Post.created_at < created_at,
+                        and_(Post.created_at == created_at, Post.id < post_id)
+                    )
+                )
+            
+            # Fetch one extra row to know whether another page exists
+            result = await session.execute(
+                query.order_by(desc(Post.created_at), desc(Post.id)).limit(limit + 1)
+            )
+            posts = result.scalars().all()
+            
+            next_cursor = None
+            if len(posts) > limit:
+                posts = posts[:limit]
+                next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+            
+            return posts, next_cursor
+    
+    async def search_posts(self, query: str, limit: int = 10, cursor: Optional[str] = None,
+                           status: Optional[str] = None) -> Tuple[List[Post], Optional[str]]:
+        """
+        Full-text search over post title, keywords and text
+        
+        Args:
+            query: Search words; every word must match as a prefix
+            limit: Page size
+            cursor: Token of the previous page's last row (None for first page)
+            status: Optional post status filter
+            
+        Returns:
+            Tuple of (posts ordered by relevance, next_cursor)
+        """
+        terms = query_terms(query)
+        if not terms:
+            return [], None
+        
+        dialect = self.engine.dialect.name
+        statement, params = search_statement(
+            dialect, build_match_query(terms, dialect), limit + 1,
+            status=status, after=decode_rank_cursor(cursor)
+        )
+        
+        async with self.async_session() as session:
+            hits = (await session.execute(statement, params)).all()
+            
+            next_cursor = None
+            if len(hits) > limit:
+                hits = hits[:limit]
+                next_cursor = encode_rank_cursor(hits[-1].rank, hits[-1].id)
+            if not hits:
+                return [], None
+            
+            result = await session.execute(select(Post).where(Post.id.in_([hit.id for hit in hits])))
+            posts_by_id = {post.id: post for post in result.scalars().all()}
+            posts = [posts_by_id[hit.id] for hit in hits if hit.id in posts_by_id]
+            return posts, next_cursor
+    
+    async def iter_post_texts(self, batch_size: int = 1000) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Stream (id, text) of all posts
+        
+        Args:
+            batch_size: Rows fetched per round trip
+        """
+        async with self.engine.connect() as conn:
+            result = await conn.stream(
+                select(Post.id, Post.text).execution_options(yield_per=batch_size)
+            )
+            async for partition in result.partitions(batch_size):
+                for post_id, text in partition:
+                    yield post_id, text
+    
     # Analytics operations
     async def log_analytics(self, post_id: int, action: str, user_id: Optional[str] = None, 
-                          extra_data: Optional[str] = None) -> Analytics:  # ИСПРАВЛЕНО: metadata -> extra_data
+                          extra_data: Optional[str] = None,  # ИСПРАВЛЕНО: metadata -> extra_data
+                          channel_id: Optional[int] = None) -> Analytics:
         """Log analytics event"""
         async with self.async_session() as session:
             analytics = Analytics(
                 post_id=post_id,
                 action=action,
                 user_id=user_id,
-                extra_data=extra_data  # ИСПРАВЛЕНО: metadata -> extra_data
+                extra_data=extra_data,  # ИСПРАВЛЕНО: metadata -> extra_data
+                channel_id=channel_id
             )
             session.add(analytics)
             await session.commit()
             await session.refresh(analytics)
-            logger.debug(f"Logged analytics: post_id={post_id}, action={action}")
+            logger.bind(sample="analytics").debug(f"Logged analytics: post_id={post_id}, action={action}")
             return analytics
     
     async def get_post_analytics(self, post_id: int) -> List[Analytics]:
@@ -143,22 +455,77 @@ class Database:
             )
             return result.scalars().all()
     
+    async def get_click_events(self, after_id: int = 0,
+                               limit: int = 5000) -> List[Tuple[int, datetime, Optional[str], Optional[str]]]:
+        """
+        CTA clicks past a watermark, with the clicked post's format
+        
+        Args:
+            after_id: Last analytics ID already seen
+            limit: Maximum rows
+            
+        Returns:
+            (analytics ID, created_at, post_format, user_id) in ID order
+        """
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(Analytics.id, Analytics.created_at, Post.post_format, Analytics.user_id)
+                .outerjoin(Post, Post.id == Analytics.post_id)
+                .where(and_(Analytics.action == "click_CTA", Analytics.id > after_id))
+                .order_by(Analytics.id)
+                .limit(limit)
+            )
+            return [tuple(row) for row in result.all()]
+    
+    def event_counts(self, action: str, since: Optional[datetime] = None, post_id: Optional[int] = None):
+        """
+        Events of an action across the raw and daily tiers
+        
+        Events past the retention window survive only as AnalyticsDaily rows,
+        so report queries count this union instead of the analytics table.
+        Daily rows are included for whole days starting at or after `since`.
+        
+        Args:
+            action: Action name, e.g. "click_CTA"
+            since: Only events at or after this moment (naive UTC)
+            post_id: Only events of this post
+            
+        Returns:
+            Subquery with post_id, channel_id (0 outside channels), day and events columns
+        """
+        raw = select(
+            Analytics.post_id.label("post_id"),
+            func.coalesce(Analytics.channel_id, 0).label("channel_id"),
+            type_coerce(func.date(Analytics.created_at), Date).label("day"),
+            literal(1).label("events")
+        ).where(Analytics.action == action)
+        rolled = select(
+            AnalyticsDaily.post_id, AnalyticsDaily.channel_id, AnalyticsDaily.day, AnalyticsDaily.events
+        ).where(AnalyticsDaily.action == action)
+        
+        if since is not None:
+            first_day = since.date() if since.time() == dtime.min else since.date() + timedelta(days=1)
+            raw = raw.where(Analytics.created_at >= since)
+            rolled = rolled.where(AnalyticsDaily.day >= first_day)
+        if post_id is not None:
+            raw = raw.where(Analytics.post_id == post_id)
+            rolled = rolled.where(AnalyticsDaily.post_id == post_id)
+        
+        return union_all(raw, rolled).subquery("event_counts")
+    
     async def get_analytics_summary(self, days: int = 7) -> Dict[str, Any]:
         """Get analytics summary for specified period"""
         async with self.async_session() as session:
             start_date = datetime.utcnow() - timedelta(days=days)
+            clicks = self.event_counts("click_CTA", start_date)
             
             # Total clicks
-            total_clicks = await session.execute(
-                select(func.count(Analytics.id))
-                .where(and_(Analytics.action == "click_CTA", Analytics.created_at >= start_date))
-            )
+            total_clicks = await session.execute(select(func.sum(clicks.c.events)))
             
             # Top posts by clicks
             top_posts = await session.execute(
-                select(Post.id, Post.title, func.count(Analytics.id).label("clicks"))
-                .join(Analytics)
-                .where(and_(Analytics.action == "click_CTA", Analytics.created_at >= start_date))
+                select(Post.id, Post.title, func.sum(clicks.c.events).label("clicks"))
+                .join(clicks, Post.id == clicks.c.post_id)
                 .group_by(Post.id, Post.title)
                 .order_by(desc("clicks"))
                 .limit(10)
@@ -173,6 +540,364 @@ class Database:
                 ]
             }
     
+    # Export cursor operations
+    async def get_export_cursor(self, consumer: str, stream: str) -> Optional[ExportCursor]:
+        """Get incremental export cursor for consumer/stream"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(ExportCursor).where(
+                    and_(ExportCursor.consumer == consumer, ExportCursor.stream == stream)
+                )
+            )
+            return result.scalar_one_or_none()
+    
+    async def save_export_cursor(self, consumer: str, stream: str, last_id: int,
+                                 last_updated_at: Optional[datetime] = None, rows: int = 0) -> ExportCursor:
+        """Advance incremental export cursor after successful delivery"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(ExportCursor).where(
+                    and_(ExportCursor.consumer == consumer, ExportCursor.stream == stream)
+                )
+            )
+            cursor = result.scalar_one_or_none()
+            
+            if cursor is None:
+                cursor = ExportCursor(consumer=consumer, stream=stream, rows_exported=0)
+                session.add(cursor)
+            
+            cursor.last_id = last_id
+            cursor.last_updated_at = last_updated_at
+            cursor.rows_exported = (cursor.rows_exported or 0) + rows
+            
+            await session.commit()
+            await session.refresh(cursor)
+            logger.info(f"Export cursor {consumer}/{stream} advanced to id={last_id}, ts={last_updated_at}")
+            return cursor
+    
+    async def reset_export_cursor(self, consumer: str, stream: Optional[str] = None) -> int:
+        """Reset cursor(s) so the next incremental export starts from scratch"""
+        async with self.async_session() as session:
+            query = delete(ExportCursor).where(ExportCursor.consumer == consumer)
+            if stream:
+                query = query.where(ExportCursor.stream == stream)
+            result = await session.execute(query)
+            await session.commit()
+            return result.rowcount
+    
+    async def get_min_export_cursor(self, stream: str) -> Optional[int]:
+        """
+        Lowest last_id of the delta export consumers of a stream
+        
+        Internal job cursors (consumer "_jobs") are not counted.
+        
+        Returns:
+            Lowest cursor ID, or None when no consumer has pulled the stream
+        """
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(func.min(ExportCursor.last_id)).where(
+                    and_(ExportCursor.stream == stream, ExportCursor.consumer != "_jobs")
+                )
+            )
+            return result.scalar()
+    
+    def _upsert_statement(self, model, index_elements: List[str], add_columns: List[str]):
+        """
+        INSERT ... ON CONFLICT DO UPDATE adding to counter columns
+        
+        Args:
+            model: Mapped class with a unique constraint on index_elements
+            index_elements: Conflict target columns
+            add_columns: Columns incremented by the inserted value on conflict
+        """
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        
+        statement = dialect_insert(model)
+        return statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: getattr(model, column) + getattr(statement.excluded, column) for column in add_columns}
+        )
+    
+    # Cohort operations
+    async def add_click_activity(self, counts: Dict[Tuple[str, str, date], int], stream: str, last_id: int):
+        """
+        Add clicks per (user, format, week) and advance the job cursor in one transaction
+        
+        Args:
+            counts: {(user_id, post_format, week): clicks}
+            stream: Cursor stream name
+            last_id: Last analytics ID included in counts
+        """
+        async with self.async_session() as session:
+            if counts:
+                await session.execute(
+                    self._upsert_statement(ClickActivity, ["user_id", "post_format", "week"], ["clicks"]),
+                    [
+                        {"user_id": user_id, "post_format": post_format, "week": week, "clicks": clicks}
+                        for (user_id, post_format, week), clicks in counts.items()
+                    ]
+                )
+            
+            result = await session.execute(
+                select(ExportCursor).where(and_(ExportCursor.consumer == "_jobs", ExportCursor.stream == stream))
+            )
+            cursor = result.scalar_one_or_none()
+            if cursor is None:
+                cursor = ExportCursor(consumer="_jobs", stream=stream, rows_exported=0)
+                session.add(cursor)
+            cursor.last_id = last_id
+            cursor.rows_exported = (cursor.rows_exported or 0) + sum(counts.values())
+            
+            await session.commit()
+    
+    async def reset_click_activity(self):
+        """Drop all click activity (rebuilt from analytics by the cohort job)"""
+        async with self.async_session() as session:
+            await session.execute(delete(ClickActivity))
+            await session.commit()
+    
+    # Retention operations
+    async def get_expired_analytics(self, before: datetime, after_id: int = 0, limit: int = 1000,
+                                    max_id: Optional[int] = None) -> List[Tuple]:
+        """
+        Raw events older than the retention cutoff
+        
+        Args:
+            before: Events created before this moment (naive UTC)
+            after_id: Last analytics ID already processed
+            limit: Maximum rows
+            max_id: Only events up to and including this ID (e.g. the lowest delta export cursor)
+            
+        Returns:
+            (id, post_id, action, user_id, created_at, extra_data, channel_id) in ID order
+        """
+        query = select(
+            Analytics.id, Analytics.post_id, Analytics.action, Analytics.user_id,
+            Analytics.created_at, Analytics.extra_data, Analytics.channel_id
+        ).where(and_(Analytics.created_at < before, Analytics.id > after_id))
+        if max_id is not None:
+            query = query.where(Analytics.id <= max_id)
+        
+        async with self.async_session() as session:
+            result = await session.execute(query.order_by(Analytics.id).limit(limit))
+            return [tuple(row) for row in result.all()]
+    
+    async def roll_up_analytics(self, counts: Dict[Tuple[date, int, str, int], int],
+                                before: datetime, after_id: int, last_id: int) -> int:
+        """
+        Add daily counts and delete the raw events they came from in one transaction
+        
+        Args:
+            counts: {(day, post_id, action, channel_id): events}
+            before: Retention cutoff the events were selected with
+            after_id: Events with a higher ID ...
+            last_id: ... up to and including this ID are deleted
+            
+        Returns:
+            Number of deleted raw events
+        """
+        async with self.async_session() as session:
+            if counts:
+                await session.execute(
+                    self._upsert_statement(AnalyticsDaily, ["day", "post_id", "action", "channel_id"], ["events"]),
+                    [
+                        {"day": day, "post_id": post_id, "action": action, "channel_id": channel_id, "events": events}
+                        for (day, post_id, action, channel_id), events in counts.items()
+                    ]
+                )
+            
+            result = await session.execute(
+                delete(Analytics).where(and_(
+                    Analytics.id > after_id, Analytics.id <= last_id, Analytics.created_at < before
+                ))
+            )
+            await session.commit()
+            return result.rowcount
+    
+    async def get_cohort_rows(self) -> List[Tuple[date, date, int]]:
+        """
+        Active subscribers per first-click week and activity week
+        
+        Returns:
+            (cohort week, activity week, users) rows
+        """
+        async with self.async_session() as session:
+            cohorts = (
+                select(ClickActivity.user_id, func.min(ClickActivity.week).label("cohort"))
+                .group_by(ClickActivity.user_id)
+                .subquery()
+            )
+            result = await session.execute(
+                select(cohorts.c.cohort, ClickActivity.week, func.count(func.distinct(ClickActivity.user_id)))
+                .join(cohorts, cohorts.c.user_id == ClickActivity.user_id)
+                .group_by(cohorts.c.cohort, ClickActivity.week)
+            )
+            return [tuple(row) for row in result.all()]
+    
+    async def get_format_repeat_rows(self) -> List[Tuple[str, int, int, int]]:
+        """
+        Subscribers per format with repeat and returning counts
+        
+        Returns:
+            (post_format, users, users with 2+ clicks, users active in 2+ weeks) rows
+        """
+        async with self.async_session() as session:
+            per_user = (
+                select(
+                    ClickActivity.post_format,
+                    func.sum(ClickActivity.clicks).label("clicks"),
+                    func.count(ClickActivity.week).label("weeks")
+                )
+                .group_by(ClickActivity.user_id, ClickActivity.post_format)
+                .subquery()
+            )
+            result = await session.execute(
+                select(
+                    per_user.c.post_format,
+                    func.count(),
+                    func.sum(case((per_user.c.clicks >= 2, 1), else_=0)),
+                    func.sum(case((per_user.c.weeks >= 2, 1), else_=0))
+                )
+                .group_by(per_user.c.post_format)
+                .order_by(func.count().desc())
+            )
+            return [tuple(row) for row in result.all()]
+    
+    # Channel operations
+    async def get_channels(self, active_only: bool = True) -> List[Channel]:
+        """Get registered channels"""
+        async with self.async_session() as session:
+            query = select(Channel).order_by(Channel.id)
+            if active_only:
+                query = query.where(Channel.is_active.is_(True))
+            result = await session.execute(query)
+            return result.scalars().all()
+    
+    async def add_channel(self, chat_id: str, title: Optional[str] = None,
+                          region: Optional[str] = None) -> Channel:
+        """Register a channel or re-activate a removed one"""
+        async with self.async_session() as session:
+            result = await session.execute(select(Channel).where(Channel.chat_id == str(chat_id)))
+            channel = result.scalar_one_or_none()
+            
+            if channel:
+                channel.is_active = True
+                channel.title = title or channel.title
+                channel.region = region or channel.region
+            else:
+                channel = Channel(chat_id=str(chat_id), title=title, region=region)
+                session.add(channel)
+            
+            await session.commit()
+            await session.refresh(channel)
+            logger.info(f"Channel {chat_id} registered with ID: {channel.id}")
+            return channel
+    
+    async def deactivate_channel(self, channel_id: int) -> bool:
+        """Stop publishing to a channel, keeping its delivery history"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                update(Channel).where(Channel.id == channel_id).values(is_active=False)
+            )
+            await session.commit()
+            return result.rowcount > 0
+    
+    async def get_deliveries(self, post_id: int, channel_ids: List[int]) -> Dict[int, PostDelivery]:
+        """
+        Get delivery rows of a post, creating pending ones for new channels
+        
+        Args:
+            post_id: Post ID
+            channel_ids: Target channel IDs
+            
+        Returns:
+            Deliveries by channel ID
+        """
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(PostDelivery).where(
+                    and_(PostDelivery.post_id == post_id, PostDelivery.channel_id.in_(channel_ids))
+                )
+            )
+            deliveries = {delivery.channel_id: delivery for delivery in result.scalars().all()}
+            
+            missing = [channel_id for channel_id in channel_ids if channel_id not in deliveries]
+            if missing:
+                for channel_id in missing:
+                    deliveries[channel_id] = PostDelivery(post_id=post_id, channel_id=channel_id, attempts=0)
+                    session.add(deliveries[channel_id])
+                await session.commit()
+            
+            return deliveries
+    
+    async def update_delivery(self, delivery_id: int, updates: Dict[str, Any]):
+        """Update delivery state"""
+        async with self.async_session() as session:
+            await session.execute(
+                update(PostDelivery).where(PostDelivery.id == delivery_id).values(**updates)
+            )
+            await session.commit()
+    
+    async def get_channel_stats(self, post_id: Optional[int] = None) -> Dict[int, Dict[str, int]]:
+        """
+        Per-channel delivery and CTA click counts
+        
+        Args:
+            post_id: Limit to one post (all posts when None)
+            
+        Returns:
+            {channel_id: {"sent": n, "failed": n, "clicks": n}}
+        """
+        async with self.async_session() as session:
+            deliveries = select(PostDelivery.channel_id, PostDelivery.status, func.count(PostDelivery.id))
+            counts = self.event_counts("click_CTA", post_id=post_id)
+            clicks = select(counts.c.channel_id, func.sum(counts.c.events)).where(counts.c.channel_id != 0)
+            if post_id is not None:
+                deliveries = deliveries.where(PostDelivery.post_id == post_id)
+            
+            stats: Dict[int, Dict[str, int]] = {}
+            for channel_id, status, count in (await session.execute(
+                deliveries.group_by(PostDelivery.channel_id, PostDelivery.status)
+            )).all():
+                stats.setdefault(channel_id, {"sent": 0, "failed": 0, "clicks": 0})[status] = count
+            for channel_id, count in (await session.execute(clicks.group_by(counts.c.channel_id))).all():
+                stats.setdefault(channel_id, {"sent": 0, "failed": 0, "clicks": 0})["clicks"] = count
+            
+            return stats
+    
+    # Recurring template operations
+    async def create_template(self, template_data: Dict[str, Any]) -> PostTemplate:
+        """Create a recurring post template"""
+        async with self.async_session() as session:
+            template = PostTemplate(**template_data)
+            session.add(template)
+            await session.commit()
+            await session.refresh(template)
+            logger.info(f"Created post template with ID: {template.id}")
+            return template
+    
+    async def get_templates(self, active_only: bool = True) -> List[PostTemplate]:
+        """Get recurring post templates"""
+        async with self.async_session() as session:
+            query = select(PostTemplate).order_by(PostTemplate.id)
+            if active_only:
+                query = query.where(PostTemplate.is_active.is_(True))
+            result = await session.execute(query)
+            return result.scalars().all()
+    
+    async def update_template(self, template_id: int, updates: Dict[str, Any]) -> bool:
+        """Update recurring post template"""
+        async with self.async_session() as session:
+            result = await session.execute(
+                update(PostTemplate).where(PostTemplate.id == template_id).values(**updates)
+            )
+            await session.commit()
+            return result.rowcount > 0
+    
     # User operations
     async def create_or_update_user(self, telegram_id: int, user_data: Dict[str, Any]) -> User:
         """Create or update user"""
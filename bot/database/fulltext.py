@@ -0,0 +1,172 @@
+"""
+Full-text search for TimeToShopping_bot
+SQLite FTS5 / PostgreSQL tsvector index over post title, keywords and text
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from logging_config import logger
+
+FTS_TABLE = "posts_fts"
+
+# Column weights for ranking: title and keywords matter more than body text
+TITLE_WEIGHT = 3.0
+KEYWORDS_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+
+# Words only (\w covers Armenian); FTS query syntax characters are dropped
+_WORD = re.compile(r"\w+")
+
+# Longest accepted query, in words
+MAX_QUERY_TERMS = 8
+
+# External-content FTS5 table: posts keeps the text, posts_fts only the index.
+# unicode61 folds case for Armenian and strips diacritics.
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, keywords, text,
+        content='posts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords, text)
+        VALUES (new.id, new.title, new.keywords, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords, text)
+        VALUES ('delete', old.id, old.title, old.keywords, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, keywords, text ON posts BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, keywords, text)
+        VALUES ('delete', old.id, old.title, old.keywords, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, title, keywords, text)
+        VALUES (new.id, new.title, new.keywords, new.text);
+    END""",
+]
+
+# Stored generated column is maintained by PostgreSQL on every write,
+# which is the tsvector equivalent of the SQLite triggers
+_POSTGRES_DDL = [
+    f"""ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(keywords, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(text, '')), 'D')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+def query_terms(query: str) -> List[str]:
+    """
+    Split user input into search terms
+
+    Args:
+        query: Raw search string
+
+    Returns:
+        Lowercased words, at most MAX_QUERY_TERMS
+    """
+    return [word.lower() for word in _WORD.findall(query)][:MAX_QUERY_TERMS]
+
+def build_match_query(terms: List[str], dialect: str = "sqlite") -> str:
+    """
+    Build an index query matching all terms as prefixes
+
+    Prefix matching lets "կոշիկ" find "կոշիկներ" without a stemmer.
+
+    Args:
+        terms: Words from query_terms
+        dialect: sqlite or postgresql
+
+    Returns:
+        FTS5 MATCH expression or to_tsquery expression
+    """
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def ensure_fulltext(sync_conn):
+    """
+    Create the search index if missing and fill it from existing posts
+
+    Args:
+        sync_conn: Synchronous connection (called through run_sync)
+    """
+    dialect = sync_conn.dialect.name
+    if dialect == "sqlite":
+        exists = sync_conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+        for statement in _SQLITE_DDL:
+            sync_conn.execute(text(statement))
+        if not exists:
+            rebuild(sync_conn)
+    elif dialect == "postgresql":
+        for statement in _POSTGRES_DDL:
+            sync_conn.execute(text(statement))
+    else:
+        logger.warning(f"Full-text search is not supported for {dialect}")
+
+def rebuild(sync_conn):
+    """
+    Rebuild the SQLite FTS index from the posts table
+
+    Args:
+        sync_conn: Synchronous connection
+    """
+    if sync_conn.dialect.name != "sqlite":
+        return
+    sync_conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    logger.info("Full-text index rebuilt")
+
+def search_statement(dialect: str, match: str, limit: int,
+                     status: Optional[str] = None,
+                     after: Optional[Tuple[float, int]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Build the ranked search query
+
+    Rows are ordered by (rank, id) ascending, where lower rank is a better
+    match, so pages can continue from the last (rank, id) of the previous page.
+
+    Args:
+        dialect: sqlite or postgresql
+        match: Expression from build_match_query
+        limit: Rows to fetch
+        status: Optional post status filter
+        after: (rank, id) of the previous page's last row
+
+    Returns:
+        Tuple of (text statement yielding id, rank rows; parameters)
+    """
+    params: Dict[str, Any] = {"match": match, "limit": limit}
+
+    if dialect == "postgresql":
+        inner = (
+            "SELECT p.id AS id, p.status AS status, "
+            "-ts_rank(p.search_vector, to_tsquery('simple', :match)) AS rank "
+            "FROM posts p WHERE p.search_vector @@ to_tsquery('simple', :match)"
+        )
+    else:
+        # bm25() is already negative: better matches sort first
+        inner = (
+            f"SELECT p.id AS id, p.status AS status, "
+            f"bm25({FTS_TABLE}, {TITLE_WEIGHT}, {KEYWORDS_WEIGHT}, {TEXT_WEIGHT}) AS rank "
+            f"FROM {FTS_TABLE} JOIN posts p ON p.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match"
+        )
+
+    conditions = []
+    if status:
+        conditions.append("status = :status")
+        params["status"] = status
+    if after:
+        conditions.append("(rank > :after_rank OR (rank = :after_rank AND id > :after_id))")
+        params["after_rank"], params["after_id"] = after
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = f"SELECT id, rank FROM ({inner}) AS hits{where} ORDER BY rank, id LIMIT :limit"
+    return text(sql), params
@@ -5,7 +5,7 @@ SQLAlchemy models for posts and analytics
 
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -19,9 +19,9 @@ class Post(Base):
     title = Column(String(255), nullable=True)
     keywords = Column(Text, nullable=True)
     text = Column(Text, nullable=False)
-    media_type = Column(String(50), nullable=True)  # photo, video, gif
+    media_type = Column(String(50), nullable=True)  # photo, video, gif, album
     file_id = Column(String(255), nullable=True)
-    status = Column(String(50), nullable=False, default="draft")  # draft, scheduled, published
+    status = Column(String(50), nullable=False, default="draft")  # draft, scheduled, published, failed
     publish_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -32,9 +32,28 @@ class Post(Base):
     # Post format type
     post_format = Column(String(50), nullable=True)  # selling, collection, info, promo
     
+    # Recurring template the post was generated from
+    template_id = Column(Integer, ForeignKey("post_templates.id"), nullable=True)
+    
     # Relationship with analytics
     analytics = relationship("Analytics", back_populates="post", cascade="all, delete-orphan")
     
+    # Per-channel publication state
+    deliveries = relationship("PostDelivery", back_populates="post", cascade="all, delete-orphan")
+    
+    # Album items (media_type == "album")
+    media = relationship(
+        "PostMedia", back_populates="post", cascade="all, delete-orphan", order_by="PostMedia.position"
+    )
+    
+    __table_args__ = (
+        # Keyset scans for incremental exports
+        Index("ix_posts_updated_at_id", "updated_at", "id"),
+        # Keyset pagination of listings by status
+        Index("ix_posts_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_posts_template_id", "template_id"),
+    )
+    
     def __repr__(self):
         return f"<Post(id={self.id}, status='{self.status}', created_at='{self.created_at}')>"
     
@@ -51,7 +70,77 @@ class Post(Base):
             "publish_at": self.publish_at.isoformat() if self.publish_at else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "created_by": self.created_by,
-            "post_format": self.post_format
+            "post_format": self.post_format,
+            "template_id": self.template_id
+        }
+
+class PostTemplate(Base):
+    """Model for storing recurring post templates"""
+    __tablename__ = "post_templates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    post_format = Column(String(50), nullable=False)  # selling, collection, info, promo
+    keywords = Column(Text, nullable=False)  # Keyword sets, one per line, rotated per occurrence
+    details = Column(Text, nullable=True)  # Additional details for the AI prompt
+    cron = Column(String(100), nullable=False)  # Crontab expression in SCHEDULER_TIMEZONE
+    is_active = Column(Boolean, nullable=False, default=True)
+    
+    # Latest materialized occurrence (naive, SCHEDULER_TIMEZONE like Post.publish_at)
+    last_occurrence_at = Column(DateTime, nullable=True)
+    occurrences = Column(Integer, nullable=False, default=0)
+    
+    created_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PostTemplate(id={self.id}, name='{self.name}', cron='{self.cron}')>"
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "post_format": self.post_format,
+            "keywords": self.keywords,
+            "details": self.details,
+            "cron": self.cron,
+            "is_active": self.is_active,
+            "last_occurrence_at": self.last_occurrence_at.isoformat() if self.last_occurrence_at else None,
+            "occurrences": self.occurrences
+        }
+
+class PostMedia(Base):
+    """Model for storing album items of a post"""
+    __tablename__ = "post_media"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    media_type = Column(String(50), nullable=False)  # photo, video
+    file_id = Column(String(255), nullable=False)  # Telegram file_id, refreshed from send results
+    file_unique_id = Column(String(100), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship with post
+    post = relationship("Post", back_populates="media")
+    
+    __table_args__ = (
+        Index("ix_post_media_post_id_position", "post_id", "position"),
+    )
+    
+    def __repr__(self):
+        return f"<PostMedia(post_id={self.post_id}, position={self.position}, media_type='{self.media_type}')>"
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "post_id": self.post_id,
+            "position": self.position,
+            "media_type": self.media_type,
+            "file_id": self.file_id,
+            "file_unique_id": self.file_unique_id
         }
 
 class Analytics(Base):
@@ -64,6 +153,9 @@ class Analytics(Base):
     user_id = Column(String(100), nullable=True)  # Telegram user_id
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Channel the event came from (None for events outside channels)
+    channel_id = Column(Integer, ForeignKey("channels.id"), nullable=True)
+    
     # Additional metadata - ПЕРЕИМЕНОВАНО из metadata в extra_data
     extra_data = Column(Text, nullable=True)  # JSON string for extra data
     
@@ -81,9 +173,77 @@ class Analytics(Base):
             "action": self.action,
             "user_id": self.user_id,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "channel_id": self.channel_id,
             "extra_data": self.extra_data  # Изменено с metadata на extra_data
         }
 
+class Channel(Base):
+    """Model for storing channels posts are published to"""
+    __tablename__ = "channels"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(String(100), unique=True, nullable=False)  # @username or -100... numeric ID
+    title = Column(String(255), nullable=True)
+    region = Column(String(100), nullable=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship with deliveries
+    deliveries = relationship("PostDelivery", back_populates="channel")
+    
+    def __repr__(self):
+        return f"<Channel(id={self.id}, chat_id='{self.chat_id}', active={self.is_active})>"
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "chat_id": self.chat_id,
+            "title": self.title,
+            "region": self.region,
+            "is_active": self.is_active,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+class PostDelivery(Base):
+    """Model for storing publication of a post to one channel"""
+    __tablename__ = "post_deliveries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    channel_id = Column(Integer, ForeignKey("channels.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, sent, failed
+    message_id = Column(Integer, nullable=True)  # Telegram message ID in the channel
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    post = relationship("Post", back_populates="deliveries")
+    channel = relationship("Channel", back_populates="deliveries")
+    
+    __table_args__ = (
+        UniqueConstraint("post_id", "channel_id", name="uq_post_delivery_post_channel"),
+    )
+    
+    def __repr__(self):
+        return f"<PostDelivery(post_id={self.post_id}, channel_id={self.channel_id}, status='{self.status}')>"
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "post_id": self.post_id,
+            "channel_id": self.channel_id,
+            "status": self.status,
+            "message_id": self.message_id,
+            "attempts": self.attempts,
+            "error": self.error,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None
+        }
+
 class User(Base):
     """Model for storing user information"""
     __tablename__ = "users"
@@ -111,4 +271,69 @@ class User(Base):
             "is_authorized": self.is_authorized,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "last_activity": self.last_activity.isoformat() if self.last_activity else None
-        }
\ No newline at end of file
+        }
+
+class ExportCursor(Base):
+    """Model for storing per-consumer incremental export positions"""
+    __tablename__ = "export_cursors"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    consumer = Column(String(100), nullable=False)  # e.g. "bi"
+    stream = Column(String(50), nullable=False)  # analytics, posts
+    last_id = Column(Integer, nullable=False, default=0)
+    last_updated_at = Column(DateTime, nullable=True)  # posts stream only
+    rows_exported = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("consumer", "stream", name="uq_export_cursor_consumer_stream"),
+    )
+    
+    def __repr__(self):
+        return f"<ExportCursor(consumer='{self.consumer}', stream='{self.stream}', last_id={self.last_id})>"
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "consumer": self.consumer,
+            "stream": self.stream,
+            "last_id": self.last_id,
+            "last_updated_at": self.last_updated_at.isoformat() if self.last_updated_at else None,
+            "rows_exported": self.rows_exported,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ClickActivity(Base):
+    """Model for storing CTA clicks per subscriber, format and week (cohort source)"""
+    __tablename__ = "click_activity"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String(100), nullable=False)  # Telegram user_id
+    post_format = Column(String(50), nullable=False, default="")  # "" for posts without format
+    week = Column(Date, nullable=False)  # Monday of the click week (UTC)
+    clicks = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_format", "week", name="uq_click_activity_user_format_week"),
+    )
+    
+    def __repr__(self):
+        return f"<ClickActivity(user_id='{self.user_id}', format='{self.post_format}', week={self.week}, clicks={self.clicks})>"
+
+class AnalyticsDaily(Base):
+    """Model for storing analytics events rolled up per day (events past the retention window)"""
+    __tablename__ = "analytics_daily"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)  # UTC day of the events
+    post_id = Column(Integer, nullable=False, index=True)
+    action = Column(String(100), nullable=False)
+    channel_id = Column(Integer, nullable=False, default=0)  # 0 for events outside channels
+    events = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("day", "post_id", "action", "channel_id", name="uq_analytics_daily_day_post_action_channel"),
+    )
+    
+    def __repr__(self):
+        return f"<AnalyticsDaily(day={self.day}, post_id={self.post_id}, action='{self.action}', events={self.events})>"
@@ -0,0 +1,80 @@
+"""
+Keyset pagination helpers for TimeToShopping_bot
+Compact cursor tokens that fit into Telegram callback_data (64 bytes)
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+_EPOCH = datetime(1970, 1, 1)
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Telegram limit for InlineKeyboardButton.callback_data
+CALLBACK_DATA_LIMIT = 64
+
+def _to_base36(value: int) -> str:
+    if value < 0:
+        return "-" + _to_base36(-value)
+    digits = []
+    while True:
+        value, remainder = divmod(value, 36)
+        digits.append(_ALPHABET[remainder])
+        if not value:
+            return "".join(reversed(digits))
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """
+    Encode (created_at, id) keyset position as a short token
+
+    Args:
+        created_at: Naive UTC timestamp of the last row on the page
+        post_id: ID of the last row on the page
+
+    Returns:
+        Token like "lx2k9q1c0_1z" (microseconds and id in base36)
+    """
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{_to_base36(micros)}_{_to_base36(post_id)}"
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    Decode cursor token produced by encode_cursor
+
+    Returns:
+        (created_at, id) tuple or None for an empty/invalid token
+    """
+    if not token:
+        return None
+    try:
+        micros, post_id = token.split("_", 1)
+        return _EPOCH + timedelta(microseconds=int(micros, 36)), int(post_id, 36)
+    except (ValueError, OverflowError):
+        return None
+
+def encode_rank_cursor(rank: float, post_id: int) -> str:
+    """
+    Encode (rank, id) position of a ranked search page
+
+    Args:
+        rank: Rank of the last row on the page (repr round-trips exactly)
+        post_id: ID of the last row on the page
+
+    Returns:
+        Token like "-4.21e-06_1z"
+    """
+    return f"{rank!r}_{_to_base36(post_id)}"
+
+def decode_rank_cursor(token: Optional[str]) -> Optional[Tuple[float, int]]:
+    """
+    Decode cursor token produced by encode_rank_cursor
+
+    Returns:
+        (rank, id) tuple or None for an empty/invalid token
+    """
+    if not token:
+        return None
+    try:
+        rank, post_id = token.rsplit("_", 1)
+        return float(rank), int(post_id, 36)
+    except ValueError:
+        return None
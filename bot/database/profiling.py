@@ -0,0 +1,146 @@
+"""
+Query profiling for TimeToShopping_bot
+Per-statement aggregation of SQL timings fed by engine cursor events
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from logging_config import logger
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_EXPANDING_PARAM = re.compile(r"\(\s*__\[POSTCOMPILE_\w+\]\s*\)")
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    Normalize SQL so statements differing only in literals share one entry
+
+    Args:
+        statement: SQL as sent to the DB-API cursor
+
+    Returns:
+        Statement with literals replaced by ? and IN-lists collapsed
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _EXPANDING_PARAM.sub("(?)", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return sql
+
+class QueryStats:
+    """Aggregated timings of one normalized statement"""
+
+    __slots__ = ("statement", "count", "total", "max", "rows")
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # None until the driver reports a rowcount; SELECTs usually report -1
+        self.rows: Optional[int] = None
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 2),
+            "mean_ms": round(self.mean * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            "rows": self.rows,
+        }
+
+class QueryProfiler:
+    """
+    Opt-in query profiler
+
+    Database._install_query_hooks calls record() after every cursor execute;
+    when disabled it returns immediately, so the hooks stay cheap.
+    """
+
+    def __init__(self, enabled: bool = False, slow_ms: float = 0, max_statements: int = 500):
+        """
+        Args:
+            enabled: Aggregate per-statement stats
+            slow_ms: Log statements slower than this (0 disables the slow log)
+            max_statements: Cap of distinct statements kept in memory
+        """
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self.stats: Dict[str, QueryStats] = {}
+
+    def record(self, statement: str, elapsed: float, rowcount: int = -1, parameters=None):
+        """
+        Record a finished statement
+
+        Args:
+            statement: SQL statement
+            elapsed: Execution time in seconds
+            rowcount: DB-API cursor rowcount (-1 when unknown)
+            parameters: Bound parameters, only used for the slow log
+        """
+        if self.slow_ms and elapsed * 1000 >= self.slow_ms:
+            logger.warning(
+                f"Slow query {elapsed * 1000:.1f}ms: {_WHITESPACE.sub(' ', statement)[:500]} "
+                f"params={str(parameters)[:200]}"
+            )
+
+        if not self.enabled:
+            return
+
+        key = normalize_statement(statement)
+        stats = self.stats.get(key)
+        if stats is None:
+            if len(self.stats) >= self.max_statements:
+                return
+            stats = self.stats[key] = QueryStats(key)
+
+        stats.count += 1
+        stats.total += elapsed
+        if elapsed > stats.max:
+            stats.max = elapsed
+        if rowcount is not None and rowcount >= 0:
+            stats.rows = (stats.rows or 0) + rowcount
+
+    def top(self, limit: int = 10, order_by: str = "total") -> List[QueryStats]:
+        """
+        Get most expensive statements
+
+        Args:
+            limit: Number of statements
+            order_by: total, max, count or mean
+
+        Returns:
+            List of QueryStats sorted descending
+        """
+        if order_by not in ("total", "max", "count", "mean"):
+            raise ValueError(f"Unknown sort key: {order_by}")
+        return sorted(self.stats.values(), key=lambda stats: getattr(stats, order_by), reverse=True)[:limit]
+
+    def reset(self):
+        """Drop collected statistics"""
+        self.stats.clear()
+
+    def report(self, limit: int = 10, order_by: str = "total", width: Optional[int] = 300) -> str:
+        """Plain-text top-N report"""
+        lines = []
+        for index, stats in enumerate(self.top(limit, order_by), 1):
+            statement = stats.statement if width is None else stats.statement[:width]
+            rows = "–" if stats.rows is None else stats.rows
+            lines.append(
+                f"{index}. total {stats.total * 1000:.1f}ms | n={stats.count} | "
+                f"mean {stats.mean * 1000:.2f}ms | max {stats.max * 1000:.1f}ms | rows {rows}\n"
+                f"   {statement}"
+            )
+        return "\n".join(lines)
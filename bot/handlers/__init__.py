@@ -3,10 +3,10 @@ Handlers package for TimeToShopping_bot
 Contains all command and callback handlers
 """
 
-from . import admin, analytics, scheduler
+from . import admin, analytics, scheduler, channels
 
 # Export all routers for easy import
-__all__ = ["admin", "analytics", "scheduler"]
+__all__ = ["admin", "analytics", "scheduler", "channels"]
 
 def register_all_handlers(dp):
     """
@@ -17,4 +17,5 @@ def register_all_handlers(dp):
     """
     dp.include_router(admin.router)
     dp.include_router(analytics.router)
-    dp.include_router(scheduler.router)
\ No newline at end of file
+    dp.include_router(scheduler.router)
+    dp.include_router(channels.router)
\ No newline at end of file
@@ -3,23 +3,32 @@ Admin handlers for TimeToShopping_bot
 Handles post creation, editing, and management
 """
 
+import html
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, ContentType
+from aiogram.types import Message, CallbackQuery, ContentType, InputMediaPhoto, InputMediaVideo
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.filters import Command, StateFilter
 
+from config import config
 from logging_config import logger
 from bot.database.db import db
 from bot.ai.openai_client import openai_client
+from bot.ai.similarity import similarity_index
+from bot.ai.time_recommender import time_recommender
+from bot.ai.pregeneration import pregeneration_queue, parse_pregen_lines
+from bot.ai.prompts import get_all_formats
 from bot.keyboards.common import (
     get_main_menu_keyboard, get_post_format_keyboard, get_post_actions_keyboard,
     get_edit_options_keyboard, get_confirmation_keyboard, get_cta_keyboard,
-    get_calendar_keyboard, get_time_keyboard, get_media_type_keyboard
+    get_calendar_keyboard, get_time_keyboard, get_media_type_keyboard,
+    get_posts_page_keyboard
 )
-from bot.utils.scheduler import scheduler_manager
+from bot.utils.scheduler import scheduler_manager, PublishOutcome
+from bot.utils.media_group import media_group_collector, album_item
+from bot.utils.post_import import ImportReport, iter_document_rows, validated_batches
 
 router = Router()
 
@@ -35,6 +44,14 @@ class PostCreationStates(StatesGroup):
     selecting_date = State()
     selecting_time = State()
 
+class SearchStates(StatesGroup):
+    """States for post search"""
+    entering_query = State()
+
+class ImportStates(StatesGroup):
+    """States for bulk post import"""
+    waiting_document = State()
+
 # Start command
 @router.message(Command("start"))
 async def cmd_start(message: Message, state: FSMContext):
@@ -261,7 +278,8 @@ async def process_media_selection(callback: CallbackQuery, state: FSMContext):
         media_instructions = {
             "photo": "🖼️ Ուղարկեք նկարը:",
             "video": "🎥 Ուղարկեք վիդեոն:",
-            "gif": "🎞️ Ուղարկեք GIF-ը:"
+            "gif": "🎞️ Ուղարկեք GIF-ը:",
+            "album": "🗂️ Ուղարկեք 2-10 նկար կամ վիդեո մեկ ալբոմով:"
         }
         
         instruction = media_instructions.get(media_type, "Ուղարկեք ֆայլը:")
@@ -277,6 +295,10 @@ async def process_media_upload(message: Message, state: FSMContext):
     data = await state.get_data()
     expected_media_type = data.get("media_type")
     
+    if expected_media_type == "album":
+        await process_album_upload(message, state)
+        return
+    
     # Get file_id based on media type
     file_id = None
     actual_media_type = None
@@ -299,6 +321,24 @@ async def process_media_upload(message: Message, state: FSMContext):
     await state.update_data(file_id=file_id, media_type=actual_media_type)
     await finalize_post_creation(message, state)
 
+async def process_album_upload(message: Message, state: FSMContext):
+    """Collect album items delivered as separate updates"""
+    if not message.media_group_id:
+        await message.answer("❌ Ուղարկեք առնվազն 2 նկար կամ վիդեո մեկ ալբոմով:")
+        return
+    
+    messages = await media_group_collector.collect(message)
+    if messages is None:
+        return  # Another item of the group finishes it
+    
+    items = [item for item in map(album_item, messages) if item]
+    if len(items) < 2:
+        await message.answer("❌ Ալբոմում պետք է լինի 2-10 նկար կամ վիդեո:")
+        return
+    
+    await state.update_data(media_type="album", file_id=None, album=items)
+    await finalize_post_creation(message, state)
+
 async def finalize_post_creation(event, state: FSMContext):
     """Finalize post creation and show preview"""
     data = await state.get_data()
@@ -316,7 +356,7 @@ async def finalize_post_creation(event, state: FSMContext):
             "created_by": event.from_user.id if hasattr(event, 'from_user') else None
         }
         
-        post = await db.create_post(post_data)
+        post = await db.create_post(post_data, media=data.get("album"))
         
         await state.clear()
         await state.set_state(PostCreationStates.final_review)
@@ -332,12 +372,37 @@ async def finalize_post_creation(event, state: FSMContext):
         else:
             await event.message.answer("❌ Չհաջողվեց ստեղծել փոստը:")
 
+async def get_duplicate_warning(post) -> str:
+    """Warning line listing near-duplicate posts (empty when none)"""
+    try:
+        await similarity_index.ensure_loaded()
+        matches = similarity_index.query(post.text, exclude_id=post.id)
+    except Exception as e:
+        logger.error(f"Near-duplicate check failed for post {post.id}: {e}")
+        return ""
+    
+    if not matches:
+        return ""
+    
+    similar = ", ".join(f"#{post_id} ({similarity:.0%})" for post_id, similarity in matches)
+    return f"\n\n⚠️ <b>Նման փոստեր արդեն կան:</b> {similar}"
+
 async def show_post_preview(event, post):
     """Show post preview with actions"""
     preview_text = f"📋 <b>Փոստի նախադիտում:</b>\n\n{post.text}"
+    preview_text += await get_duplicate_warning(post)
     
     # Send preview based on media type
-    if post.media_type and post.file_id:
+    if post.media_type == "album":
+        # Albums cannot carry a keyboard: items first, then text with actions
+        target = event.message if hasattr(event, 'message') else event
+        media = await db.get_post_media(post.id)
+        await target.answer_media_group(media=[
+            InputMediaVideo(media=item.file_id) if item.media_type == "video" else InputMediaPhoto(media=item.file_id)
+            for item in media
+        ])
+        await target.answer(preview_text, reply_markup=get_post_actions_keyboard(post.id, post.status))
+    elif post.media_type and post.file_id:
         if post.media_type == "photo":
             await event.message.answer_photo(
                 photo=post.file_id,
@@ -410,9 +475,9 @@ async def process_publish_post(callback: CallbackQuery, state: FSMContext):
         scheduler_manager.set_bot(callback.bot)
         
         # Publish immediately
-        success = await scheduler_manager.publish_post_to_channel(post)
+        outcome = await scheduler_manager.publish_post_to_channel(post)
         
-        if success:
+        if PublishOutcome.is_published(outcome):
             # Update post status
             await db.update_post(post_id, {"status": "published"})
             await db.log_analytics(post_id, "publish", str(callback.from_user.id))
@@ -459,10 +524,18 @@ async def process_date_selection(callback: CallbackQuery, state: FSMContext):
     await state.update_data(selected_date=selected_date)
     await state.set_state(PostCreationStates.selecting_time)
     
+    # Best hours of this weekday for the post's format, from past CTA clicks
+    data = await state.get_data()
+    post = await db.get_post(data["scheduling_post_id"]) if data.get("scheduling_post_id") else None
+    recommended = await time_recommender.recommend_for(
+        post.post_format if post else None, selected_date.date(), top=config.RECOMMENDED_SLOTS
+    )
+    
+    hint = "\n⭐ — լավագույն ժամերը՝ ըստ նախորդ սեղմումների" if recommended else ""
     await callback.message.edit_text(
         f"📅 Ընտրված ամսաթիվ: {selected_date.strftime('%d.%m.%Y')}\n\n"
-        f"🕒 Ընտրեք ժամը:",
-        reply_markup=get_time_keyboard()
+        f"🕒 Ընտրեք ժամը:{hint}",
+        reply_markup=get_time_keyboard(recommended)
     )
 
 @router.callback_query(F.data.startswith("time:"))
@@ -538,30 +611,54 @@ async def process_confirm_delete(callback: CallbackQuery, state: FSMContext):
         logger.error(f"Error deleting post {post_id}: {e}")
         await callback.answer("❌ Տեխնիկական սխալ:", show_alert=True)
 
+# Paged listings
+POSTS_PAGE_SIZE = 10
+
+async def render_posts_page(kind: str, cursor: Optional[str] = None):
+    """
+    Render one keyset page of drafts or scheduled posts
+    
+    Returns:
+        Tuple of (text, keyboard) or (None, None) when there are no posts
+    """
+    posts, next_cursor = await db.get_posts_page(kind, limit=POSTS_PAGE_SIZE, cursor=cursor)
+    
+    if not posts:
+        return None, None
+    
+    if kind == "draft":
+        text = "📋 <b>Նախագծերի ցանկը:</b>\n\n"
+    else:
+        text = "⏰ <b>Պլանավորված փոստեր:</b>\n\n"
+    
+    for i, post in enumerate(posts, 1):
+        title = post.title or (post.keywords[:30] if post.keywords else "Անանուն")
+        if kind == "draft":
+            created = post.created_at.strftime("%d.%m %H:%M") if post.created_at else "?"
+            text += f"{i}. {title}... (📅 {created})\n"
+        else:
+            title = title[:30] + "..." if len(title) > 30 else title
+            publish_time = post.publish_at.strftime("%d.%m %H:%M") if post.publish_at else "?"
+            text += f"{i}. {title}\n   📅 {publish_time}\n\n"
+    
+    keyboard = get_posts_page_keyboard(
+        kind, [post.id for post in posts], next_cursor, is_first_page=cursor is None
+    )
+    return text, keyboard
+
 # Drafts command
 @router.message(Command("drafts"))
 @router.message(F.text == "📋 Նախագծեր")
 async def cmd_show_drafts(message: Message):
     """Show draft posts"""
     try:
-        drafts = await db.get_posts_by_status("draft", limit=10)
+        text, keyboard = await render_posts_page("draft")
         
-        if not drafts:
+        if not text:
             await message.answer("📋 Նախագծեր չկան:")
             return
         
-        text = "📋 <b>Նախագծերի ցանկը:</b>\n\n"
-        
-        for i, post in enumerate(drafts, 1):
-            title = post.title or post.keywords[:30] if post.keywords else "Անանուն"
-            created = post.created_at.strftime("%d.%m %H:%M") if post.created_at else "?"
-            text += f"{i}. {title}... (📅 {created})\n"
-        
-        await message.answer(text)
-        
-        # Show first draft for quick access
-        if drafts:
-            await show_post_preview(message, drafts[0])
+        await message.answer(text, reply_markup=keyboard)
             
     except Exception as e:
         logger.error(f"Error showing drafts: {e}")
@@ -573,24 +670,323 @@ async def cmd_show_drafts(message: Message):
 async def cmd_show_scheduled(message: Message):
     """Show scheduled posts"""
     try:
-        scheduled_posts = await scheduler_manager.get_scheduled_posts_info()
+        text, keyboard = await render_posts_page("scheduled")
         
-        if not scheduled_posts:
+        if not text:
             await message.answer("⏰ Պլանավորված փոստեր չկան:")
             return
         
-        text = "⏰ <b>Պլանավորված փոստեր:</b>\n\n"
+        await message.answer(text, reply_markup=keyboard)
         
-        for i, post_info in enumerate(scheduled_posts, 1):
-            title = post_info["title"][:30] + "..." if len(post_info["title"]) > 30 else post_info["title"]
-            publish_time = post_info["publish_at"].strftime("%d.%m %H:%M") if post_info["publish_at"] else "?"
-            text += f"{i}. {title}\n   📅 {publish_time}\n\n"
+    except Exception as e:
+        logger.error(f"Error showing scheduled posts: {e}")
+        await message.answer("❌ Չհաջողվեց բեռնել պլանավորված փոստերը:")
+
+@router.callback_query(F.data.startswith("page:"))
+async def process_posts_page(callback: CallbackQuery, state: FSMContext):
+    """Navigate paged drafts/scheduled listings and search results"""
+    _, kind, cursor = callback.data.split(":", 2)
+    
+    try:
+        if kind == "search":
+            query = (await state.get_data()).get("search_query")
+            if not query:
+                await callback.answer("Որոնումը հնացել է, կրկնեք /search հրամանը:", show_alert=True)
+                return
+            text, keyboard = await render_search_page(query, cursor or None)
+        else:
+            text, keyboard = await render_posts_page(kind, cursor or None)
+        
+        if not text:
+            await callback.answer("Այլ փոստեր չկան:")
+            return
+        
+        await callback.message.edit_text(text, reply_markup=keyboard)
+        
+    except Exception as e:
+        logger.error(f"Error paging {kind} posts: {e}")
+        await callback.answer("❌ Չհաջողվեց բեռնել էջը:", show_alert=True)
+        return
+    
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("open_post:"))
+async def process_open_post(callback: CallbackQuery):
+    """Open post preview from a paged listing"""
+    post_id = int(callback.data.split(":")[1])
+    
+    post = await db.get_post(post_id)
+    if not post:
+        await callback.answer("❌ Փոստը չի գտնվել:", show_alert=True)
+        return
+    
+    await show_post_preview(callback, post)
+    await callback.answer()
+
+# Full-text search
+async def render_search_page(query: str, cursor: Optional[str] = None):
+    """
+    Render one page of search results ranked by relevance
+    
+    Returns:
+        Tuple of (text, keyboard) or (None, None) when nothing matched
+    """
+    posts, next_cursor = await db.search_posts(query, limit=POSTS_PAGE_SIZE, cursor=cursor)
+    
+    if not posts:
+        return None, None
+    
+    status_icons = {"draft": "📋", "scheduled": "⏰", "published": "✅", "failed": "❌"}
+    text = f"🔍 <b>Որոնման արդյունքներ՝</b> {html.escape(query)}\n\n"
+    
+    for i, post in enumerate(posts, 1):
+        title = post.title or (post.keywords or post.text or "Անանուն")
+        title = title[:40] + "..." if len(title) > 40 else title
+        created = post.created_at.strftime("%d.%m.%Y") if post.created_at else "?"
+        text += f"{i}. {status_icons.get(post.status, '📄')} {html.escape(title)} (📅 {created})\n"
+    
+    keyboard = get_posts_page_keyboard(
+        "search", [post.id for post in posts], next_cursor, is_first_page=cursor is None
+    )
+    return text, keyboard
+
+async def run_search(message: Message, state: FSMContext, query: str):
+    """Search posts and keep the query in FSM data for paging"""
+    try:
+        text, keyboard = await render_search_page(query)
+        await state.set_state(None)
         
+        if not text:
+            await message.answer(f"🔍 «{html.escape(query)}» հարցմամբ փոստեր չեն գտնվել:")
+            return
+        
+        # Callback data has no room for the query, paging reads it from FSM
+        await state.update_data(search_query=query)
+        await message.answer(text, reply_markup=keyboard)
+        
+    except Exception as e:
+        logger.error(f"Error searching posts for '{query}': {e}")
+        await message.answer("❌ Որոնումը չհաջողվեց:")
+
+@router.message(Command("search"))
+async def cmd_search(message: Message, state: FSMContext):
+    """
+    Search posts by title, keywords and text
+    
+    Usage: /search <words>
+    """
+    parts = message.text.split(maxsplit=1)
+    query = parts[1].strip() if len(parts) > 1 else ""
+    
+    if not query:
+        await state.set_state(SearchStates.entering_query)
+        await message.answer("🔍 Մուտքագրեք որոնման բառերը:")
+        return
+    
+    await run_search(message, state, query)
+
+@router.message(StateFilter(SearchStates.entering_query))
+async def process_search_query(message: Message, state: FSMContext):
+    """Handle search words entered after /search"""
+    query = (message.text or "").strip()
+    
+    if not query:
+        await message.answer("❌ Մուտքագրեք որոնման բառերը:")
+        return
+    
+    await run_search(message, state, query)
+
+# Ahead-of-time generation
+PREGEN_REPORT_BATCHES = 5
+
+@router.message(Command("pregen"))
+async def cmd_pregen(message: Message):
+    """
+    Queue a batch of posts for background generation, or show batch reports
+    
+    Usage:
+        /pregen
+        selling | կաշվե պայուսակ | 25% զեղչ
+        promo | ձմեռային կոշիկներ
+    """
+    lines = message.text.split("\n", 1)[1] if "\n" in message.text else ""
+    
+    if not lines.strip():
+        batches = list(pregeneration_queue.batches.values())[-PREGEN_REPORT_BATCHES:]
+        if not batches:
+            await message.answer(
+                "🤖 <b>Նախնական գեներացիա</b>\n\n"
+                "Ուղարկեք /pregen և ամեն տողում մեկ փոստ՝\n"
+                "<code>ձևաչափ | բանալի բառեր | մանրամասներ</code>\n\n"
+                f"Ձևաչափեր: {', '.join(get_all_formats())}"
+            )
+            return
+        
+        text = "🤖 <b>Նախնական գեներացիայի խմբաքանակներ:</b>\n\n"
+        text += "\n\n".join(batch.report() for batch in reversed(batches))
+        text += f"\n\nՀերթում՝ {pregeneration_queue.pending()}"
         await message.answer(text)
+        return
+    
+    items, errors = parse_pregen_lines(lines)
+    if errors:
+        await message.answer("❌ Սխալ տողեր:\n" + html.escape("\n".join(errors[:10])))
+        return
+    if len(items) > config.PREGEN_MAX_ITEMS:
+        await message.answer(f"❌ Մեկ խմբաքանակում առավելագույնը {config.PREGEN_MAX_ITEMS} փոստ:")
+        return
+    
+    async def report_batch(batch):
+        await message.answer(
+            f"{batch.report()}\n\nՆախագծերը պատրաստ են ստուգման և հաստատման:",
+            reply_markup=get_posts_page_keyboard("draft", batch.post_ids)
+        )
+    
+    batch = pregeneration_queue.submit(items, created_by=message.from_user.id, on_complete=report_batch)
+    await message.answer(
+        f"⏳ Խմբաքանակ #{batch.id} հերթագրվեց՝ {len(items)} փոստ:\n"
+        f"Ավարտից հետո կստանաք հաշվետվությունը: Ընթացքը՝ /pregen"
+    )
+
+# Bulk import
+IMPORT_MAX_FILE_SIZE = 20 * 1024 * 1024  # Bot API download limit
+IMPORT_ERRORS_SHOWN = 15
+
+async def run_import(message: Message, schedule: bool):
+    """Import posts from the message document and report per-row errors"""
+    document = message.document
+    if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+        await message.answer("❌ Ֆայլը չափազանց մեծ է (առավելագույնը 20 ՄԲ):")
+        return
+    
+    report = ImportReport()
+    tz = scheduler_manager.scheduler.timezone
+    failure = None
+    
+    try:
+        buffer = await message.bot.download(document)
+        rows = iter_document_rows(buffer, document.file_name)
+        batches = validated_batches(
+            rows, report, config.IMPORT_BATCH_SIZE, max_rows=config.IMPORT_MAX_ROWS,
+            schedule=schedule, now=datetime.now(tz).replace(tzinfo=None), tz=tz
+        )
         
+        # Each batch is one transaction; jobs are registered after it is committed
+        for batch in batches:
+            for row in batch:
+                row["created_by"] = message.from_user.id
+            post_ids = await db.bulk_create_posts(batch)
+            report.post_ids.extend(post_ids)
+            for post_id, row in zip(post_ids, batch):
+                if row["status"] == "scheduled":
+                    scheduler_manager.add_publish_job(post_id, row["publish_at"])
+                    report.scheduled += 1
+                    
+    except ValueError as e:
+        failure = str(e)
     except Exception as e:
-        logger.error(f"Error showing scheduled posts: {e}")
-        await message.answer("❌ Չհաջողվեց բեռնել պլանավորված փոստերը:")
+        logger.error(f"Error importing posts from {document.file_name}: {e}")
+        failure = "ներքին սխալ"
+    
+    logger.info(
+        f"Import of {document.file_name}: {report.rows} rows, {report.imported} created, "
+        f"{report.scheduled} scheduled, {len(report.errors)} rejected"
+    )
+    
+    text = (
+        f"📥 <b>Ներմուծում՝ {html.escape(document.file_name or '')}</b>\n\n"
+        f"• Տողեր: {report.rows}\n"
+        f"• Ստեղծված: {report.imported} (պլանավորված՝ {report.scheduled})\n"
+        f"• Մերժված: {len(report.errors)}"
+    )
+    if failure:
+        text += f"\n\n❌ Ֆայլը չհաջողվեց կարդալ: {html.escape(failure)}"
+    if report.errors:
+        lines = [f"Տող {number}: {error}" for number, error in report.errors[:IMPORT_ERRORS_SHOWN]]
+        if len(report.errors) > IMPORT_ERRORS_SHOWN:
+            lines.append(f"... և ևս {len(report.errors) - IMPORT_ERRORS_SHOWN}")
+        text += "\n\n<b>Սխալներ:</b>\n" + html.escape("\n".join(lines))
+    
+    await message.answer(text)
+
+@router.message(Command("import"))
+async def cmd_import(message: Message, state: FSMContext):
+    """
+    Import posts from a CSV / JSON document
+    
+    Usage: /import [schedule] - as a document caption or followed by the document.
+    With "schedule", rows with publish_at become scheduled posts.
+    """
+    args = (message.text or message.caption or "").split()[1:]
+    schedule = bool(args) and args[0].lower() == "schedule"
+    
+    if message.document:
+        await run_import(message, schedule)
+        return
+    
+    await state.set_state(ImportStates.waiting_document)
+    await state.update_data(import_schedule=schedule)
+    await message.answer(
+        "📥 <b>Փոստերի ներմուծում</b>\n\n"
+        "Ուղարկեք CSV, JSON կամ JSONL ֆայլ՝ սյունակներով՝\n"
+        "<code>text, title, keywords, post_format, media_type, file_id, publish_at</code>\n\n"
+        "Պարտադիր է միայն <code>text</code>-ը: "
+        "<code>publish_at</code>՝ <code>YYYY-MM-DD HH:MM</code> "
+        f"({scheduler_manager.scheduler.timezone}), օգտագործվում է /import schedule-ի դեպքում:"
+    )
+
+@router.message(F.document, StateFilter(ImportStates.waiting_document))
+async def process_import_document(message: Message, state: FSMContext):
+    """Handle the document sent after /import"""
+    data = await state.get_data()
+    await state.set_state(None)
+    await run_import(message, data.get("import_schedule", False))
+
+# Query profiling
+DB_PROFILE_TOP = 10
+
+@router.message(Command("db_profile"))
+async def cmd_db_profile(message: Message):
+    """
+    Show SQL profiler report
+    
+    Usage: /db_profile [total|max|count|mean|on|off|reset]
+    """
+    args = message.text.split()[1:]
+    action = args[0].lower() if args else "total"
+    profiler = db.profiler
+    
+    if action in ("on", "off"):
+        profiler.enabled = action == "on"
+        await message.answer(f"🔬 SQL պրոֆիլավորումը {'միացված է' if profiler.enabled else 'անջատված է'}:")
+        return
+    
+    if action == "reset":
+        profiler.reset()
+        await message.answer("🔬 SQL պրոֆիլի վիճակագրությունը զրոյացված է:")
+        return
+    
+    if action not in ("total", "max", "count", "mean"):
+        await message.answer("Օգտագործում: /db_profile [total|max|count|mean|on|off|reset]")
+        return
+    
+    if not profiler.stats:
+        state = "միացված" if profiler.enabled else "անջատված (/db_profile on)"
+        await message.answer(f"🔬 Տվյալներ չկան: Պրոֆիլավորումը {state} է:")
+        return
+    
+    report = profiler.report(limit=DB_PROFILE_TOP, order_by=action, width=200)
+    
+    # Keep under Telegram message limit
+    if len(report) > 3500:
+        report = report[:3500] + "\n..."
+    
+    slow_log = f"{profiler.slow_ms:g}ms" if profiler.slow_ms else "անջատված"
+    await message.answer(
+        f"🔬 <b>SQL պրոֆիլ (top {DB_PROFILE_TOP}, ըստ {action}):</b>\n"
+        f"Հարցումների տեսակներ: {len(profiler.stats)} | Դանդաղ հարցումների լոգ: {slow_log}\n\n"
+        f"<pre>{html.escape(report)}</pre>"
+    )
 
 # Help command
 @router.message(Command("help"))
@@ -604,6 +1000,7 @@ async def cmd_help(message: Message):
 📝 /new_post - Նոր փոստ ստեղծել
 📋 /drafts - Նախագծերը դիտել
 ⏰ /scheduled - Պլանավորված փոստերը դիտել
+🔍 /search - Փոստերի որոնում
 📊 /stats - Վիճակագրություն
 
 <b>Փոստի ստեղծման քայլեր:</b>
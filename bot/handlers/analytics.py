@@ -4,17 +4,26 @@ Handles statistics, reports and data export
 """
 
 import asyncio
-import csv
-import io
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Awaitable, Callable, Optional
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, BufferedInputFile
+from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
+from sqlalchemy import select, func, and_, desc
 
 from logging_config import logger
 from bot.database.db import db
+from bot.database.models import Post
 from bot.keyboards.common import get_stats_keyboard, get_back_keyboard
+from bot.utils.csv_export import CSVExporter
+from bot.utils.columnar_export import ColumnarExporter
+from bot.utils.analytics_compute import load_report_frames, format_stats
+from bot.utils.cohorts import cohort_tracker
+from bot.utils.delta_export import DeltaExporter, DELTA_STREAMS
+from bot.utils.export_jobs import (
+    ExportArtifact, ExportJob, ExportQueueFull, export_job_manager, make_message_progress_listener
+)
+from bot.utils.sender import telegram_sender
 
 router = Router()
 
@@ -48,8 +57,14 @@ async def process_stats_request(callback: CallbackQuery):
             await show_top_posts_stats(loading_msg)
         elif stats_type == "formats":
             await show_formats_stats(loading_msg)
+        elif stats_type == "cohorts":
+            await show_cohort_stats(loading_msg)
         elif stats_type == "export":
             await export_stats_csv(loading_msg)
+        elif stats_type == "events":
+            await export_analytics_events_csv(loading_msg)
+        elif stats_type == "parquet":
+            await export_stats_columnar(loading_msg, "parquet")
         else:
             await loading_msg.edit_text(
                 "❌ Անհայտ վիճակագրության տեսակ:",
@@ -75,9 +90,6 @@ async def show_daily_stats(message: Message):
         analytics_summary = await db.get_analytics_summary(days=1)
         
         # Get published posts today
-        from sqlalchemy import select, and_
-        from bot.database.models import Post
-        
         async with db.async_session() as session:
             result = await session.execute(
                 select(Post).where(
@@ -131,9 +143,6 @@ async def show_weekly_stats(message: Message):
         
         async with db.async_session() as session:
             # Published posts this week
-            from sqlalchemy import select, and_, func
-            from bot.database.models import Post, Analytics
-            
             published_result = await session.execute(
                 select(func.count(Post.id)).where(
                     and_(
@@ -153,17 +162,13 @@ async def show_weekly_stats(message: Message):
             total_count = total_result.scalar() or 0
             
             # Most active day
+            clicks = db.event_counts("click_CTA", week_ago)
             daily_clicks = await session.execute(
                 select(
-                    func.date(Analytics.created_at).label('date'),
-                    func.count(Analytics.id).label('clicks')
-                ).where(
-                    and_(
-                        Analytics.action == "click_CTA",
-                        Analytics.created_at >= week_ago
-                    )
-                ).group_by(func.date(Analytics.created_at))
-                .order_by(func.count(Analytics.id).desc())
+                    clicks.c.day.label('date'),
+                    func.sum(clicks.c.events).label('clicks')
+                ).group_by(clicks.c.day)
+                .order_by(desc('clicks'))
                 .limit(1)
             )
             best_day = daily_clicks.first()
@@ -207,20 +212,17 @@ async def show_top_posts_stats(message: Message):
         analytics_summary = await db.get_analytics_summary(days=30)  # Last 30 days
         
         async with db.async_session() as session:
-            from sqlalchemy import select, func, desc
-            from bot.database.models import Post, Analytics
-            
             # Get top posts with click counts
+            clicks = db.event_counts("click_CTA")
             top_posts_query = await session.execute(
                 select(
                     Post.id,
                     Post.title,
                     Post.post_format,
                     Post.created_at,
-                    func.count(Analytics.id).label('total_clicks')
+                    func.sum(clicks.c.events).label('total_clicks')
                 ).select_from(Post)
-                .join(Analytics, Post.id == Analytics.post_id)
-                .where(Analytics.action == "click_CTA")
+                .join(clicks, Post.id == clicks.c.post_id)
                 .group_by(Post.id, Post.title, Post.post_format, Post.created_at)
                 .order_by(desc('total_clicks'))
                 .limit(10)
@@ -260,62 +262,37 @@ async def show_top_posts_stats(message: Message):
         logger.error(f"Error showing top posts stats: {e}")
         raise
 
+FORMAT_NAMES = {
+    "selling": "🔥 Վաճառող փոստ",
+    "collection": "📝 Ընտրանի",
+    "info": "💡 Տեղեկատվական",
+    "promo": "⚡ Ակցիա/Զեղչ",
+    None: "📄 Անորոշ"
+}
+
 async def show_formats_stats(message: Message):
     """Show statistics by post formats"""
     try:
-        async with db.async_session() as session:
-            from sqlalchemy import select, func
-            from bot.database.models import Post, Analytics
-            
-            # Get format statistics
-            format_stats = await session.execute(
-                select(
-                    Post.post_format,
-                    func.count(Post.id).label('total_posts'),
-                    func.count(
-                        func.case([(Post.status == 'published', 1)], else_=None)
-                    ).label('published_posts'),
-                    func.coalesce(func.count(Analytics.id), 0).label('total_clicks')
-                ).select_from(Post)
-                .outerjoin(
-                    Analytics, 
-                    and_(Post.id == Analytics.post_id, Analytics.action == 'click_CTA')
-                )
-                .group_by(Post.post_format)
-                .order_by(func.count(Post.id).desc())
-            )
-            
-            stats = format_stats.fetchall()
+        posts, events = await load_report_frames()
+        stats = format_stats(posts, events)
         
         text = """
 📈 <b>Վիճակագրություն ֆորմատներով</b>
 
 """
         
-        format_names = {
-            "selling": "🔥 Վաճառող փոստ",
-            "collection": "📝 Ընտրանի",
-            "info": "💡 Տեղեկատվական",
-            "promo": "⚡ Ակցիա/Զեղչ",
-            None: "📄 Անորոշ"
-        }
-        
         if stats:
-            total_posts = sum(stat.total_posts for stat in stats)
-            total_clicks = sum(stat.total_clicks for stat in stats)
-            
             for stat in stats:
-                format_name = format_names.get(stat.post_format, f"📄 {stat.post_format}")
-                posts_percent = (stat.total_posts / total_posts * 100) if total_posts else 0
-                clicks_percent = (stat.total_clicks / total_clicks * 100) if total_clicks else 0
-                avg_clicks = (stat.total_clicks / stat.published_posts) if stat.published_posts else 0
+                format_name = FORMAT_NAMES.get(stat["post_format"], f"📄 {stat['post_format']}")
+                engagement = f"{stat['engagement_rate']:.1f}%" if stat["total_views"] else "—"
                 
                 text += f"""
 <b>{format_name}</b>
-• Փոստեր: {stat.total_posts} ({posts_percent:.1f}%)
-• Հրապարակված: {stat.published_posts}
-• Կլիկներ: {stat.total_clicks} ({clicks_percent:.1f}%)
-• Միջին կլիկ/փոստ: {avg_clicks:.1f}
+• Փոստեր: {stat['total_posts']} ({stat['posts_percent']:.1f}%)
+• Հրապարակված: {stat['published_posts']}
+• Կլիկներ: {stat['total_clicks']} ({stat['clicks_percent']:.1f}%)
+• Միջին կլիկ/փոստ: {stat['avg_clicks']:.1f} (մեդիան {stat['p50_clicks']:.0f}, p90 {stat['p90_clicks']:.0f})
+• Կլիկ/դիտում: {engagement}
 
 """
         else:
@@ -327,100 +304,248 @@ async def show_formats_stats(message: Message):
         logger.error(f"Error showing formats stats: {e}")
         raise
 
-async def export_stats_csv(message: Message):
-    """Export statistics to CSV file"""
+async def show_cohort_stats(message: Message):
+    """Show weekly subscriber cohorts and per-format repeat-click rates"""
     try:
-        # Create CSV content in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Post ID', 'Title', 'Format', 'Status', 'Created At', 
-            'Published At', 'Total Clicks', 'Keywords'
-        ])
+        report = await cohort_tracker.get_report()
         
-        # Get all posts with analytics
-        async with db.async_session() as session:
-            from sqlalchemy import select, func, outerjoin
-            from bot.database.models import Post, Analytics
-            
-            posts_with_analytics = await session.execute(
-                select(
-                    Post.id,
-                    Post.title,
-                    Post.post_format,
-                    Post.status,
-                    Post.created_at,
-                    Post.publish_at,
-                    Post.keywords,
-                    func.coalesce(func.count(Analytics.id), 0).label('total_clicks')
-                ).select_from(Post)
-                .outerjoin(
-                    Analytics,
-                    and_(Post.id == Analytics.post_id, Analytics.action == 'click_CTA')
+        text = "👥 <b>Կոհորտներ (առաջին կլիկի շաբաթ)</b>\n\n"
+        
+        if report["cohorts"]:
+            # Fixed-width table: cohort week, size, % active N weeks later
+            width = max(len(retention) for _, _, retention in report["cohorts"])
+            lines = ["Շաբաթ   Չափ " + "".join(f"{f'Շ{offset}':>5}" for offset in range(width))]
+            for cohort, size, retention in report["cohorts"]:
+                lines.append(
+                    f"{cohort.strftime('%d.%m')}  {size:>4} " + "".join(f"{value:>4.0f}%" for value in retention)
                 )
-                .group_by(
-                    Post.id, Post.title, Post.post_format, Post.status,
-                    Post.created_at, Post.publish_at, Post.keywords
+            text += "<pre>" + "\n".join(lines) + "</pre>\n"
+            text += "Շ0-ն առաջին կլիկի շաբաթն է, ՇN-ը՝ N շաբաթ անց վերադարձածների %-ը:\n\n"
+        else:
+            text += "Կլիկներ դեռ չկան:\n\n"
+        
+        if report["formats"]:
+            text += "<b>Կրկնվող կլիկներ ըստ ձևաչափի:</b>\n"
+            for stat in report["formats"]:
+                format_name = FORMAT_NAMES.get(stat["post_format"], f"📄 {stat['post_format']}")
+                text += (
+                    f"{format_name}: {stat['users']} օգտատեր, "
+                    f"կրկնվող {stat['repeat_rate']:.0f}%, վերադարձող {stat['return_rate']:.0f}%\n"
                 )
-                .order_by(Post.created_at.desc())
+        
+        text += f"\n🕒 Թարմացվել է՝ {report['updated_at'].strftime('%d.%m.%Y %H:%M')} UTC"
+        await message.edit_text(text, reply_markup=get_back_keyboard())
+        
+    except Exception as e:
+        logger.error(f"Error showing cohort stats: {e}")
+        raise
+
+EXPORT_QUEUE_FULL_TEXT = (
+    "⏳ Չափազանց շատ export-ներ են հերթում:\n"
+    "Խնդրում ենք փորձել մի փոքր ուշ:"
+)
+
+async def export_stats_csv(message: Message):
+    """Queue statistics CSV export and deliver it in background"""
+    title = "📄 <b>Վիճակագրության export</b>"
+    try:
+        job = export_job_manager.submit(
+            "stats_csv",
+            CSVExporter().export_stats_overview,
+            listener=make_message_progress_listener(message, title)
+        )
+        
+        # Deliver without holding the callback handler
+        export_job_manager.run_in_background(
+            deliver_export(job, message, title, "CSV ֆայլը կարող եք բացել Excel-ով կամ Google Sheets-ով:")
+        )
+        
+    except ExportQueueFull:
+        await message.edit_text(EXPORT_QUEUE_FULL_TEXT, reply_markup=get_back_keyboard())
+    except Exception as e:
+        logger.error(f"Error queueing stats export: {e}")
+        await message.edit_text(
+            "❌ Չհաջողվեց export-ը:\n"
+            "Խնդրում ենք կրկին փորձել:",
+            reply_markup=get_back_keyboard()
+        )
+
+async def export_stats_columnar(message: Message, fmt: str = "parquet"):
+    """Queue columnar export of posts and analytics tables"""
+    title = f"📦 <b>{fmt.capitalize()} export</b>"
+    try:
+        exporter = ColumnarExporter(fmt)
+        
+        hint = "Ֆայլերը կարելի է բացել pandas/polars/DuckDB-ով:"
+        
+        # Each job is handed to delivery as soon as it is queued, so a full queue cannot orphan the first
+        posts_job = export_job_manager.submit(f"{fmt}_posts", exporter.export_posts)
+        export_job_manager.run_in_background(deliver_export(posts_job, message, f"{title}: posts", hint))
+        analytics_job = export_job_manager.submit(
+            f"{fmt}_analytics",
+            exporter.export_analytics,
+            listener=make_message_progress_listener(message, title)
+        )
+        export_job_manager.run_in_background(deliver_export(analytics_job, message, f"{title}: analytics", hint))
+        
+    except ExportQueueFull:
+        await message.edit_text(EXPORT_QUEUE_FULL_TEXT, reply_markup=get_back_keyboard())
+    except Exception as e:
+        logger.error(f"Error queueing {fmt} export: {e}")
+        await message.edit_text(
+            "❌ Չհաջողվեց export-ը:\n"
+            "Խնդրում ենք կրկին փորձել:",
+            reply_markup=get_back_keyboard()
+        )
+
+async def export_analytics_events_csv(message: Message, days: int = 30):
+    """Queue raw analytics events export (compressed, split into parts)"""
+    title = f"📄 <b>Իրադարձությունների export ({days} օր)</b>"
+    try:
+        job = export_job_manager.submit(
+            "analytics_events_csv",
+            CSVExporter().export_analytics_events,
+            listener=make_message_progress_listener(message, title),
+            days=days
+        )
+        export_job_manager.run_in_background(
+            deliver_export(job, message, title, "Սեղմված CSV ֆայլերը բացեք արխիվատորով:")
+        )
+        
+    except ExportQueueFull:
+        await message.edit_text(EXPORT_QUEUE_FULL_TEXT, reply_markup=get_back_keyboard())
+    except Exception as e:
+        logger.error(f"Error queueing analytics events export: {e}")
+        await message.edit_text(
+            "❌ Չհաջողվեց export-ը:\n"
+            "Խնդրում ենք կրկին փորձել:",
+            reply_markup=get_back_keyboard()
+        )
+
+async def deliver_export(job: ExportJob, message: Message, title: str, hint: str = "",
+                         on_delivered: Optional[Callable[[ExportArtifact], Awaitable[None]]] = None):
+    """Wait for export job and upload its parts concurrently"""
+    try:
+        artifact = await job.wait()
+        
+        if not artifact.rows and on_delivered:
+            await message.edit_text("✅ Նոր տվյալներ չկան:", reply_markup=get_back_keyboard())
+            return
+        
+        files = artifact.as_input_files()
+        total_parts = len(files)
+        
+        # Upload all parts concurrently through the rate-limited sender
+        await asyncio.gather(*[
+            telegram_sender.send(
+                message.bot.send_document,
+                message.chat.id,
+                document=file,
+                caption=f"{title}\n📦 Մաս {index}/{total_parts}" if total_parts > 1 else title
             )
-            
-            posts = posts_with_analytics.fetchall()
-        
-        # Write data rows
-        for post in posts:
-            writer.writerow([
-                post.id,
-                post.title or "",
-                post.post_format or "",
-                post.status,
-                post.created_at.isoformat() if post.created_at else "",
-                post.publish_at.isoformat() if post.publish_at else "",
-                post.total_clicks,
-                post.keywords or ""
-            ])
-        
-        # Create file buffer
-        csv_content = output.getvalue().encode('utf-8-sig')  # UTF-8 with BOM for Excel
-        csv_file = BufferedInputFile(csv_content, filename=f"shopping_stats_{datetime.now().strftime('%Y%m%d_%H%M')}.csv")
-        
-        # Send file
-        await message.answer_document(
-            document=csv_file,
-            caption=f"""
-📄 <b>Վիճակագրության export</b>
+            for index, file in enumerate(files, 1)
+        ])
+        
+        if on_delivered:
+            await on_delivered(artifact)
+        
+        if artifact.meta.get("complete") is False:
+            hint += "\n⚠️ Ոչ բոլոր տողերն են արտահանվել: Գործարկեք հրամանը կրկին՝ մնացածը ստանալու համար:"
+        
+        await message.answer(
+            f"""
+{title}
 
 📊 Ընդհանուր:
-• Փոստեր: {len(posts)}
-• Ամսաթիվ: {datetime.now().strftime('%d.%m.%Y %H:%M')}
+• Տողեր: {artifact.rows}
+• Ֆայլեր: {total_parts}
+• Չափ: {artifact.size / 1024:.1f} KB (առանց սեղմման՝ {artifact.raw_size / 1024:.1f} KB)
+• Ամսաթիվ: {artifact.created_at.strftime('%d.%m.%Y %H:%M')}
 
-CSV ֆայլը կարող եք բացել Excel-ով կամ Google Sheets-ով:
+{hint}
             """,
             reply_markup=get_back_keyboard()
         )
         
-        logger.info(f"Stats exported: {len(posts)} posts")
+        await message.edit_text(
+            "✅ Export-ը պատրաստ է" + (" (քեշից)" if job.cached else ""),
+            reply_markup=None
+        )
+        
+        logger.info(
+            f"Export {job.kind} delivered: {artifact.rows} rows, {artifact.size} bytes "
+            f"in {total_parts} part(s) (job #{job.id}, cached={job.cached})"
+        )
         
     except Exception as e:
-        logger.error(f"Error exporting stats: {e}")
+        logger.error(f"Error exporting {job.kind}: {e}")
         await message.edit_text(
             "❌ Չհաջողվեց export-ը:\n"
             "Խնդրում ենք կրկին փորձել:",
             reply_markup=get_back_keyboard()
         )
 
+@router.message(Command("export_delta"))
+async def cmd_export_delta(message: Message):
+    """Export rows added since the consumer's last pull: /export_delta <analytics|posts> [consumer]"""
+    args = (message.text or "").split()[1:]
+    stream = args[0] if args else "analytics"
+    consumer = args[1] if len(args) > 1 else "bi"
+    
+    if stream not in DELTA_STREAMS:
+        await message.answer(f"❌ Անհայտ հոսք: {stream}\nՕգտագործեք՝ {', '.join(DELTA_STREAMS)}")
+        return
+    
+    title = f"🔁 <b>Delta export: {stream} ({consumer})</b>"
+    loading_msg = await message.answer(f"{title}\n\n⏳ Հերթում է...")
+    
+    try:
+        exporter = DeltaExporter(consumer)
+        # The consumer is bound to the exporter; the kind keeps consumers apart in deduplication
+        job = export_job_manager.submit(
+            f"delta_{stream}_{consumer}",
+            exporter.export,
+            listener=make_message_progress_listener(loading_msg, title),
+            cacheable=False,
+            stream=stream
+        )
+        export_job_manager.run_in_background(
+            deliver_export(job, loading_msg, title, "Կուրսորը թարմացվեց:", on_delivered=exporter.commit)
+        )
+        
+    except ExportQueueFull:
+        await loading_msg.edit_text(EXPORT_QUEUE_FULL_TEXT, reply_markup=get_back_keyboard())
+    except Exception as e:
+        logger.error(f"Error queueing delta export: {e}")
+        await loading_msg.edit_text("❌ Չհաջողվեց export-ը:", reply_markup=get_back_keyboard())
+
+@router.message(Command("export_delta_reset"))
+async def cmd_export_delta_reset(message: Message):
+    """Reset delta export cursor: /export_delta_reset [analytics|posts] [consumer]"""
+    args = (message.text or "").split()[1:]
+    stream = args[0] if args and args[0] in DELTA_STREAMS else None
+    consumer = args[-1] if args and args[-1] not in DELTA_STREAMS else "bi"
+    
+    try:
+        removed = await db.reset_export_cursor(consumer, stream)
+        await message.answer(f"🧹 Զրոյացվեց {removed} կուրսոր ({consumer}):")
+    except Exception as e:
+        logger.error(f"Error resetting export cursor: {e}")
+        await message.answer("❌ Չհաջողվեց զրոյացնել կուրսորը:")
+
 # Handle CTA button clicks from channel
 @router.callback_query(F.data.startswith("cta_click:"))
 async def handle_cta_click(callback: CallbackQuery):
     """Handle CTA button clicks from published posts"""
     try:
-        post_id = int(callback.data.split(":")[1])
+        # cta_click:<post_id>[:<channel_id>] (buttons published before channels carry no channel)
+        parts = callback.data.split(":")
+        post_id = int(parts[1])
+        channel_id = int(parts[2]) if len(parts) > 2 else None
         user_id = str(callback.from_user.id)
         
         # Log the click
-        await db.log_analytics(post_id, "click_CTA", user_id)
+        await db.log_analytics(post_id, "click_CTA", user_id, channel_id=channel_id)
         
         # Send acknowledgment
         await callback.answer(
@@ -428,7 +553,7 @@ async def handle_cta_click(callback: CallbackQuery):
             show_alert=False
         )
         
-        logger.info(f"CTA click logged: post_id={post_id}, user_id={user_id}")
+        logger.bind(sample="cta_click").info(f"CTA click logged: post_id={post_id}, channel_id={channel_id}, user_id={user_id}")
         
     except Exception as e:
         logger.error(f"Error handling CTA click: {e}")
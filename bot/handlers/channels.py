@@ -0,0 +1,101 @@
+"""
+Channel handlers for TimeToShopping_bot
+Manages the registry of channels posts are published to
+"""
+
+import html
+from aiogram import Router
+from aiogram.types import Message
+from aiogram.filters import Command
+
+from logging_config import logger
+from bot.database.db import db
+from bot.keyboards.common import get_back_keyboard
+
+router = Router()
+
+@router.message(Command("channels"))
+async def cmd_channels(message: Message):
+    """Show registered channels with delivery and click counts"""
+    try:
+        channels = await db.get_channels(active_only=False)
+        
+        if not channels:
+            await message.answer("📢 Ալիքներ գրանցված չեն: Ավելացրեք /add_channel հրամանով:")
+            return
+        
+        stats = await db.get_channel_stats()
+        
+        text = "📢 <b>Ալիքներ:</b>\n\n"
+        for channel in channels:
+            channel_stats = stats.get(channel.id, {})
+            state = "🟢" if channel.is_active else "⚪️"
+            name = html.escape(channel.title or channel.chat_id)
+            region = f" ({html.escape(channel.region)})" if channel.region else ""
+            text += (
+                f"{state} <b>{channel.id}.</b> {name}{region}\n"
+                f"   <code>{html.escape(channel.chat_id)}</code>\n"
+                f"   ✅ {channel_stats.get('sent', 0)} | ❌ {channel_stats.get('failed', 0)} | "
+                f"👆 {channel_stats.get('clicks', 0)}\n\n"
+            )
+        
+        text += "✅ հրապարակված | ❌ ձախողված | 👆 CTA սեղմումներ"
+        await message.answer(text, reply_markup=get_back_keyboard())
+    
+    except Exception as e:
+        logger.error(f"Error showing channels: {e}")
+        await message.answer("❌ Չհաջողվեց բեռնել ալիքները:")
+
+@router.message(Command("add_channel"))
+async def cmd_add_channel(message: Message):
+    """
+    Register a channel for publishing
+    
+    Usage: /add_channel <@username or -100id> [region]
+    """
+    args = message.text.split(maxsplit=2)[1:]
+    if not args:
+        await message.answer("Օգտագործում: /add_channel <@username կամ -100id> [տարածաշրջան]")
+        return
+    
+    chat_ref = args[0]
+    region = args[1].strip() if len(args) > 1 else None
+    
+    try:
+        # The bot must be an admin of the channel to publish there
+        chat = await message.bot.get_chat(chat_ref)
+        member = await message.bot.get_chat_member(chat.id, message.bot.id)
+        if member.status not in ("administrator", "creator"):
+            await message.answer("❌ Բոտը այդ ալիքի ադմինիստրատոր չէ:")
+            return
+        
+        channel = await db.add_channel(str(chat.id), title=chat.title, region=region)
+        await message.answer(
+            f"✅ Ալիքը ավելացվեց՝ <b>{html.escape(chat.title or chat_ref)}</b> (ID {channel.id}):"
+        )
+    
+    except Exception as e:
+        logger.error(f"Error adding channel {chat_ref}: {e}")
+        await message.answer("❌ Չհաջողվեց ավելացնել ալիքը: Ստուգեք ID-ն և բոտի իրավունքները:")
+
+@router.message(Command("remove_channel"))
+async def cmd_remove_channel(message: Message):
+    """
+    Stop publishing to a channel
+    
+    Usage: /remove_channel <id>
+    """
+    args = message.text.split()[1:]
+    if not args or not args[0].isdigit():
+        await message.answer("Օգտագործում: /remove_channel <ID> (տես /channels)")
+        return
+    
+    try:
+        if await db.deactivate_channel(int(args[0])):
+            await message.answer("✅ Ալիքը անջատվեց: Հրապարակումների պատմությունը պահպանված է:")
+        else:
+            await message.answer("❌ Ալիքը չի գտնվել:")
+    
+    except Exception as e:
+        logger.error(f"Error removing channel {args[0]}: {e}")
+        await message.answer("❌ Չհաջողվեց անջատել ալիքը:")
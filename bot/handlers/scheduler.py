@@ -3,15 +3,22 @@ Scheduler handlers for TimeToShopping_bot
 Handles scheduled post management and calendar operations
 """
 
+import html
 from datetime import datetime, timedelta
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command
+from sqlalchemy import select, and_
 
+from config import config
 from logging_config import logger
 from bot.database.db import db
-from bot.utils.scheduler import scheduler_manager
+from bot.database.models import Post
+from bot.utils.scheduler import scheduler_manager, PublishOutcome
+from bot.utils.recurring import parse_cron, next_occurrence, split_keyword_pool
+from bot.utils.slot_allocator import parse_id_spec, parse_policy_args
+from bot.ai.prompts import get_all_formats
 from bot.keyboards.common import get_calendar_keyboard, get_time_keyboard, get_back_keyboard
 
 router = Router()
@@ -111,9 +118,9 @@ async def process_publish_now(callback: CallbackQuery):
         await scheduler_manager.cancel_scheduled_post(post_id)
         
         # Publish immediately
-        success = await scheduler_manager.publish_post_to_channel(post)
+        outcome = await scheduler_manager.publish_post_to_channel(post)
         
-        if success:
+        if PublishOutcome.is_published(outcome):
             await db.update_post(post_id, {"status": "published"})
             await db.log_analytics(post_id, "publish", str(callback.from_user.id), "manual_publish")
             
@@ -192,8 +199,6 @@ async def cmd_clear_failed_jobs(message: Message):
         failed_posts = []
         
         async with db.async_session() as session:
-            from sqlalchemy import select, and_
-            from bot.database.models import Post
             
             now = datetime.now()
             result = await session.execute(
@@ -340,4 +345,228 @@ async def cmd_next_scheduled(message: Message):
         
     except Exception as e:
         logger.error(f"Error showing next scheduled post: {e}")
-        await message.answer("❌ Չհաջողվեց գտնել հաջորդ պլանավորված փոստը")
\ No newline at end of file
+        await message.answer("❌ Չհաջողվեց գտնել հաջորդ պլանավորված փոստը")
+
+# Bulk scheduling
+BULK_SCHEDULE_MAX_POSTS = 100
+BULK_SCHEDULE_SHOWN = 20
+
+@router.message(Command("bulk_schedule"))
+async def cmd_bulk_schedule(message: Message):
+    """
+    Schedule many drafts into free slots at once
+    
+    Usage: /bulk_schedule <IDs|drafts> [2h|90m] [09:00-20:00] [YYYY-MM-DD]
+    Example: /bulk_schedule 12,15,20-25 2h 09:00-20:00
+    """
+    args = message.text.split()[1:]
+    if not args:
+        await message.answer(
+            "Օգտագործում: /bulk_schedule <ID-ներ|drafts> [2h|90m] [09:00-20:00] [YYYY-MM-DD]\n"
+            "Օր.՝ /bulk_schedule 12,15,20-25 2h 09:00-20:00\n\n"
+            "Նախագծերը կբաշխվեն ազատ ժամերին՝ առանց բախումների արդեն պլանավորված փոստերի հետ "
+            f"({scheduler_manager.scheduler.timezone})"
+        )
+        return
+    
+    try:
+        policy, first_day = parse_policy_args(args[1:])
+        if args[0].lower() == "drafts":
+            drafts = await db.get_posts_by_status("draft", limit=BULK_SCHEDULE_MAX_POSTS)
+            post_ids = [post.id for post in reversed(drafts)]  # Oldest first
+        else:
+            post_ids = parse_id_spec(args[0], max_ids=BULK_SCHEDULE_MAX_POSTS)
+    except ValueError as e:
+        await message.answer(f"❌ Սխալ արգումենտներ: {html.escape(str(e))}")
+        return
+    
+    if not post_ids:
+        await message.answer("📭 Պլանավորելու նախագծեր չկան")
+        return
+    if len(post_ids) > BULK_SCHEDULE_MAX_POSTS:
+        await message.answer(f"❌ Մեկ անգամից առավելագույնը {BULK_SCHEDULE_MAX_POSTS} փոստ:")
+        return
+    
+    try:
+        start = datetime.combine(first_day, datetime.min.time()) if first_day else None
+        scheduled = await scheduler_manager.bulk_schedule(post_ids, policy, start)
+    except ValueError as e:
+        await message.answer(f"❌ Բավարար ազատ ժամեր չկան: {html.escape(str(e))}")
+        return
+    except Exception as e:
+        logger.error(f"Error bulk scheduling posts {args[0]}: {e}")
+        await message.answer("❌ Չհաջողվեց պլանավորել փոստերը")
+        return
+    
+    if not scheduled:
+        await message.answer("❌ Նշված ID-ներով նախագծեր չեն գտնվել")
+        return
+    
+    lines = [
+        f"• #{post_id} — {publish_at.strftime('%d.%m.%Y %H:%M')}"
+        for post_id, publish_at in list(scheduled.items())[:BULK_SCHEDULE_SHOWN]
+    ]
+    if len(scheduled) > BULK_SCHEDULE_SHOWN:
+        lines.append(f"... և ևս {len(scheduled) - BULK_SCHEDULE_SHOWN}")
+    skipped = len(post_ids) - len(scheduled)
+    
+    await message.answer(
+        f"✅ <b>Պլանավորված է {len(scheduled)} փոստ</b>\n"
+        f"Ամեն {int(policy.interval.total_seconds() // 60)} րոպե, "
+        f"{policy.day_start:%H:%M}-{policy.day_end:%H:%M}, ժամում առավելագույնը {policy.max_per_hour}\n\n"
+        + "\n".join(lines)
+        + (f"\n\n⚠️ Բաց թողնված (նախագիծ չեն)՝ {skipped}" if skipped else "")
+    )
+
+# Recurring templates
+@router.message(Command("templates"))
+async def cmd_templates(message: Message):
+    """Show recurring post templates"""
+    try:
+        templates = await db.get_templates()
+        
+        if not templates:
+            await message.answer(
+                "🔁 Կրկնվող ձևանմուշներ չկան:\n\n"
+                "Ավելացնել՝ /add_template անուն | ձևաչափ | cron | բառեր; բառեր"
+            )
+            return
+        
+        tz = scheduler_manager.scheduler.timezone
+        now = datetime.now(tz)
+        
+        text = "🔁 <b>Կրկնվող ձևանմուշներ:</b>\n\n"
+        for template in templates:
+            try:
+                upcoming = next_occurrence(template.cron, tz, now)
+                next_str = upcoming.strftime('%d.%m.%Y %H:%M') if upcoming else "—"
+            except ValueError:
+                next_str = "❌ սխալ cron"
+            
+            keyword_sets = len(split_keyword_pool(template.keywords))
+            text += (
+                f"<b>{template.id}.</b> {html.escape(template.name)} ({template.post_format})\n"
+                f"   ⏰ <code>{html.escape(template.cron)}</code> → {next_str}\n"
+                f"   🏷️ Բանալի բառերի խմբեր: {keyword_sets} | Ստեղծված: {template.occurrences}\n\n"
+            )
+        
+        await message.answer(text, reply_markup=get_back_keyboard())
+        
+    except Exception as e:
+        logger.error(f"Error showing templates: {e}")
+        await message.answer("❌ Չհաջողվեց բեռնել ձևանմուշները")
+
+@router.message(Command("add_template"))
+async def cmd_add_template(message: Message):
+    """
+    Create a recurring post template
+    
+    Usage: /add_template name | format | cron | keywords; keywords [| details]
+    Example: /add_template 🔥 Այսօր | promo | 0 10 * * fri | կոշիկ զեղչ; պայուսակ զեղչ
+    """
+    parts = message.text.split(maxsplit=1)
+    fields = [field.strip() for field in parts[1].split("|")] if len(parts) > 1 else []
+    
+    if len(fields) < 4:
+        await message.answer(
+            "Օգտագործում: /add_template անուն | ձևաչափ | cron | բառեր; բառեր [| մանրամասներ]\n"
+            "Օր.՝ /add_template 🔥 Այսօր | promo | 0 10 * * fri | կոշիկ զեղչ; պայուսակ զեղչ\n\n"
+            f"Ձևաչափեր: {', '.join(get_all_formats())}\n"
+            f"Cron-ը հաշվվում է {scheduler_manager.scheduler.timezone} ժամային գոտում:"
+        )
+        return
+    
+    name, post_format, cron, keywords = fields[:4]
+    details = fields[4] if len(fields) > 4 and fields[4] else None
+    
+    if post_format not in get_all_formats():
+        await message.answer(f"❌ Անհայտ ձևաչափ: {', '.join(get_all_formats())}")
+        return
+    
+    keyword_sets = split_keyword_pool(keywords)
+    if not keyword_sets:
+        await message.answer("❌ Նշեք առնվազն մեկ բանալի բառերի խումբ:")
+        return
+    
+    try:
+        parse_cron(cron, scheduler_manager.scheduler.timezone)
+    except ValueError as e:
+        await message.answer(f"❌ Սխալ cron արտահայտություն: {html.escape(str(e))}")
+        return
+    
+    try:
+        template = await db.create_template({
+            "name": name,
+            "post_format": post_format,
+            "keywords": "\n".join(keyword_sets),
+            "details": details,
+            "cron": cron,
+            "created_by": message.from_user.id
+        })
+        
+        await message.answer(
+            f"✅ Ձևանմուշը ստեղծվեց (ID {template.id}):\n"
+            f"Նախագծերը կգեներացվեն հրապարակումից առավելագույնը "
+            f"{config.RECURRING_LOOKAHEAD_HOURS} ժամ առաջ և կուղարկվեն հաստատման:"
+        )
+        
+        # Generate drafts for the look-ahead window right away
+        await scheduler_manager.materialize_recurring_posts()
+        
+    except Exception as e:
+        logger.error(f"Error creating template: {e}")
+        await message.answer("❌ Չհաջողվեց ստեղծել ձևանմուշը")
+
+@router.message(Command("remove_template"))
+async def cmd_remove_template(message: Message):
+    """
+    Stop a recurring template (already generated drafts are kept)
+    
+    Usage: /remove_template <id>
+    """
+    args = message.text.split()[1:]
+    if not args or not args[0].isdigit():
+        await message.answer("Օգտագործում: /remove_template <ID> (տես /templates)")
+        return
+    
+    try:
+        if await db.update_template(int(args[0]), {"is_active": False}):
+            await message.answer("✅ Ձևանմուշը անջատվեց:")
+        else:
+            await message.answer("❌ Ձևանմուշը չի գտնվել")
+    
+    except Exception as e:
+        logger.error(f"Error removing template {args[0]}: {e}")
+        await message.answer("❌ Չհաջողվեց անջատել ձևանմուշը")
+
+@router.callback_query(F.data.startswith("approve_recurring:"))
+async def process_approve_recurring(callback: CallbackQuery):
+    """Schedule a recurring draft for its template slot"""
+    post_id = int(callback.data.split(":")[1])
+    
+    try:
+        post = await db.get_post(post_id)
+        if not post or post.status != "draft":
+            await callback.answer("❌ Փոստը արդեն մշակված է կամ չի գտնվել", show_alert=True)
+            return
+        
+        if not post.publish_at or post.publish_at <= datetime.now():
+            await callback.answer("❌ Հրապարակման ժամը անցել է, պլանավորեք ձեռքով", show_alert=True)
+            return
+        
+        if await scheduler_manager.schedule_post(post_id, post.publish_at):
+            await callback.message.edit_reply_markup(reply_markup=None)
+            await callback.message.answer(
+                f"✅ Փոստը պլանավորվեց՝ {post.publish_at.strftime('%d.%m.%Y %H:%M')}"
+            )
+            logger.info(f"Recurring post {post_id} approved by user {callback.from_user.id}")
+        else:
+            await callback.answer("❌ Չհաջողվեց պլանավորել փոստը", show_alert=True)
+            return
+        
+    except Exception as e:
+        logger.error(f"Error approving recurring post {post_id}: {e}")
+        await callback.answer("❌ Տեխնիկական սխալ", show_alert=True)
+        return
+    
+    await callback.answer()
@@ -7,6 +7,7 @@ from .common import (
     get_main_menu_keyboard,
     get_post_format_keyboard,
     get_post_actions_keyboard,
+    get_recurring_draft_keyboard,
     get_edit_options_keyboard,
     get_confirmation_keyboard,
     get_stats_keyboard,
@@ -14,6 +15,7 @@ from .common import (
     get_calendar_keyboard,
     get_time_keyboard,
     get_media_type_keyboard,
+    get_posts_page_keyboard,
     get_back_keyboard
 )
 
@@ -21,6 +23,7 @@ __all__ = [
     "get_main_menu_keyboard",
     "get_post_format_keyboard", 
     "get_post_actions_keyboard",
+    "get_recurring_draft_keyboard",
     "get_edit_options_keyboard",
     "get_confirmation_keyboard",
     "get_stats_keyboard",
@@ -28,6 +31,7 @@ __all__ = [
     "get_calendar_keyboard",
     "get_time_keyboard", 
     "get_media_type_keyboard",
+    "get_posts_page_keyboard",
     "get_back_keyboard"
 ]
 
@@ -79,7 +83,8 @@ BUTTON_TEXTS = {
     
     # Export
     "export_csv": "📄 CSV Export",
-    "export_json": "📄 JSON Export"
+    "export_json": "📄 JSON Export",
+    "export_parquet": "📦 Parquet Export"
 }
 
 # Emoji collections for different categories
@@ -86,6 +86,17 @@ def get_post_actions_keyboard(post_id: int, status: str = "draft") -> InlineKeyb
     
     return builder.as_markup()
 
+def get_recurring_draft_keyboard(post_id: int) -> InlineKeyboardMarkup:
+    """Keyboard for approving a draft generated from a recurring template"""
+    builder = InlineKeyboardBuilder()
+    
+    builder.row(
+        InlineKeyboardButton(text="✅ Հաստատել", callback_data=f"approve_recurring:{post_id}"),
+        InlineKeyboardButton(text="👁️ Բացել", callback_data=f"open_post:{post_id}")
+    )
+    
+    return builder.as_markup()
+
 def get_edit_options_keyboard(post_id: int) -> InlineKeyboardMarkup:
     """Keyboard for editing options"""
     builder = InlineKeyboardBuilder()
@@ -136,7 +147,14 @@ def get_stats_keyboard() -> InlineKeyboardMarkup:
         InlineKeyboardButton(text="📈 Ձևաչափներ", callback_data="stats:formats")
     )
     builder.row(
-        InlineKeyboardButton(text="📄 CSV Export", callback_data="stats:export")
+        InlineKeyboardButton(text="👥 Կոհորտներ", callback_data="stats:cohorts")
+    )
+    builder.row(
+        InlineKeyboardButton(text="📄 CSV Export", callback_data="stats:export"),
+        InlineKeyboardButton(text="🗂️ Events CSV", callback_data="stats:events")
+    )
+    builder.row(
+        InlineKeyboardButton(text="📦 Parquet Export", callback_data="stats:parquet")
     )
     builder.row(
         InlineKeyboardButton(text="🔙 Հետ", callback_data="back_to_main")
@@ -209,10 +227,21 @@ def get_calendar_keyboard(year: int, month: int) -> InlineKeyboardMarkup:
     
     return builder.as_markup()
 
-def get_time_keyboard() -> InlineKeyboardMarkup:
-    """Time selection keyboard"""
+def get_time_keyboard(recommended: Optional[List[str]] = None) -> InlineKeyboardMarkup:
+    """
+    Time selection keyboard
+    
+    Args:
+        recommended: Best "HH:MM" slots by past clicks, shown starred in the first row
+    """
     builder = InlineKeyboardBuilder()
     
+    if recommended:
+        builder.row(*[
+            InlineKeyboardButton(text=f"⭐ {time}", callback_data=f"time:{time}")
+            for time in recommended
+        ])
+    
     # Hours
     times = ["09:00", "10:00", "11:00", "12:00", "13:00", "14:00", 
              "15:00", "16:00", "17:00", "18:00", "19:00", "20:00"]
@@ -243,6 +272,9 @@ def get_media_type_keyboard() -> InlineKeyboardMarkup:
     )
     builder.row(
         InlineKeyboardButton(text="🎞️ GIF", callback_data="media:gif"),
+        InlineKeyboardButton(text="🗂️ Ալբոմ (2-10)", callback_data="media:album")
+    )
+    builder.row(
         InlineKeyboardButton(text="🚫 Առանց մեդիա", callback_data="media:none")
     )
     builder.row(
@@ -251,6 +283,33 @@ def get_media_type_keyboard() -> InlineKeyboardMarkup:
     
     return builder.as_markup()
 
+def get_posts_page_keyboard(kind: str, post_ids: List[int], next_cursor: Optional[str] = None,
+                            is_first_page: bool = True) -> InlineKeyboardMarkup:
+    """Paged posts listing keyboard (open buttons and keyset navigation)"""
+    builder = InlineKeyboardBuilder()
+    
+    # Numbered buttons open the post preview, 5 per row
+    open_buttons = [
+        InlineKeyboardButton(text=str(index), callback_data=f"open_post:{post_id}")
+        for index, post_id in enumerate(post_ids, 1)
+    ]
+    for i in range(0, len(open_buttons), 5):
+        builder.row(*open_buttons[i:i+5])
+    
+    navigation = []
+    if not is_first_page:
+        navigation.append(InlineKeyboardButton(text="⏮️ Սկիզբ", callback_data=f"page:{kind}:"))
+    if next_cursor:
+        navigation.append(InlineKeyboardButton(text="Հաջորդը ▶️", callback_data=f"page:{kind}:{next_cursor}"))
+    if navigation:
+        builder.row(*navigation)
+    
+    builder.row(
+        InlineKeyboardButton(text="🔙 Հետ", callback_data="back_to_main")
+    )
+    
+    return builder.as_markup()
+
 def get_back_keyboard() -> InlineKeyboardMarkup:
     """Simple back button keyboard"""
     builder = InlineKeyboardBuilder()
@@ -4,8 +4,9 @@ Access control, logging, and request processing middlewares
 """
 
 from .access import AccessMiddleware
+from .metrics import MetricsMiddleware, HandlerNameMiddleware, TelegramTimingMiddleware
 
-__all__ = ["AccessMiddleware"]
+__all__ = ["AccessMiddleware", "MetricsMiddleware", "HandlerNameMiddleware", "TelegramTimingMiddleware"]
 
 def setup_middlewares(dp):
     """
@@ -14,10 +15,17 @@ def setup_middlewares(dp):
     Args:
         dp: Aiogram Dispatcher instance
     """
-    # Access control middleware (should be first)
+    # Update metrics (outermost, sees every update)
+    dp.update.outer_middleware(MetricsMiddleware())
+    
+    # Access control middleware
     dp.message.middleware(AccessMiddleware())
     dp.callback_query.middleware(AccessMiddleware())
     
+    # Handler name for per-handler timing (inner, propagates to routers)
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
+    
     # Add other middlewares here if needed
     # dp.message.middleware(LoggingMiddleware())
     # dp.callback_query.middleware(RateLimitMiddleware())
@@ -56,7 +56,7 @@ class AccessMiddleware(BaseMiddleware):
             return  # Block further processing
         
         # Log authorized access
-        logger.debug(
+        logger.bind(sample="access").debug(
             f"Authorized user {user.id} (@{user.username}) accessed bot"
         )
         
@@ -0,0 +1,110 @@
+"""
+Metrics middlewares for TimeToShopping_bot
+Update counts, per-handler latency and DB / AI / Telegram time breakdown
+"""
+
+import time
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, TelegramObject, Update
+from config import config
+from logging_config import logger
+from metrics import (
+    updates_total, update_duration, handler_duration, handler_span_duration,
+    telegram_request_duration, begin_update_timing, current_update_timing, record_span,
+    SPAN_KINDS
+)
+
+class MetricsMiddleware(BaseMiddleware):
+    """Outer update middleware recording update counts, latency and span breakdown"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        """Measure full update processing (filters, middlewares and handler)"""
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__.lower()
+        timing = begin_update_timing()
+        
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await handler(event, data)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            update_duration.observe(elapsed, type=update_type)
+            updates_total.inc(type=update_type, status=status)
+            
+            handler_duration.observe(elapsed, handler=timing.handler)
+            for kind, seconds in timing.spans.items():
+                handler_span_duration.observe(seconds, handler=timing.handler, span=kind)
+            
+            self._log_timing(update_type, status, elapsed, timing)
+    
+    @staticmethod
+    def _log_timing(update_type: str, status: str, elapsed: float, timing):
+        """Emit structured timing record (INFO when slow, DEBUG otherwise)"""
+        slow = elapsed * 1000 >= config.SLOW_UPDATE_MS
+        if not slow and config.LOG_LEVEL != "DEBUG":
+            return
+        
+        record = {
+            "update_type": update_type,
+            "handler": timing.handler,
+            "prefix": timing.prefix,
+            "status": status,
+            "total_ms": round(elapsed * 1000, 1),
+        }
+        for kind in SPAN_KINDS:
+            record[f"{kind}_ms"] = round(timing.spans.get(kind, 0.0) * 1000, 1)
+        
+        logger.bind(timing=record).log(
+            "INFO" if slow else "DEBUG",
+            f"Update timing {timing.handler}: {record['total_ms']}ms "
+            f"(db {record['db_ms']}ms, ai {record['ai_ms']}ms, telegram {record['telegram_ms']}ms)"
+        )
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Inner middleware tagging the update timing with the matched handler"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        timing = current_update_timing()
+        handler_object = data.get("handler")
+        
+        if timing is not None and handler_object is not None:
+            callback = handler_object.callback
+            module = getattr(callback, "__module__", "").rsplit(".", 1)[-1]
+            timing.handler = f"{module}.{getattr(callback, '__name__', 'handler')}"
+            if isinstance(event, CallbackQuery) and event.data:
+                timing.prefix = event.data.split(":", 1)[0]
+        
+        return await handler(event, data)
+
+class TelegramTimingMiddleware(BaseRequestMiddleware):
+    """Bot session middleware timing Bot API requests"""
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot,
+        method: TelegramMethod,
+    ):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            elapsed = time.perf_counter() - started
+            telegram_request_duration.observe(elapsed, method=method.__api_method__)
+            record_span("telegram", elapsed)
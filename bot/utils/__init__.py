@@ -3,15 +3,40 @@ Utils package for TimeToShopping_bot
 Utility functions and helper classes
 """
 
-from .scheduler import scheduler_manager, SchedulerManager
-from .csv_export import CSVExporter, export_analytics_to_csv, export_posts_to_csv
+import importlib
+
+# Exported names are imported on first access, so importing one submodule
+# (e.g. bot.utils.scheduler) does not load the export stack as well
+_LAZY_EXPORTS = {
+    "scheduler_manager": ".scheduler",
+    "SchedulerManager": ".scheduler",
+    "CSVExporter": ".csv_export",
+    "export_analytics_to_csv": ".csv_export",
+    "export_posts_to_csv": ".csv_export",
+    "ExportJobManager": ".export_jobs",
+    "export_job_manager": ".export_jobs",
+    "RateLimitedSender": ".sender",
+    "telegram_sender": ".sender",
+}
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "scheduler_manager", 
     "SchedulerManager",
     "CSVExporter",
     "export_analytics_to_csv",
-    "export_posts_to_csv"
+    "export_posts_to_csv",
+    "ExportJobManager",
+    "export_job_manager",
+    "RateLimitedSender",
+    "telegram_sender"
 ]
 
 # Utility functions for common operations
@@ -0,0 +1,337 @@
+"""
+Vectorised analytics computation for TimeToShopping_bot
+Columnar event and post arrays loaded from the DB cursor, report metrics in NumPy
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, select, type_coerce
+
+from bot.database.db import db
+from bot.database.models import Post, Analytics, AnalyticsDaily
+
+# Rows fetched from the DB cursor per partition
+LOAD_BATCH_SIZE = 50_000
+
+# Per-post click percentiles reported per format
+PERCENTILES = (50, 90)
+
+def _import_numpy():
+    """Import NumPy lazily so modules that only import this one stay light"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError("Analytics computation requires numpy: pip install numpy") from e
+    return numpy
+
+class _Vocabulary:
+    """Dictionary encoder for low-cardinality string columns"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = []
+        self.index: Dict[Optional[str], int] = {}
+
+    def encode(self, column: Iterable[Optional[str]]) -> List[int]:
+        codes = []
+        for value in column:
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            codes.append(code)
+        return codes
+
+class PostTable:
+    """
+    Posts as parallel arrays sorted by ID
+
+    Attributes:
+        ids: int64 post IDs, ascending
+        formats: int codes into format_names
+        published: bool mask of published posts
+    """
+
+    def __init__(self, ids, formats, published, format_names: List[Optional[str]]):
+        np = _import_numpy()
+        order = np.argsort(ids, kind="stable")
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.formats = np.asarray(formats, dtype=np.int32)[order]
+        self.published = np.asarray(published, dtype=bool)[order]
+        self.format_names = format_names
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class EventFrame:
+    """
+    Analytics events as parallel arrays
+
+    Attributes:
+        post_ids: int64 post IDs
+        actions: int codes into action_names
+        timestamps: datetime64[us] (naive UTC like Analytics.created_at)
+        weights: int64 events per row (1 for raw events, the day's count for daily aggregates)
+    """
+
+    def __init__(self, post_ids, actions, timestamps, action_names: List[Optional[str]], weights=None):
+        np = _import_numpy()
+        self.post_ids = np.asarray(post_ids, dtype=np.int64)
+        self.actions = np.asarray(actions, dtype=np.int32)
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        self.action_names = action_names
+        self.weights = (
+            np.ones(len(self.post_ids), dtype=np.int64) if weights is None
+            else np.asarray(weights, dtype=np.int64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.post_ids)
+
+    def mask(self, action: Optional[str] = None, since: Optional[datetime] = None):
+        """Boolean mask of events with an action and/or at or after a moment"""
+        np = _import_numpy()
+        selected = np.ones(len(self), dtype=bool)
+        if action is not None:
+            code = self.action_names.index(action) if action in self.action_names else -1
+            selected &= self.actions == code
+        if since is not None:
+            selected &= self.timestamps >= np.datetime64(since, "us")
+        return selected
+
+    def count(self, action: Optional[str] = None, since: Optional[datetime] = None) -> int:
+        """Number of events with an action and/or at or after a moment"""
+        return int(self.weights[self.mask(action, since)].sum())
+
+async def load_posts() -> PostTable:
+    """Read (id, format, status) of all posts into a PostTable"""
+    np = _import_numpy()
+    formats = _Vocabulary()
+    ids, codes, published = [], [], []
+
+    async with db.engine.connect() as conn:
+        result = await conn.stream(
+            select(Post.id, Post.post_format, Post.status).execution_options(yield_per=LOAD_BATCH_SIZE)
+        )
+        async for chunk in result.partitions(LOAD_BATCH_SIZE):
+            chunk_ids, chunk_formats, chunk_statuses = zip(*chunk)
+            ids.append(np.fromiter(chunk_ids, dtype=np.int64, count=len(chunk)))
+            codes.extend(formats.encode(chunk_formats))
+            published.append(np.fromiter((status == "published" for status in chunk_statuses), dtype=bool))
+
+    return PostTable(
+        np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+        codes,
+        np.concatenate(published) if published else np.zeros(0, dtype=bool),
+        formats.values
+    )
+
+async def load_events(since: Optional[datetime] = None, actions: Optional[Sequence[str]] = None,
+                      post_ids: Optional[Sequence[int]] = None) -> EventFrame:
+    """
+    Stream analytics events of both tiers into an EventFrame
+
+    Daily aggregates of events past the retention window become one row per
+    day at midnight, weighted by their count; raw events weigh 1.
+    Timestamps are read as stored text where the driver allows it (SQLite)
+    and parsed by NumPy per partition instead of one datetime per row.
+
+    Args:
+        since: Only events at or after this moment (naive UTC); daily
+            aggregates count for whole days starting at or after it
+        actions: Only these actions
+        post_ids: Only events of these posts
+
+    Returns:
+        EventFrame of daily aggregates by day, then raw events in analytics ID order
+    """
+    np = _import_numpy()
+    vocabulary = _Vocabulary()
+    ids, codes, stamps, weights = [], [], [], []
+
+    rolled = select(
+        AnalyticsDaily.post_id, AnalyticsDaily.action, type_coerce(AnalyticsDaily.day, String), AnalyticsDaily.events
+    )
+    raw = select(Analytics.post_id, Analytics.action, type_coerce(Analytics.created_at, String))
+    if since is not None:
+        first_day = since.date() if since.time() == datetime.min.time() else since.date() + timedelta(days=1)
+        rolled = rolled.where(AnalyticsDaily.day >= first_day)
+        raw = raw.where(Analytics.created_at >= since)
+    if actions:
+        rolled = rolled.where(AnalyticsDaily.action.in_(list(actions)))
+        raw = raw.where(Analytics.action.in_(list(actions)))
+    if post_ids is not None:
+        rolled = rolled.where(AnalyticsDaily.post_id.in_(list(post_ids)))
+        raw = raw.where(Analytics.post_id.in_(list(post_ids)))
+
+    async with db.engine.connect() as conn:
+        for statement in (rolled.order_by(AnalyticsDaily.day), raw.order_by(Analytics.id)):
+            result = await conn.stream(statement.execution_options(yield_per=LOAD_BATCH_SIZE))
+            async for chunk in result.partitions(LOAD_BATCH_SIZE):
+                columns = list(zip(*chunk))
+                ids.append(np.fromiter(columns[0], dtype=np.int64, count=len(chunk)))
+                codes.extend(vocabulary.encode(columns[1]))
+                stamps.append(np.array(columns[2], dtype="datetime64[us]"))
+                weights.append(
+                    np.fromiter(columns[3], dtype=np.int64, count=len(chunk)) if len(columns) > 3
+                    else np.ones(len(chunk), dtype=np.int64)
+                )
+
+    return EventFrame(
+        np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+        codes,
+        np.concatenate(stamps) if stamps else np.zeros(0, dtype="datetime64[us]"),
+        vocabulary.values,
+        np.concatenate(weights) if weights else np.zeros(0, dtype=np.int64)
+    )
+
+def counts_by_post(events: EventFrame, post_ids, action: str, since: Optional[datetime] = None):
+    """
+    Events of an action per post
+
+    Args:
+        events: Event frame
+        post_ids: Posts to count for (any order)
+        action: Action name, e.g. "click_CTA"
+        since: Only events at or after this moment
+
+    Returns:
+        int64 array aligned with post_ids
+    """
+    np = _import_numpy()
+    post_ids = np.asarray(post_ids, dtype=np.int64)
+    order = np.argsort(post_ids, kind="stable")
+    sorted_ids = post_ids[order]
+
+    mask = events.mask(action, since)
+    selected, weights = events.post_ids[mask], events.weights[mask]
+    positions = np.searchsorted(sorted_ids, selected)
+    positions = np.minimum(positions, max(len(sorted_ids) - 1, 0))
+    if len(sorted_ids):
+        known = sorted_ids[positions] == selected
+        positions, weights = positions[known], weights[known]
+
+    counts = np.zeros(len(post_ids), dtype=np.int64)
+    counts[order] = np.bincount(positions, weights=weights, minlength=len(post_ids))[:len(post_ids)]
+    return counts
+
+def rate(numerator, denominator, scale: float = 1.0):
+    """Element-wise numerator / denominator * scale with 0 where the denominator is 0"""
+    np = _import_numpy()
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator * scale, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+def format_stats(posts: PostTable, events: EventFrame, since: Optional[datetime] = None) -> List[Dict]:
+    """
+    Per-format report metrics
+
+    Args:
+        posts: All posts
+        events: Click and view events
+        since: Only count events at or after this moment
+
+    Returns:
+        One dict per format ordered by post count: post_format, total_posts,
+        published_posts, total_clicks, total_views, posts_percent,
+        clicks_percent, avg_clicks (per published post), engagement_rate
+        (clicks per view, %), p50_clicks / p90_clicks (per published post)
+    """
+    np = _import_numpy()
+    groups = len(posts.format_names)
+    if not groups:
+        return []
+
+    clicks = counts_by_post(events, posts.ids, "click_CTA", since)
+    views = counts_by_post(events, posts.ids, "view", since)
+
+    total_posts = np.bincount(posts.formats, minlength=groups)
+    published_posts = np.bincount(posts.formats, weights=posts.published, minlength=groups).astype(np.int64)
+    total_clicks = np.bincount(posts.formats, weights=clicks, minlength=groups).astype(np.int64)
+    total_views = np.bincount(posts.formats, weights=views, minlength=groups).astype(np.int64)
+
+    posts_percent = rate(total_posts, total_posts.sum(), 100)
+    clicks_percent = rate(total_clicks, total_clicks.sum(), 100)
+    avg_clicks = rate(total_clicks, published_posts)
+    engagement = rate(total_clicks, total_views, 100)
+
+    # Percentiles over each format's published posts: sort by (format, clicks) once
+    published = np.flatnonzero(posts.published)
+    order = np.lexsort((clicks[published], posts.formats[published]))
+    sorted_formats = posts.formats[published][order]
+    sorted_clicks = clicks[published][order]
+    bounds = np.searchsorted(sorted_formats, np.arange(groups + 1))
+
+    stats = []
+    for code in np.argsort(-total_posts, kind="stable"):
+        segment = sorted_clicks[bounds[code]:bounds[code + 1]]
+        percentiles = np.percentile(segment, PERCENTILES) if len(segment) else [0.0] * len(PERCENTILES)
+        stats.append({
+            "post_format": posts.format_names[code],
+            "total_posts": int(total_posts[code]),
+            "published_posts": int(published_posts[code]),
+            "total_clicks": int(total_clicks[code]),
+            "total_views": int(total_views[code]),
+            "posts_percent": float(posts_percent[code]),
+            "clicks_percent": float(clicks_percent[code]),
+            "avg_clicks": float(avg_clicks[code]),
+            "engagement_rate": float(engagement[code]),
+            **{f"p{p}_clicks": float(value) for p, value in zip(PERCENTILES, percentiles)},
+        })
+    return stats
+
+def top_posts(posts: PostTable, events: EventFrame, limit: int = 10,
+              since: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """
+    Most clicked existing posts
+
+    Returns:
+        (post_id, clicks) pairs, most clicks first (ties by lower ID)
+    """
+    np = _import_numpy()
+    clicks = counts_by_post(events, posts.ids, "click_CTA", since)
+    candidates = np.flatnonzero(clicks)
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-clicks[candidates], limit - 1)[:limit]]
+    candidates = candidates[np.lexsort((posts.ids[candidates], -clicks[candidates]))]
+    return [(int(posts.ids[row]), int(clicks[row])) for row in candidates[:limit]]
+
+def rolling_mean(values, window: int):
+    """Trailing moving average; the first window-1 points average what is available"""
+    np = _import_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+def daily_counts(events: EventFrame, action: str, days: int, end: Optional[datetime] = None,
+                 window: int = 7):
+    """
+    Events of an action per UTC day with a rolling mean
+
+    Args:
+        events: Event frame
+        action: Action name
+        days: Number of days ending with the day of `end`
+        end: Last moment (default: now, UTC)
+        window: Rolling mean window in days
+
+    Returns:
+        Tuple of (dates, counts, rolling means) arrays of length `days`
+    """
+    np = _import_numpy()
+    last_day = np.datetime64((end or datetime.utcnow()).date(), "D")
+    first_day = last_day - (days - 1)
+
+    mask = events.mask(action)
+    offsets = (events.timestamps[mask].astype("datetime64[D]") - first_day).astype(np.int64)
+    in_range = (offsets >= 0) & (offsets < days)
+
+    counts = np.bincount(offsets[in_range], weights=events.weights[mask][in_range], minlength=days).astype(np.int64)
+    return first_day + np.arange(days), counts, rolling_mean(counts, window)
+
+async def load_report_frames(since: Optional[datetime] = None) -> Tuple[PostTable, EventFrame]:
+    """Posts and their click / view events, as used by the reports"""
+    posts = await load_posts()
+    events = await load_events(since=since, actions=("click_CTA", "view"))
+    return posts, events
@@ -0,0 +1,156 @@
+"""
+Subscriber cohort analytics for TimeToShopping_bot
+Incremental click activity per subscriber and week, cohort and repeat-click tables
+"""
+
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot.database.db import db
+from logging_config import logger
+
+# Cursor of the job in export_cursors (consumer "_jobs")
+COHORT_STREAM = "cohorts"
+
+# Click events folded per transaction
+COHORT_BATCH_SIZE = 5000
+
+# Cohorts (first-click weeks) and weeks after the first click shown in the table
+COHORT_WEEKS = 8
+
+def week_start(moment: datetime) -> date:
+    """Monday of the week of a moment"""
+    day = moment.date()
+    return day - timedelta(days=day.weekday())
+
+def aggregate_clicks(events: Iterable[Tuple[Optional[str], Optional[str], datetime]]) -> Dict[Tuple[str, str, date], int]:
+    """
+    Count clicks per (user, format, week)
+
+    Args:
+        events: (user_id, post_format, created_at); clicks without a user are skipped
+
+    Returns:
+        {(user_id, post_format or "", week): clicks}
+    """
+    counts = Counter()
+    for user_id, post_format, created_at in events:
+        if user_id and created_at:
+            counts[(user_id, post_format or "", week_start(created_at))] += 1
+    return dict(counts)
+
+def build_cohort_table(rows: Iterable[Tuple[date, date, int]],
+                       weeks: int = COHORT_WEEKS) -> List[Tuple[date, int, List[float]]]:
+    """
+    Retention matrix from (cohort week, activity week, users) rows
+
+    Args:
+        rows: Output of Database.get_cohort_rows
+        weeks: Latest cohorts kept and week offsets per cohort
+
+    Returns:
+        (cohort week, cohort size, [% of the cohort active at week offset 0..n])
+        for the latest cohorts, oldest first; offsets that have not happened yet are omitted
+    """
+    active: Dict[date, Dict[int, int]] = {}
+    latest = None
+    for cohort, week, users in rows:
+        latest = week if latest is None or week > latest else latest
+        offset = (week - cohort).days // 7
+        if 0 <= offset < weeks:
+            active.setdefault(cohort, {})[offset] = users
+
+    table = []
+    for cohort in sorted(active)[-weeks:]:
+        size = active[cohort].get(0, 0)
+        observed = (latest - cohort).days // 7 + 1
+        retention = [
+            active[cohort].get(offset, 0) / size * 100 if size else 0.0
+            for offset in range(min(weeks, observed))
+        ]
+        table.append((cohort, size, retention))
+    return table
+
+def repeat_rates(rows: Iterable[Tuple[str, int, int, int]]) -> List[Dict]:
+    """
+    Per-format repeat-click rates
+
+    Args:
+        rows: Output of Database.get_format_repeat_rows
+
+    Returns:
+        Dicts with post_format (None for posts without format), users,
+        repeat_rate (% with 2+ clicks) and return_rate (% active in 2+ weeks)
+    """
+    return [
+        {
+            "post_format": post_format or None,
+            "users": users,
+            "repeat_rate": (repeat or 0) / users * 100 if users else 0.0,
+            "return_rate": (returning or 0) / users * 100 if users else 0.0,
+        }
+        for post_format, users, repeat, returning in rows
+    ]
+
+class CohortTracker:
+    """
+    Incremental cohort job
+
+    Each run folds only the clicks past its cursor into click_activity; the
+    counts and the cursor commit together, so a failed run is simply retried.
+    Reports are computed after a run and served from cache until the next.
+    """
+
+    def __init__(self, batch_size: int = COHORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.report: Optional[Dict] = None
+        self._lock = asyncio.Lock()
+
+    async def update(self) -> int:
+        """
+        Process new click events and refresh the cached report
+
+        Returns:
+            Number of click events processed
+        """
+        async with self._lock:
+            cursor = await db.get_export_cursor("_jobs", COHORT_STREAM)
+            if cursor is None:
+                # First run or reset cursor: rebuild from the whole analytics table
+                await db.reset_click_activity()
+            last_id = cursor.last_id if cursor else 0
+
+            processed = 0
+            while True:
+                rows = await db.get_click_events(last_id, limit=self.batch_size)
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                counts = aggregate_clicks(
+                    (user_id, post_format, created_at) for _, created_at, post_format, user_id in rows
+                )
+                await db.add_click_activity(counts, COHORT_STREAM, last_id)
+                processed += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+
+            if processed or self.report is None:
+                self.report = {
+                    "cohorts": build_cohort_table(await db.get_cohort_rows()),
+                    "formats": repeat_rates(await db.get_format_repeat_rows()),
+                    "updated_at": datetime.utcnow(),
+                }
+            if processed:
+                logger.info(f"Cohort job processed {processed} clicks up to analytics id {last_id}")
+            return processed
+
+    async def get_report(self) -> Dict:
+        """Cached report, computed on first use"""
+        if self.report is None:
+            await self.update()
+        return self.report
+
+# Global cohort tracker instance
+cohort_tracker = CohortTracker()
@@ -0,0 +1,213 @@
+"""
+Columnar export utilities for TimeToShopping_bot
+Export analytics and posts tables to Parquet / Arrow IPC files
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, func
+
+from bot.database.db import db
+from bot.database.models import Post, Analytics
+from bot.utils.export_jobs import ExportArtifact, ProgressCallback
+from logging_config import logger
+
+# Supported columnar formats and file extensions
+COLUMNAR_FORMATS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+# Rows fetched from the DB cursor and written per row group / record batch
+ROW_GROUP_SIZE = 50_000
+
+# Low-cardinality columns stored dictionary-encoded
+DICTIONARY_COLUMNS = {"action", "post_format", "status", "media_type"}
+
+def _import_pyarrow():
+    """Import pyarrow lazily (optional dependency)"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Columnar export requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+class _DictionaryEncoder:
+    """
+    Stable dictionary encoder shared by all batches of one column
+
+    The dictionary only grows, so every batch's dictionary extends the
+    previous one and Arrow IPC can emit it as a delta.
+    """
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def encode(self, pa, column: List[Optional[str]]):
+        indices = []
+        for value in column:
+            if value is None:
+                indices.append(None)
+                continue
+            code = self.index.get(value)
+            if code is None:
+                code = len(self.values)
+                self.index[value] = code
+                self.values.append(value)
+            indices.append(code)
+
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()),
+            pa.array(self.values, type=pa.string())
+        )
+
+class ColumnarExporter:
+    """Columnar (Parquet / Arrow) export of analytics and posts"""
+
+    def __init__(self, fmt: str = "parquet", compression: str = "zstd", row_group_size: int = ROW_GROUP_SIZE):
+        if fmt not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {fmt}")
+        self.fmt = fmt
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+    def _field_type(self, pa, name: str, kind: str):
+        if name in DICTIONARY_COLUMNS:
+            return pa.dictionary(pa.int32(), pa.string())
+        return {
+            "int": pa.int64(),
+            "str": pa.string(),
+            "ts": pa.timestamp("us"),
+        }[kind]
+
+    async def export_analytics(self, progress: Optional[ProgressCallback] = None,
+                               days: Optional[int] = None) -> ExportArtifact:
+        """
+        Export analytics events joined with post format
+
+        Args:
+            progress: Optional callback receiving completion ratio (0..1)
+            days: Only include events from the last N days (all when None)
+
+        Returns:
+            ExportArtifact with columnar file content
+        """
+
+        columns = [
+            ("id", "int"), ("post_id", "int"), ("action", "str"), ("post_format", "str"),
+            ("user_id", "str"), ("created_at", "ts"), ("extra_data", "str"), ("channel_id", "int"),
+        ]
+        stmt = (
+            select(
+                Analytics.id, Analytics.post_id, Analytics.action, Post.post_format,
+                Analytics.user_id, Analytics.created_at, Analytics.extra_data, Analytics.channel_id
+            )
+            .outerjoin(Post, Analytics.post_id == Post.id)
+            .order_by(Analytics.id)
+        )
+        if days:
+            stmt = stmt.where(Analytics.created_at >= datetime.utcnow() - timedelta(days=days))
+
+        suffix = f"{days}days_" if days else ""
+        return await self._export("analytics", columns, stmt, f"analytics_{suffix}", progress)
+
+    async def export_posts(self, progress: Optional[ProgressCallback] = None) -> ExportArtifact:
+        """
+        Export posts table
+
+        Args:
+            progress: Optional callback receiving completion ratio (0..1)
+
+        Returns:
+            ExportArtifact with columnar file content
+        """
+
+        columns = [
+            ("id", "int"), ("title", "str"), ("keywords", "str"), ("text", "str"),
+            ("media_type", "str"), ("file_id", "str"), ("status", "str"), ("post_format", "str"),
+            ("publish_at", "ts"), ("created_at", "ts"), ("updated_at", "ts"), ("created_by", "int"),
+        ]
+        stmt = select(
+            Post.id, Post.title, Post.keywords, Post.text, Post.media_type, Post.file_id,
+            Post.status, Post.post_format, Post.publish_at, Post.created_at, Post.updated_at,
+            Post.created_by
+        ).order_by(Post.id)
+
+        return await self._export("posts", columns, stmt, "posts_", progress)
+
+    async def _export(self, table: str, columns: List, stmt, prefix: str,
+                      progress: Optional[ProgressCallback]) -> ExportArtifact:
+        """Stream statement results into a columnar file in row-group batches"""
+        pa = _import_pyarrow()
+
+        schema = pa.schema([
+            pa.field(name, self._field_type(pa, name, kind)) for name, kind in columns
+        ])
+        encoders = {name: _DictionaryEncoder() for name, _ in columns if name in DICTIONARY_COLUMNS}
+
+        sink = pa.BufferOutputStream()
+        writer = self._open_writer(pa, sink, schema)
+        rows_written = 0
+
+        try:
+            async with db.engine.connect() as conn:
+                total = (await conn.execute(select(func.count()).select_from(stmt.subquery()))).scalar() or 0
+                result = await conn.stream(stmt.execution_options(yield_per=self.row_group_size))
+
+                async for partition in result.partitions(self.row_group_size):
+                    batch = self._to_batch(pa, schema, columns, encoders, partition)
+                    if self.fmt == "parquet":
+                        writer.write_table(pa.Table.from_batches([batch]), row_group_size=self.row_group_size)
+                    else:
+                        writer.write_batch(batch)
+
+                    rows_written += len(partition)
+                    if progress and total:
+                        progress(rows_written / total)
+        finally:
+            writer.close()
+
+        data = sink.getvalue().to_pybytes()
+        filename = f"{prefix}export_{datetime.now().strftime('%Y%m%d_%H%M%S')}{COLUMNAR_FORMATS[self.fmt]}"
+
+        logger.info(f"Columnar {table} export: {rows_written} rows, {len(data)} bytes ({self.fmt}/{self.compression})")
+
+        # Already compressed; split raw bytes when above the upload budget
+        return ExportArtifact.from_bytes(data, filename, rows=rows_written)
+
+    def _open_writer(self, pa, sink, schema):
+        if self.fmt == "parquet":
+            return pa.parquet.ParquetWriter(
+                sink,
+                schema,
+                compression=self.compression,
+                use_dictionary=sorted(DICTIONARY_COLUMNS & set(schema.names)),
+            )
+
+        options = pa.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+        return pa.ipc.new_file(sink, schema, options=options)
+
+    def _to_batch(self, pa, schema, columns: List, encoders: Dict[str, _DictionaryEncoder], rows: List[Any]):
+        """Transpose DB rows into an Arrow record batch"""
+        values = list(zip(*rows)) if rows else [() for _ in columns]
+        arrays = []
+        for (name, _), column, field in zip(columns, values, schema):
+            if name in encoders:
+                arrays.append(encoders[name].encode(pa, list(column)))
+            else:
+                arrays.append(pa.array(column, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+# Convenience functions for direct use
+
+async def export_analytics_columnar(fmt: str = "parquet", days: Optional[int] = None) -> ExportArtifact:
+    """Export analytics to Parquet / Arrow file"""
+    return await ColumnarExporter(fmt).export_analytics(days=days)
+
+async def export_posts_columnar(fmt: str = "parquet") -> ExportArtifact:
+    """Export posts to Parquet / Arrow file"""
+    return await ColumnarExporter(fmt).export_posts()
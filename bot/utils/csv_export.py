@@ -3,16 +3,28 @@ CSV Export utilities for TimeToShopping_bot
 Export analytics and posts data to CSV format
 """
 
+import asyncio
 import csv
 import io
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from aiogram.types import BufferedInputFile
+from sqlalchemy import select, func
 
+from config import config
 from bot.database.db import db
+from bot.database.models import Post, Analytics
+from bot.utils.export_jobs import ExportArtifact, ProgressCallback
+from bot.utils.export_parts import PartWriter
+from bot.utils.analytics_compute import (
+    load_events, load_report_frames, counts_by_post, format_stats, top_posts, daily_counts, rate
+)
 from logging_config import logger
 
+# Rows written between progress reports / event loop yields
+EXPORT_CHUNK_SIZE = 500
+
 class CSVExporter:
     """CSV export functionality for analytics and posts"""
     
@@ -49,13 +61,14 @@ class CSVExporter:
             ]
             writer.writerow(headers)
             
+            # Counts of both analytics tiers (raw and rolled-up daily) in one query
+            post_ids = [post.id for post in posts]
+            events = await load_events(actions=("click_CTA", "view"), post_ids=post_ids)
+            all_clicks = counts_by_post(events, post_ids, "click_CTA")
+            all_views = counts_by_post(events, post_ids, "view")
+            
             # Data rows
-            for post in posts:
-                # Get analytics for this post
-                analytics = await db.get_post_analytics(post.id)
-                clicks = len([a for a in analytics if a.action == 'click_CTA'])
-                views = len([a for a in analytics if a.action == 'view'])
-                
+            for post, clicks, views in zip(posts, all_clicks.tolist(), all_views.tolist()):
                 # Text preview (first 100 characters)
                 text_preview = post.text[:100] + "..." if len(post.text) > 100 else post.text
                 text_preview = text_preview.replace('\n', ' ').replace('\r', ' ')
@@ -100,9 +113,6 @@ class CSVExporter:
             start_date = datetime.utcnow() - timedelta(days=days)
             
             async with db.async_session() as session:
-                from sqlalchemy import select, and_
-                from bot.database.models import Analytics, Post
-                
                 result = await session.execute(
                     select(Analytics, Post.title, Post.post_format)
                     .join(Post, Analytics.post_id == Post.id)
@@ -133,7 +143,7 @@ class CSVExporter:
                     analytics.action,
                     analytics.user_id or "",
                     analytics.created_at.isoformat() if analytics.created_at else "",
-                    analytics.metadata or ""
+                    analytics.extra_data or ""
                 ]
                 writer.writerow(row)
             
@@ -158,33 +168,20 @@ class CSVExporter:
             BufferedInputFile ready for sending
         """
         try:
-            # Get summary data
-            analytics_summary = await db.get_analytics_summary(days)
+            # One columnar load serves every section; the period is a mask on it
+            posts, events = await load_report_frames()
+            since = datetime.utcnow() - timedelta(days=days)
+            period_clicks = events.count("click_CTA", since)
+            period_views = events.count("view", since)
+            top = top_posts(posts, events, limit=10, since=since)
+            format_data = format_stats(posts, events)
+            dates, daily_clicks, rolling_clicks = daily_counts(events, "click_CTA", days)
             
-            # Get format statistics
             async with db.async_session() as session:
-                from sqlalchemy import select, func, and_
-                from bot.database.models import Post, Analytics
-                
-                # Format performance
-                format_stats = await session.execute(
-                    select(
-                        Post.post_format,
-                        func.count(Post.id).label('total_posts'),
-                        func.count(
-                            func.case([(Post.status == 'published', 1)], else_=None)
-                        ).label('published_posts'),
-                        func.coalesce(func.count(Analytics.id), 0).label('total_clicks')
-                    ).select_from(Post)
-                    .outerjoin(
-                        Analytics, 
-                        and_(Post.id == Analytics.post_id, Analytics.action == 'click_CTA')
-                    )
-                    .group_by(Post.post_format)
-                    .order_by(func.count(Post.id).desc())
+                result = await session.execute(
+                    select(Post.id, Post.title).where(Post.id.in_([post_id for post_id, _ in top]))
                 )
-                
-                format_data = format_stats.fetchall()
+                titles = {post_id: title or "" for post_id, title in result.all()}
             
             # Create CSV content
             output = io.StringIO()
@@ -199,31 +196,45 @@ class CSVExporter:
             # Overall metrics
             writer.writerow(['OVERALL METRICS'])
             writer.writerow(['Metric', 'Value'])
-            writer.writerow(['Total Clicks', analytics_summary['total_clicks']])
-            writer.writerow(['Top Performing Posts', len(analytics_summary['top_posts'])])
+            writer.writerow(['Total Clicks', period_clicks])
+            writer.writerow(['Total Views', period_views])
+            writer.writerow(['Click/View Rate', f"{period_clicks / period_views * 100:.2f}%" if period_views else ""])
+            writer.writerow(['Top Performing Posts', len(top)])
             writer.writerow([])
             
             # Top posts
             writer.writerow(['TOP PERFORMING POSTS'])
             writer.writerow(['Rank', 'Post ID', 'Title', 'Clicks'])
-            for i, post in enumerate(analytics_summary['top_posts'][:10], 1):
-                title = post['title'][:50] + "..." if len(post['title']) > 50 else post['title']
-                writer.writerow([i, post['post_id'], title, post['clicks']])
+            for i, (post_id, clicks) in enumerate(top, 1):
+                title = titles.get(post_id, "")
+                title = title[:50] + "..." if len(title) > 50 else title
+                writer.writerow([i, post_id, title, clicks])
+            writer.writerow([])
+            
+            # Daily clicks with 7-day rolling average
+            writer.writerow(['DAILY CLICKS'])
+            writer.writerow(['Date', 'Clicks', '7-Day Average'])
+            for day, clicks, average in zip(dates, daily_clicks, rolling_clicks):
+                writer.writerow([str(day), int(clicks), f"{average:.2f}"])
             writer.writerow([])
             
             # Format statistics
             writer.writerow(['FORMAT STATISTICS'])
-            writer.writerow(['Format', 'Total Posts', 'Published Posts', 'Total Clicks', 'Avg Clicks/Post'])
+            writer.writerow([
+                'Format', 'Total Posts', 'Published Posts', 'Total Clicks', 'Avg Clicks/Post',
+                'Median Clicks/Post', 'P90 Clicks/Post', 'Click/View Rate'
+            ])
             
             for stat in format_data:
-                format_name = stat.post_format or 'Unknown'
-                avg_clicks = (stat.total_clicks / stat.published_posts) if stat.published_posts > 0 else 0
                 writer.writerow([
-                    format_name,
-                    stat.total_posts,
-                    stat.published_posts,
-                    stat.total_clicks,
-                    f"{avg_clicks:.2f}"
+                    stat['post_format'] or 'Unknown',
+                    stat['total_posts'],
+                    stat['published_posts'],
+                    stat['total_clicks'],
+                    f"{stat['avg_clicks']:.2f}",
+                    f"{stat['p50_clicks']:.1f}",
+                    f"{stat['p90_clicks']:.1f}",
+                    f"{stat['engagement_rate']:.2f}%" if stat['total_views'] else ""
                 ])
             
             # Create file
@@ -236,12 +247,161 @@ class CSVExporter:
             logger.error(f"Error exporting summary report: {e}")
             raise
     
+    async def export_stats_overview(self, progress: Optional[ProgressCallback] = None) -> ExportArtifact:
+        """
+        Export per-post statistics overview (used by the stats menu)
+        
+        Args:
+            progress: Optional callback receiving completion ratio (0..1)
+            
+        Returns:
+            ExportArtifact with CSV content
+        """
+        try:
+            async with db.async_session() as session:
+                clicks = db.event_counts("click_CTA")
+                posts_with_analytics = await session.execute(
+                    select(
+                        Post.id,
+                        Post.title,
+                        Post.post_format,
+                        Post.status,
+                        Post.created_at,
+                        Post.publish_at,
+                        Post.keywords,
+                        func.coalesce(func.sum(clicks.c.events), 0).label('total_clicks')
+                    ).select_from(Post)
+                    .outerjoin(clicks, Post.id == clicks.c.post_id)
+                    .group_by(
+                        Post.id, Post.title, Post.post_format, Post.status,
+                        Post.created_at, Post.publish_at, Post.keywords
+                    )
+                    .order_by(Post.created_at.desc())
+                )
+                
+                posts = posts_with_analytics.fetchall()
+            
+            if progress:
+                progress(0.1)
+            
+            parts = self._part_writer(
+                "shopping_stats",
+                ['Post ID', 'Title', 'Format', 'Status', 'Created At',
+                 'Published At', 'Total Clicks', 'Keywords']
+            )
+            
+            total = len(posts)
+            for start in range(0, total, EXPORT_CHUNK_SIZE):
+                parts.write(self._encode_rows([
+                    [
+                        post.id,
+                        post.title or "",
+                        post.post_format or "",
+                        post.status,
+                        post.created_at.isoformat() if post.created_at else "",
+                        post.publish_at.isoformat() if post.publish_at else "",
+                        post.total_clicks,
+                        post.keywords or ""
+                    ]
+                    for post in posts[start:start + EXPORT_CHUNK_SIZE]
+                ]))
+                
+                if progress:
+                    progress(0.1 + 0.9 * min(start + EXPORT_CHUNK_SIZE, total) / total)
+                # Let other handlers run between chunks
+                await asyncio.sleep(0)
+            
+            return ExportArtifact(parts.close(), rows=total, raw_size=parts.raw_size)
+            
+        except Exception as e:
+            logger.error(f"Error exporting stats overview: {e}")
+            raise
+    
+    async def export_analytics_events(self, progress: Optional[ProgressCallback] = None,
+                                      days: int = 30) -> ExportArtifact:
+        """
+        Export raw analytics events streamed from the DB cursor
+        
+        Output is compressed and split into parts under EXPORT_PART_SIZE.
+        
+        Args:
+            progress: Optional callback receiving completion ratio (0..1)
+            days: Number of days to include in export
+            
+        Returns:
+            ExportArtifact with CSV parts
+        """
+        try:
+            start_date = datetime.utcnow() - timedelta(days=days)
+            stmt = (
+                select(
+                    Analytics.id, Analytics.post_id, Post.title, Post.post_format,
+                    Analytics.action, Analytics.user_id, Analytics.created_at, Analytics.extra_data,
+                    Analytics.channel_id
+                )
+                .outerjoin(Post, Analytics.post_id == Post.id)
+                .where(Analytics.created_at >= start_date)
+                .order_by(Analytics.id)
+            )
+            
+            parts = self._part_writer(
+                f"analytics_export_{days}days",
+                ['Analytics ID', 'Post ID', 'Post Title', 'Post Format', 'Action',
+                 'User ID', 'Timestamp', 'Metadata', 'Channel ID']
+            )
+            rows = 0
+            
+            async with db.engine.connect() as conn:
+                total = (await conn.execute(
+                    select(func.count(Analytics.id)).where(Analytics.created_at >= start_date)
+                )).scalar() or 0
+                result = await conn.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+                
+                async for chunk in result.partitions(EXPORT_CHUNK_SIZE):
+                    parts.write(self._encode_rows([
+                        [
+                            row.id,
+                            row.post_id,
+                            row.title or "Unknown",
+                            row.post_format or "",
+                            row.action,
+                            row.user_id or "",
+                            row.created_at.isoformat() if row.created_at else "",
+                            row.extra_data or "",
+                            row.channel_id or ""
+                        ]
+                        for row in chunk
+                    ]))
+                    rows += len(chunk)
+                    if progress and total:
+                        progress(rows / total)
+            
+            return ExportArtifact(parts.close(), rows=rows, raw_size=parts.raw_size)
+            
+        except Exception as e:
+            logger.error(f"Error exporting analytics events: {e}")
+            raise
+    
+    def _part_writer(self, name: str, headers: List[str]) -> PartWriter:
+        """Create compressed part writer with CSV header (BOM in every part for Excel)"""
+        return PartWriter(
+            f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            ".csv",
+            part_size=config.EXPORT_PART_SIZE,
+            compression=config.EXPORT_COMPRESSION,
+            header="\ufeff".encode("utf-8") + self._encode_rows([headers])
+        )
+    
+    @staticmethod
+    def _encode_rows(rows: List[List[Any]]) -> bytes:
+        """Encode whole CSV rows to UTF-8 bytes"""
+        output = io.StringIO()
+        csv.writer(output).writerows(rows)
+        return output.getvalue().encode("utf-8")
+    
     async def _get_all_posts_with_analytics(self, limit: int) -> List:
         """Get all posts with their analytics data"""
         async with db.async_session() as session:
-            from sqlalchemy import select
-            from bot.database.models import Post
-            
             result = await session.execute(
                 select(Post)
                 .order_by(Post.created_at.desc())
@@ -303,19 +463,21 @@ async def export_posts_to_json(status: Optional[str] = None, limit: int = 1000)
             exporter = CSVExporter()
             posts = await exporter._get_all_posts_with_analytics(limit)
         
+        # Counts of all exported posts from one columnar query instead of one per post
+        post_ids = [post.id for post in posts]
+        events = await load_events(actions=("click_CTA", "view"), post_ids=post_ids)
+        clicks = counts_by_post(events, post_ids, "click_CTA")
+        views = counts_by_post(events, post_ids, "view")
+        engagement = rate(clicks, views, 100)
+        
         # Convert posts to JSON-serializable format
         posts_data = []
-        for post in posts:
-            # Get analytics
-            analytics = await db.get_post_analytics(post.id)
-            clicks = len([a for a in analytics if a.action == 'click_CTA'])
-            views = len([a for a in analytics if a.action == 'view'])
-            
+        for post, post_clicks, post_views, post_engagement in zip(posts, clicks, views, engagement):
             post_dict = post.to_dict()
             post_dict['analytics'] = {
-                'total_clicks': clicks,
-                'total_views': views,
-                'engagement_rate': (clicks / views * 100) if views > 0 else 0
+                'total_clicks': int(post_clicks),
+                'total_views': int(post_views),
+                'engagement_rate': float(post_engagement)
             }
             posts_data.append(post_dict)
         
@@ -0,0 +1,177 @@
+"""
+Incremental (delta) export utilities for TimeToShopping_bot
+Keyset-paged exports of rows added/changed since a consumer's last pull
+"""
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import select, func, and_, or_
+
+from config import config
+from bot import ANALYTICS_BATCH_SIZE
+from bot.database.db import db
+from bot.database.models import Analytics, Post
+from bot.utils.export_jobs import ExportArtifact, ProgressCallback
+from bot.utils.export_parts import PartWriter
+from logging_config import logger
+
+DELTA_STREAMS = ("analytics", "posts")
+
+# Upper bound of rows per pull; larger backlogs continue on the next pull
+DELTA_MAX_ROWS = 500_000
+
+ANALYTICS_HEADERS = ['Analytics ID', 'Post ID', 'Action', 'User ID', 'Timestamp', 'Metadata', 'Channel ID']
+POSTS_HEADERS = [
+    'Post ID', 'Title', 'Format', 'Status', 'Keywords', 'Media Type',
+    'Created At', 'Updated At', 'Published At', 'Text'
+]
+
+def _encode_rows(rows: List[List[Any]]) -> bytes:
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue().encode("utf-8")
+
+def _iso(value: Optional[datetime]) -> str:
+    return value.isoformat() if value else ""
+
+class DeltaExporter:
+    """
+    Exports only rows past the consumer's persisted cursor
+
+    Analytics are keyed on the monotonically increasing Analytics.id, posts
+    on (Post.updated_at, Post.id) so edits are picked up again. The cursor is
+    only advanced by commit() after the file was delivered, so a failed pull
+    is simply repeated from the same position.
+    """
+
+    def __init__(self, consumer: str, batch_size: int = ANALYTICS_BATCH_SIZE, max_rows: int = DELTA_MAX_ROWS):
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+
+    async def export(self, progress: Optional[ProgressCallback] = None, stream: str = "analytics") -> ExportArtifact:
+        """
+        Export rows after the stored cursor
+
+        Args:
+            progress: Optional callback receiving completion ratio (0..1)
+            stream: analytics or posts
+
+        Returns:
+            ExportArtifact; artifact.meta["cursor"] holds the position to commit
+        """
+        if stream not in DELTA_STREAMS:
+            raise ValueError(f"Unknown delta stream: {stream}")
+
+        cursor = await db.get_export_cursor(self.consumer, stream)
+        last_id = cursor.last_id if cursor else 0
+        last_ts = cursor.last_updated_at if cursor else None
+
+        parts = PartWriter(
+            f"{stream}_delta_{self.consumer}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            ".csv",
+            part_size=config.EXPORT_PART_SIZE,
+            compression=config.EXPORT_COMPRESSION,
+            header="\ufeff".encode("utf-8") + _encode_rows(
+                [ANALYTICS_HEADERS if stream == "analytics" else POSTS_HEADERS]
+            )
+        )
+
+        # Progress is relative to what this pull will export, not the row cap
+        total = min(await self._count_pending(stream, last_ts, last_id), self.max_rows)
+
+        rows = 0
+        start_id = last_id
+        while rows < self.max_rows:
+            limit = min(self.batch_size, self.max_rows - rows)
+            if stream == "analytics":
+                batch = await self._fetch_analytics(last_id, limit)
+                if batch:
+                    last_id = batch[-1].id
+                parts.write(_encode_rows([
+                    [row.id, row.post_id, row.action, row.user_id or "", _iso(row.created_at), row.extra_data or "",
+                     row.channel_id or ""]
+                    for row in batch
+                ]))
+            else:
+                batch = await self._fetch_posts(last_ts, last_id, limit)
+                if batch:
+                    last_ts, last_id = batch[-1].updated_at, batch[-1].id
+                parts.write(_encode_rows([
+                    [
+                        row.id, row.title or "", row.post_format or "", row.status, row.keywords or "",
+                        row.media_type or "", _iso(row.created_at), _iso(row.updated_at),
+                        _iso(row.publish_at), row.text
+                    ]
+                    for row in batch
+                ]))
+
+            rows += len(batch)
+            if progress and total:
+                progress(rows / total)
+            if len(batch) < limit:
+                break
+            await asyncio.sleep(0)
+
+        artifact = ExportArtifact(parts.close(), rows=rows, raw_size=parts.raw_size)
+        artifact.meta["stream"] = stream
+        artifact.meta["cursor"] = (last_id, last_ts)
+        artifact.meta["complete"] = rows < self.max_rows
+
+        logger.info(f"Delta export {self.consumer}/{stream}: {rows} rows after id={start_id}")
+        return artifact
+
+    async def commit(self, artifact: ExportArtifact):
+        """Persist cursor of a delivered delta export"""
+        if not artifact.rows:
+            return
+        last_id, last_ts = artifact.meta["cursor"]
+        await db.save_export_cursor(self.consumer, artifact.meta["stream"], last_id, last_ts, artifact.rows)
+
+    async def _count_pending(self, stream: str, after_ts: Optional[datetime], after_id: int) -> int:
+        """Rows past the cursor"""
+        async with db.async_session() as session:
+            if stream == "analytics":
+                query = select(func.count(Analytics.id)).where(Analytics.id > after_id)
+            else:
+                query = select(func.count(Post.id))
+                if after_ts is not None:
+                    query = query.where(self._posts_after(after_ts, after_id))
+            return (await session.execute(query)).scalar() or 0
+
+    @staticmethod
+    def _posts_after(after_ts: datetime, after_id: int):
+        return or_(
+            Post.updated_at > after_ts,
+            and_(Post.updated_at == after_ts, Post.id > after_id)
+        )
+
+    async def _fetch_analytics(self, after_id: int, limit: int) -> List[Any]:
+        async with db.async_session() as session:
+            result = await session.execute(
+                select(
+                    Analytics.id, Analytics.post_id, Analytics.action,
+                    Analytics.user_id, Analytics.created_at, Analytics.extra_data, Analytics.channel_id
+                )
+                .where(Analytics.id > after_id)
+                .order_by(Analytics.id)
+                .limit(limit)
+            )
+            return result.fetchall()
+
+    async def _fetch_posts(self, after_ts: Optional[datetime], after_id: int, limit: int) -> List[Any]:
+        async with db.async_session() as session:
+            query = select(
+                Post.id, Post.title, Post.post_format, Post.status, Post.keywords, Post.media_type,
+                Post.created_at, Post.updated_at, Post.publish_at, Post.text
+            )
+            if after_ts is not None:
+                query = query.where(self._posts_after(after_ts, after_id))
+            result = await session.execute(
+                query.order_by(Post.updated_at, Post.id).limit(limit)
+            )
+            return result.fetchall()
@@ -0,0 +1,302 @@
+"""
+Background export jobs for TimeToShopping_bot
+Runs exports on a bounded worker pool with deduplication, progress and caching
+"""
+
+import asyncio
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from aiogram.types import BufferedInputFile
+
+from config import config
+from logging_config import logger
+from bot.utils.export_parts import ExportPart, split_bytes
+
+# Builder signature: async def builder(progress, **params) -> ExportArtifact
+ProgressCallback = Callable[[float], None]
+ExportBuilder = Callable[..., Awaitable["ExportArtifact"]]
+JobListener = Callable[["ExportJob"], Awaitable[None]]
+
+class ExportQueueFull(Exception):
+    """Raised when no more export jobs can be queued"""
+
+class ExportArtifact:
+    """Finished export kept in memory as one or more file parts"""
+
+    def __init__(self, parts: List[ExportPart], rows: int = 0, raw_size: Optional[int] = None):
+        self.parts = parts
+        self.rows = rows
+        self.raw_size = raw_size if raw_size is not None else self.size
+        self.created_at = datetime.now()
+        self.meta: Dict[str, Any] = {}  # Builder-specific details (e.g. delta cursor)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, filename: str, rows: int = 0,
+                   part_size: Optional[int] = None) -> "ExportArtifact":
+        """Create artifact from a single encoded file, splitting it when too large"""
+        return cls(split_bytes(data, filename, part_size or config.EXPORT_PART_SIZE), rows=rows)
+
+    @property
+    def size(self) -> int:
+        """Total size of all parts in bytes"""
+        return sum(part.size for part in self.parts)
+
+    @property
+    def filename(self) -> str:
+        return self.parts[0].filename if self.parts else ""
+
+    def as_input_files(self) -> List[BufferedInputFile]:
+        """Create fresh Telegram input files for all parts"""
+        return [BufferedInputFile(part.data, filename=part.filename) for part in self.parts]
+
+class ExportJob:
+    """Single export job shared by every requester with the same parameters"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: int, key: Tuple, kind: str, builder: ExportBuilder, params: Dict[str, Any]):
+        self.id = job_id
+        self.key = key
+        self.kind = kind
+        self.builder = builder
+        self.params = params
+        self.status = self.QUEUED
+        self.progress = 0.0
+        self.cached = False
+        self.cacheable = True
+        self.artifact: Optional[ExportArtifact] = None
+        self.error: Optional[str] = None
+        self.created_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._listeners: List[JobListener] = []
+        self._done = asyncio.get_running_loop().create_future()
+        self._last_notified = 0.0
+        self._last_notified_progress = 0.0
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def add_listener(self, listener: JobListener):
+        """Subscribe to progress updates of this job"""
+        self._listeners.append(listener)
+
+    async def wait(self) -> ExportArtifact:
+        """Wait until the job finishes and return its artifact"""
+        return await asyncio.shield(self._done)
+
+    def _finish(self, artifact: Optional[ExportArtifact] = None, error: Optional[BaseException] = None):
+        self.finished_at = time.monotonic()
+        if error is None:
+            self.status = self.DONE
+            self.progress = 1.0
+            self.artifact = artifact
+            if not self._done.done():
+                self._done.set_result(artifact)
+        else:
+            self.status = self.FAILED
+            self.error = str(error)
+            if not self._done.done():
+                self._done.set_exception(error)
+                # Avoid "exception was never retrieved" when nobody waits
+                self._done.exception()
+
+class ExportJobManager:
+    """Deduplicating export queue served by a fixed number of workers"""
+
+    # Telegram allows roughly one edit per second per message
+    PROGRESS_MIN_INTERVAL = 1.5
+    PROGRESS_MIN_STEP = 0.05
+
+    def __init__(self, max_workers: int = 2, cache_ttl: int = 300, max_queue: int = 20):
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._active: Dict[Tuple, ExportJob] = {}
+        self._cache: Dict[Tuple, Tuple[float, ExportArtifact]] = {}
+        self._background: set = set()
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    def make_key(kind: str, params: Dict[str, Any]) -> Tuple:
+        """Build deduplication key from export kind and parameters"""
+        return (kind,) + tuple(sorted(params.items()))
+
+    def _ensure_workers(self):
+        """Start worker tasks on first use (requires a running loop)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.max_workers:
+            worker_no = len(self._workers) + 1
+            self._workers.append(
+                asyncio.create_task(self._worker(), name=f"export-worker-{worker_no}")
+            )
+
+    def submit(self, kind: str, builder: ExportBuilder, listener: Optional[JobListener] = None,
+               cacheable: bool = True, **params) -> ExportJob:
+        """
+        Submit export job or join an identical one
+
+        Args:
+            kind: Export kind used for deduplication and logging
+            builder: Coroutine function producing ExportArtifact
+            listener: Optional coroutine called on progress updates
+            cacheable: Keep finished artifact for cache_ttl seconds
+            **params: Builder parameters (must be hashable)
+
+        Returns:
+            ExportJob (possibly already finished when served from cache)
+
+        Raises:
+            ExportQueueFull: max_queue jobs are already waiting
+        """
+        key = self.make_key(kind, params)
+
+        # Serve from cache
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            job = ExportJob(next(self._ids), key, kind, builder, params)
+            job.cached = True
+            job._finish(artifact=cached[1])
+            logger.debug(f"Export {kind} served from cache")
+            return job
+        self._cache.pop(key, None)
+
+        # Join running or queued job with the same parameters
+        job = self._active.get(key)
+        if job:
+            if listener:
+                job.add_listener(listener)
+            logger.debug(f"Export {kind} joined job #{job.id}")
+            return job
+
+        self._ensure_workers()
+        job = ExportJob(next(self._ids), key, kind, builder, params)
+        job.cacheable = cacheable
+        if listener:
+            job.add_listener(listener)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning(f"Export job ({kind}) rejected: {self.max_queue} jobs already queued")
+            raise ExportQueueFull(f"{self.max_queue} export jobs already queued")
+        self._active[key] = job
+        logger.info(f"Export job #{job.id} ({kind}) queued, {self._queue.qsize()} in queue")
+        return job
+
+    def run_in_background(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """Run delivery coroutine without blocking the update handler"""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _worker(self):
+        """Process queued jobs one at a time"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: ExportJob):
+        job.status = ExportJob.RUNNING
+        job.started_at = time.monotonic()
+        self._mark_notified(job)
+        await self._notify(job)
+
+        def progress(value: float):
+            job.progress = max(job.progress, min(value, 1.0))
+            if self._should_notify(job):
+                self._mark_notified(job)
+                self.run_in_background(self._notify(job))
+
+        try:
+            artifact = await job.builder(progress, **job.params)
+            if job.cacheable:
+                self._cache[job.key] = (time.monotonic() + self.cache_ttl, artifact)
+            job._finish(artifact=artifact)
+            logger.info(
+                f"Export job #{job.id} ({job.kind}) finished in "
+                f"{job.finished_at - job.started_at:.2f}s: {artifact.rows} rows, {artifact.size} bytes"
+            )
+        except Exception as e:
+            job._finish(error=e)
+            logger.error(f"Export job #{job.id} ({job.kind}) failed: {e}")
+        finally:
+            self._active.pop(job.key, None)
+            self._purge_cache()
+
+    def _should_notify(self, job: ExportJob) -> bool:
+        now = time.monotonic()
+        return (
+            now - job._last_notified >= self.PROGRESS_MIN_INTERVAL
+            and job.progress - job._last_notified_progress >= self.PROGRESS_MIN_STEP
+        )
+
+    @staticmethod
+    def _mark_notified(job: ExportJob):
+        job._last_notified = time.monotonic()
+        job._last_notified_progress = job.progress
+
+    async def _notify(self, job: ExportJob):
+        for listener in list(job._listeners):
+            try:
+                await listener(job)
+            except Exception as e:
+                logger.debug(f"Export progress listener failed: {e}")
+
+    def _purge_cache(self):
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[key]
+
+    def clear_cache(self):
+        """Drop all cached artifacts"""
+        self._cache.clear()
+
+    async def stop(self):
+        """Cancel workers and pending deliveries"""
+        for task in self._workers + list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._background, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("Export workers stopped")
+
+def make_message_progress_listener(message, title: str) -> JobListener:
+    """
+    Create listener that reports job progress by editing a message
+
+    Args:
+        message: Telegram message to edit
+        title: Text shown above the progress bar
+
+    Returns:
+        Listener coroutine function
+    """
+    async def listener(job: ExportJob):
+        if job.is_finished:
+            return
+        filled = int(job.progress * 10)
+        bar = "▓" * filled + "░" * (10 - filled)
+        state = "⏳ Հերթում է..." if job.status == ExportJob.QUEUED else f"{bar} {job.progress * 100:.0f}%"
+        await message.edit_text(f"{title}\n\n{state}")
+
+    return listener
+
+# Global export job manager instance
+export_job_manager = ExportJobManager(
+    max_workers=config.EXPORT_WORKERS,
+    cache_ttl=config.EXPORT_CACHE_TTL
+)
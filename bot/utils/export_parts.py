@@ -0,0 +1,179 @@
+"""
+Export packaging utilities for TimeToShopping_bot
+Streams export data through gzip/zip compression and splits it into
+numbered parts that fit under the Telegram upload limit
+"""
+
+import io
+import zipfile
+import zlib
+from typing import List, Optional
+
+from logging_config import logger
+
+SUPPORTED_COMPRESSION = ("gzip", "zip", "none")
+
+# Extra room reserved for data still buffered inside the zip compressor
+ZIP_BUFFER_MARGIN = 256 * 1024
+
+class ExportPart:
+    """Single file of a (possibly split) export"""
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self.data = data
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+def _part_name(base_name: str, extension: str, part_no: Optional[int]) -> str:
+    if part_no is None:
+        return f"{base_name}{extension}"
+    return f"{base_name}.part{part_no:02d}{extension}"
+
+def _rename_single(parts: List[ExportPart], base_name: str, extension: str):
+    """Drop the part number when the export fits into one file"""
+    if len(parts) == 1:
+        parts[0].filename = _part_name(base_name, extension, None)
+
+class PartWriter:
+    """
+    Streaming compressed writer that starts a new part before the budget is exceeded
+
+    Data must be written in record-aligned chunks (e.g. whole CSV rows) so
+    every part stays independently readable. The header is repeated at the
+    start of each part.
+    """
+
+    def __init__(self, base_name: str, extension: str, part_size: int,
+                 compression: str = "gzip", header: bytes = b""):
+        """
+        Args:
+            base_name: File name without extension
+            extension: Uncompressed file extension (e.g. ".csv")
+            part_size: Maximum size of a single part in bytes
+            compression: gzip, zip or none
+            header: Bytes written at the start of every part
+        """
+        if compression not in SUPPORTED_COMPRESSION:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if part_size <= len(header) + 1024:
+            raise ValueError(f"Part size too small: {part_size}")
+
+        self.base_name = base_name
+        self.extension = extension
+        self.part_size = part_size
+        self.compression = compression
+        self.header = header
+        self.raw_size = 0
+        self.parts: List[ExportPart] = []
+
+        self._buffer: Optional[io.BytesIO] = None
+        self._compressor = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._member = None
+        self._part_has_data = False
+
+    @property
+    def _output_extension(self) -> str:
+        if self.compression == "gzip":
+            return f"{self.extension}.gz"
+        if self.compression == "zip":
+            return ".zip"
+        return self.extension
+
+    def _open_part(self):
+        part_no = len(self.parts) + 1
+        self._buffer = io.BytesIO()
+
+        if self.compression == "gzip":
+            # wbits=31 produces a gzip container
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif self.compression == "zip":
+            self._zip = zipfile.ZipFile(self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+            self._member = self._zip.open(
+                _part_name(self.base_name, self.extension, part_no), "w", force_zip64=True
+            )
+
+        self._part_has_data = False
+        if self.header:
+            self._write_raw(self.header)
+
+    def _write_raw(self, data: bytes):
+        if self.compression == "gzip":
+            self._buffer.write(self._compressor.compress(data))
+            # Sync flush keeps the buffer size an exact measure of the part size
+            self._buffer.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        elif self.compression == "zip":
+            self._member.write(data)
+        else:
+            self._buffer.write(data)
+
+    def _current_size(self) -> int:
+        size = self._buffer.tell()
+        if self.compression == "zip":
+            size += ZIP_BUFFER_MARGIN
+        return size
+
+    def _close_part(self):
+        if self.compression == "gzip":
+            self._buffer.write(self._compressor.flush(zlib.Z_FINISH))
+        elif self.compression == "zip":
+            self._member.close()
+            self._zip.close()
+
+        part_no = len(self.parts) + 1
+        self.parts.append(ExportPart(
+            _part_name(self.base_name, self._output_extension, part_no),
+            self._buffer.getvalue()
+        ))
+        self._buffer = None
+
+    def write(self, chunk: bytes):
+        """Write record-aligned chunk, rolling over to a new part when needed"""
+        if not chunk:
+            return
+        if self._buffer is None:
+            self._open_part()
+        # Compressed output never exceeds input by more than a few bytes,
+        # so the raw chunk size is a safe upper bound for its growth
+        elif self._part_has_data and self._current_size() + len(chunk) + 64 > self.part_size:
+            self._close_part()
+            self._open_part()
+
+        self._write_raw(chunk)
+        self._part_has_data = True
+        self.raw_size += len(chunk)
+
+    def close(self) -> List[ExportPart]:
+        """Finish the last part and return all parts"""
+        if self._buffer is None:
+            self._open_part()
+        self._close_part()
+        _rename_single(self.parts, self.base_name, self._output_extension)
+
+        oversized = [part.filename for part in self.parts if part.size > self.part_size]
+        if oversized:
+            logger.warning(f"Export parts above budget (single chunk too large): {oversized}")
+        return self.parts
+
+def split_bytes(data: bytes, filename: str, part_size: int) -> List[ExportPart]:
+    """
+    Split an already encoded file (e.g. Parquet) into raw numbered parts
+
+    Args:
+        data: File content
+        filename: Original file name
+        part_size: Maximum part size in bytes
+
+    Returns:
+        List of parts; concatenate them in order to restore the file
+    """
+    if len(data) <= part_size:
+        return [ExportPart(filename, data)]
+
+    return [
+        ExportPart(f"{filename}.{index:03d}", data[offset:offset + part_size])
+        for index, offset in enumerate(range(0, len(data), part_size), 1)
+    ]
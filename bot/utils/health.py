@@ -0,0 +1,170 @@
+"""
+Health monitoring for TimeToShopping_bot
+Background dependency probes with cached results for /ready and /live
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import config
+from logging_config import logger
+from metrics import metrics
+
+dependency_up = metrics.gauge(
+    "bot_dependency_up", "Result of the last dependency probe (1 ok, 0 failed)", ("check",)
+)
+
+class CheckResult:
+    """Cached result of a single dependency probe"""
+
+    def __init__(self, ok: bool, detail: str = "", duration: float = 0.0):
+        self.ok = ok
+        self.detail = detail
+        self.duration = duration
+        self.checked_at = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "detail": self.detail,
+            "duration_ms": round(self.duration * 1000, 1),
+            "age_s": round(time.monotonic() - self.checked_at, 1),
+        }
+
+class HealthMonitor:
+    """
+    Runs dependency probes on an interval and caches their results
+
+    Probe endpoints only read the cache, so frequent orchestrator checks
+    never reach the database or the Bot API.
+    """
+
+    def __init__(self, interval: float = 15.0, timeout: float = 5.0):
+        """
+        Args:
+            interval: Seconds between probe rounds
+            timeout: Per-probe timeout in seconds
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self.bot = None
+        self.results: Dict[str, CheckResult] = {}
+        self.started_at = time.monotonic()
+        self.last_round: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stale_after(self) -> float:
+        """Age after which cached results no longer count"""
+        return self.interval * 3 + self.timeout
+
+    def start(self, bot=None):
+        """Start background probing"""
+        self.bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Health monitor started (interval {self.interval}s)")
+
+    async def stop(self):
+        """Stop background probing"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.run_checks()
+            await asyncio.sleep(self.interval)
+
+    async def run_checks(self):
+        """Run all probes concurrently and update the cache"""
+        checks: Dict[str, Callable[[], Awaitable[str]]] = {
+            "database": self._check_database,
+            "scheduler": self._check_scheduler,
+            "telegram": self._check_telegram,
+        }
+        results = await asyncio.gather(*(self._probe(check) for check in checks.values()))
+
+        for name, result in zip(checks, results):
+            previous = self.results.get(name)
+            if previous and previous.ok != result.ok:
+                log = logger.info if result.ok else logger.warning
+                log(f"Health check {name}: {'ok' if result.ok else 'failed'} {result.detail}")
+            self.results[name] = result
+            dependency_up.set(1 if result.ok else 0, check=name)
+
+        self.last_round = time.monotonic()
+
+    async def _probe(self, check: Callable[[], Awaitable[str]]) -> CheckResult:
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(check(), timeout=self.timeout)
+            return CheckResult(True, detail, time.perf_counter() - started)
+        except asyncio.TimeoutError:
+            return CheckResult(False, f"timeout after {self.timeout}s", time.perf_counter() - started)
+        except Exception as e:
+            return CheckResult(False, str(e), time.perf_counter() - started)
+
+    async def _check_database(self) -> str:
+        from bot.database import check_database_health
+
+        health = await check_database_health()
+        if health["status"] != "healthy":
+            raise RuntimeError(health.get("error", "unhealthy"))
+        if not health["all_tables_exist"]:
+            missing = [name for name, exists in health["tables"].items() if not exists]
+            raise RuntimeError(f"missing tables: {', '.join(missing)}")
+        return "ok"
+
+    async def _check_scheduler(self) -> str:
+        from bot.utils.scheduler import scheduler_manager
+
+        if not scheduler_manager.scheduler.running:
+            raise RuntimeError("scheduler is not running")
+        return f"{len(scheduler_manager.scheduler.get_jobs())} jobs"
+
+    async def _check_telegram(self) -> str:
+        if not self.bot:
+            raise RuntimeError("bot not started")
+        me = await self.bot.get_me()
+        return f"@{me.username}"
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Readiness from cached probe results
+
+        Returns:
+            Dictionary with overall "ready" flag and per-check details
+        """
+        now = time.monotonic()
+        fresh = self.last_round is not None and now - self.last_round <= self.stale_after
+        ready = fresh and bool(self.results) and all(result.ok for result in self.results.values())
+        return {
+            "ready": ready,
+            "stale": not fresh,
+            "checks": {name: result.to_dict() for name, result in self.results.items()},
+        }
+
+    def liveness(self) -> Dict[str, Any]:
+        """
+        Liveness of the process
+
+        The event loop answered the request; the probe loop must also still be
+        running once started, otherwise the cached readiness would freeze.
+        """
+        monitor_alive = self._task is None or not self._task.done()
+        return {
+            "alive": monitor_alive,
+            "uptime_s": round(time.monotonic() - self.started_at, 1),
+        }
+
+# Global health monitor instance
+health_monitor = HealthMonitor(
+    interval=config.HEALTH_PROBE_INTERVAL,
+    timeout=config.HEALTH_PROBE_TIMEOUT
+)
@@ -0,0 +1,152 @@
+"""
+Event loop monitoring for TimeToShopping_bot
+Loop lag sampling and a watchdog that logs the stack of blocking code
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Optional
+
+from config import config
+from logging_config import logger
+from metrics import metrics
+
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+
+# Recent samples used for percentiles (about 8 minutes at 0.5s interval)
+LAG_WINDOW = 1000
+
+# Percentile gauges are refreshed every N samples
+QUANTILE_REFRESH = 10
+
+loop_lag = metrics.histogram(
+    "bot_event_loop_lag_seconds", "Delay of a scheduled loop wake-up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+loop_lag_quantile = metrics.gauge(
+    "bot_event_loop_lag_quantile_seconds", "Event loop lag percentiles over recent samples", ("quantile",)
+)
+loop_stalls_total = metrics.counter(
+    "bot_event_loop_stalls_total", "Loop steps blocked longer than the threshold"
+)
+
+def _quantile(sorted_values, q: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class LoopMonitor:
+    """
+    Measures event loop responsiveness
+
+    A sampler task sleeps for a fixed interval and records how late it wakes
+    up. A watchdog thread watches the sampler's heartbeat; when the loop is
+    stuck in one step longer than the threshold it captures the loop thread's
+    current stack, which points at the blocking callback or coroutine.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25):
+        """
+        Args:
+            interval: Seconds between lag samples
+            threshold: Blocking time in seconds that triggers a stack dump
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: Deque[float] = deque(maxlen=LAG_WINDOW)
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+
+    def start(self):
+        """Start sampler task and watchdog thread on the running loop"""
+        if self._task and not self._task.done():
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+        logger.info(f"Loop monitor started (interval {self.interval}s, threshold {self.threshold}s)")
+
+    async def stop(self):
+        """Stop sampler and watchdog"""
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=self.threshold * 2)
+            self._watchdog = None
+
+    async def _sample(self):
+        count = 0
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+
+            lag = max(0.0, now - expected)
+            self.samples.append(lag)
+            loop_lag.observe(lag)
+
+            count += 1
+            if count % QUANTILE_REFRESH == 0:
+                self._publish_quantiles()
+
+    def _publish_quantiles(self):
+        values = sorted(self.samples)
+        if not values:
+            return
+        for q in LAG_QUANTILES:
+            loop_lag_quantile.set(_quantile(values, q), quantile=str(q))
+
+    def _watch(self):
+        """Watchdog thread: dump the loop thread's stack while it is blocked"""
+        check_every = self.threshold / 2
+        reported_beat = None
+
+        while not self._stop_event.wait(check_every):
+            beat = self._heartbeat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.threshold or beat == reported_beat:
+                continue
+
+            # Report each stall once, while the blocking code is still on the stack
+            reported_beat = beat
+            loop_stalls_total.inc()
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<no frame>"
+            logger.warning(
+                f"Event loop blocked for {blocked_for:.3f}s+ (threshold {self.threshold}s), "
+                f"loop thread stack:\n{stack}"
+            )
+
+    def stats(self) -> dict:
+        """Current lag percentiles in milliseconds"""
+        values = sorted(self.samples)
+        if not values:
+            return {}
+        return {f"p{int(q * 100)}": round(_quantile(values, q) * 1000, 1) for q in LAG_QUANTILES}
+
+# Global loop monitor instance
+loop_monitor = LoopMonitor(
+    interval=config.LOOP_MONITOR_INTERVAL,
+    threshold=config.LOOP_SLOW_THRESHOLD
+)
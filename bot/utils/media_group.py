@@ -0,0 +1,72 @@
+"""
+Media group collection for TimeToShopping_bot
+Coalesces album messages that Telegram delivers as separate updates
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from aiogram.types import Message
+
+# Telegram albums hold 2-10 items
+MAX_ALBUM_SIZE = 10
+
+class MediaGroupCollector:
+    """
+    Debounce buffer for media groups
+
+    Each album item arrives as its own update with a shared media_group_id.
+    Every handler call adds its message and waits; only the call whose
+    message was the last to arrive before the quiet period gets the whole
+    group, the others get None.
+    """
+
+    def __init__(self, delay: float = 1.0):
+        """
+        Args:
+            delay: Quiet period in seconds that ends a group
+        """
+        self.delay = delay
+        self._groups: Dict[str, List[Message]] = {}
+
+    async def collect(self, message: Message) -> Optional[List[Message]]:
+        """
+        Add album message and wait for the rest of its group
+
+        Args:
+            message: Message with media_group_id
+
+        Returns:
+            Group messages in send order, or None for all but one caller
+        """
+        group_id = message.media_group_id
+        messages = self._groups.setdefault(group_id, [])
+        messages.append(message)
+        position = len(messages)
+
+        await asyncio.sleep(self.delay)
+
+        # A later item arrived during our wait; its handler finishes the group
+        if len(messages) != position or self._groups.get(group_id) is not messages:
+            return None
+
+        del self._groups[group_id]
+        return sorted(messages, key=lambda item: item.message_id)[:MAX_ALBUM_SIZE]
+
+def album_item(message: Message) -> Optional[Dict[str, Any]]:
+    """
+    Media of one album message
+
+    Returns:
+        {"media_type", "file_id", "file_unique_id"} or None for unsupported content
+    """
+    if message.photo:
+        media = message.photo[-1]  # Largest photo size
+        return {"media_type": "photo", "file_id": media.file_id, "file_unique_id": media.file_unique_id}
+    if message.video:
+        media = message.video
+        return {"media_type": "video", "file_id": media.file_id, "file_unique_id": media.file_unique_id}
+    return None
+
+# Global media group collector instance
+media_group_collector = MediaGroupCollector()
@@ -0,0 +1,215 @@
+"""
+Bulk post import for TimeToShopping_bot
+Streams CSV / JSON documents into validated post rows with per-row errors
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bot.database import validate_post_data
+
+# Columns read from import documents; anything else is ignored
+IMPORT_COLUMNS = ("title", "keywords", "text", "post_format", "media_type", "file_id", "publish_at")
+
+# Accepted publish_at formats besides ISO 8601
+DATETIME_FORMATS = ("%Y-%m-%d %H:%M", "%d.%m.%Y %H:%M")
+
+class ImportReport:
+    """Outcome of one import: created post IDs and rejected rows"""
+
+    def __init__(self):
+        self.rows = 0
+        self.post_ids: List[int] = []
+        self.scheduled = 0
+        self.errors: List[Tuple[int, str]] = []  # (row number, message)
+
+    def reject(self, row_number: int, messages: Iterable[str]):
+        self.errors.append((row_number, "; ".join(messages)))
+
+    @property
+    def imported(self) -> int:
+        return len(self.post_ids)
+
+def iter_document_rows(stream: IO[bytes], filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Iterate raw rows of an import document
+
+    CSV and JSON Lines are read line by line; a .json document may be an
+    array of objects (loaded at once) or JSON Lines.
+
+    Args:
+        stream: Binary document stream
+        filename: Document name, its extension selects the parser
+
+    Yields:
+        (row number, raw row) - row numbers are 1-based data rows
+
+    Raises:
+        ValueError: Unsupported extension or malformed document
+    """
+    name = (filename or "").lower()
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if name.endswith(".csv"):
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(text, dialect=dialect)
+        if not reader.fieldnames or "text" not in [field.strip() for field in reader.fieldnames]:
+            raise ValueError("CSV header must contain a 'text' column")
+        for number, row in enumerate(reader, 1):
+            yield number, {(key or "").strip(): value for key, value in row.items()}
+        return
+
+    if not name.endswith((".json", ".jsonl")):
+        raise ValueError("Only .csv, .json and .jsonl documents are supported")
+
+    first = text.read(1)
+    while first and first.isspace():
+        first = text.read(1)
+
+    if first == "[":
+        try:
+            rows = json.loads(first + text.read())
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        for number, row in enumerate(rows, 1):
+            yield number, row
+        return
+
+    # JSON Lines: one object per line, blank lines skipped
+    number = 0
+    line = first + text.readline()
+    while line:
+        if line.strip():
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, {"__error__": f"invalid JSON ({e.msg})"}
+        line = text.readline()
+
+def parse_publish_at(value, tz=None) -> Optional[datetime]:
+    """
+    Parse a publish time to naive local time (like Post.publish_at)
+
+    Args:
+        value: "YYYY-MM-DD HH:MM", "DD.MM.YYYY HH:MM" or ISO 8601
+        tz: Local timezone; aware ISO values are converted into it
+
+    Returns:
+        Naive datetime or None for empty values
+
+    Raises:
+        ValueError: Unrecognised format
+    """
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        if tz is not None:
+            moment = moment.astimezone(tz)
+        moment = moment.replace(tzinfo=None)
+    return moment
+
+def normalize_row(raw, schedule: bool = False, now: Optional[datetime] = None,
+                  tz=None) -> Tuple[Optional[Dict], List[str]]:
+    """
+    Turn a raw document row into post column values
+
+    Args:
+        raw: Row from iter_document_rows
+        schedule: Rows with publish_at become scheduled posts; otherwise all rows are drafts
+        now: Current local time, scheduled rows must be in the future
+        tz: Local timezone for aware publish_at values
+
+    Returns:
+        Tuple of (post data or None, error messages)
+    """
+    if not isinstance(raw, dict):
+        return None, ["row is not an object"]
+    if "__error__" in raw:
+        return None, [raw["__error__"]]
+
+    post_data = {}
+    for column in IMPORT_COLUMNS:
+        value = raw.get(column)
+        if isinstance(value, str):
+            value = value.strip()
+        post_data[column] = value if value not in ("", None) else None
+
+    errors = []
+    try:
+        publish_at = parse_publish_at(post_data.pop("publish_at"), tz)
+    except (TypeError, ValueError):
+        publish_at = None
+        errors.append("Invalid publish_at (use YYYY-MM-DD HH:MM)")
+
+    post_data["status"] = "draft"
+    if schedule and publish_at is not None:
+        if now is not None and publish_at <= now:
+            errors.append("publish_at is in the past")
+        post_data["status"] = "scheduled"
+        post_data["publish_at"] = publish_at
+
+    if post_data["text"] is not None and not isinstance(post_data["text"], str):
+        errors.append("text must be a string")
+        return None, errors
+
+    if post_data["title"] is None and post_data["keywords"]:
+        post_data["title"] = str(post_data["keywords"])[:100]
+
+    is_valid, validation_errors = validate_post_data({**post_data, "text": post_data["text"] or ""})
+    errors.extend(validation_errors)
+    if not is_valid or errors:
+        return None, errors
+    return post_data, []
+
+def validated_batches(rows: Iterable[Tuple[int, dict]], report: ImportReport, batch_size: int,
+                      max_rows: Optional[int] = None, **normalize_kwargs) -> Iterator[List[Dict]]:
+    """
+    Validate streamed rows and group the valid ones into insert batches
+
+    Args:
+        rows: (row number, raw row) pairs
+        report: Collects row count and rejected rows
+        batch_size: Rows per yielded batch
+        max_rows: Stop reading after this many rows (the rest is reported once)
+        normalize_kwargs: Passed to normalize_row
+
+    Yields:
+        Lists of post data dicts
+    """
+    batch = []
+    for number, raw in rows:
+        if max_rows is not None and report.rows >= max_rows:
+            report.reject(number, [f"row limit {max_rows} reached, the rest of the document was skipped"])
+            break
+        report.rows += 1
+
+        post_data, errors = normalize_row(raw, **normalize_kwargs)
+        if errors:
+            report.reject(number, errors)
+            continue
+
+        batch.append(post_data)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
@@ -0,0 +1,78 @@
+"""
+Recurring post helpers for TimeToShopping_bot
+Cron occurrence expansion and keyword rotation for post templates
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from apscheduler.triggers.cron import CronTrigger
+
+# Occurrences materialized per template in one run, bounds AI calls
+MAX_OCCURRENCES_PER_RUN = 3
+
+def parse_cron(expression: str, tz) -> CronTrigger:
+    """
+    Parse a 5-field crontab expression
+
+    Args:
+        expression: "minute hour day month day_of_week", e.g. "0 10 * * fri"
+        tz: Timezone the expression is evaluated in
+
+    Returns:
+        CronTrigger
+
+    Raises:
+        ValueError: Invalid expression
+    """
+    return CronTrigger.from_crontab(expression.strip(), timezone=tz)
+
+def occurrences(expression: str, tz, start: datetime, end: datetime,
+                limit: int = MAX_OCCURRENCES_PER_RUN) -> List[datetime]:
+    """
+    Occurrences of a cron expression inside a window
+
+    Args:
+        expression: Crontab expression
+        tz: Timezone of the expression
+        start: Window start (aware, inclusive)
+        end: Window end (aware, inclusive)
+        limit: Maximum occurrences returned
+
+    Returns:
+        Aware datetimes in ascending order
+    """
+    trigger = parse_cron(expression, tz)
+    result = []
+    moment = start
+    while len(result) < limit:
+        fire_time = trigger.get_next_fire_time(None, moment)
+        if fire_time is None or fire_time > end:
+            break
+        result.append(fire_time)
+        moment = fire_time + timedelta(seconds=1)
+    return result
+
+def next_occurrence(expression: str, tz, after: datetime) -> Optional[datetime]:
+    """Next occurrence at or after a moment (None when the expression never fires again)"""
+    return parse_cron(expression, tz).get_next_fire_time(None, after)
+
+def split_keyword_pool(raw: str) -> List[str]:
+    """Split "kw1; kw2" or multi-line keyword pools into keyword sets"""
+    return [item.strip() for item in raw.replace("\n", ";").split(";") if item.strip()]
+
+def pick_keywords(pool: str, index: int) -> str:
+    """
+    Keyword set of an occurrence; sets rotate so consecutive posts differ
+
+    Args:
+        pool: Keyword sets separated by newlines or semicolons
+        index: Occurrence number of the template
+
+    Returns:
+        Keywords for the AI prompt
+    """
+    sets = split_keyword_pool(pool)
+    if not sets:
+        return ""
+    return sets[index % len(sets)]
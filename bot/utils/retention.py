@@ -0,0 +1,147 @@
+"""
+Analytics retention for TimeToShopping_bot
+Raw events past the retention window are rolled into daily aggregates,
+archived to compressed per-month files and deleted in short chunks
+"""
+
+import asyncio
+import gzip
+import json
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from bot.database.db import db
+from bot.utils.cohorts import cohort_tracker
+from config import config
+from logging_config import logger
+
+# Pause between chunks so other writers get the database lock
+CHUNK_PAUSE_SECONDS = 0.05
+
+ARCHIVE_FIELDS = ("id", "post_id", "action", "user_id", "created_at", "extra_data", "channel_id")
+
+def rollup_counts(rows: Iterable[Tuple]) -> Dict[Tuple[date, int, str, int], int]:
+    """
+    Count raw events per (day, post, action, channel)
+
+    Args:
+        rows: Output of Database.get_expired_analytics
+
+    Returns:
+        {(UTC day, post_id, action, channel_id or 0): events}
+    """
+    counts = Counter()
+    for _, post_id, action, _, created_at, _, channel_id in rows:
+        counts[(created_at.date(), post_id, action, channel_id or 0)] += 1
+    return dict(counts)
+
+def archive_path(archive_dir: str, month: str) -> Path:
+    """Archive file of a month ("YYYY-MM")"""
+    return Path(archive_dir) / f"analytics-{month}.jsonl.gz"
+
+def archive_events(rows: Iterable[Tuple], archive_dir: str) -> Dict[str, int]:
+    """
+    Append raw events to per-month gzip JSON Lines files
+
+    Every call appends one gzip member per month, which gzip readers
+    concatenate transparently. Lines carry the analytics ID, so a chunk
+    archived again after a failed delete can be deduplicated.
+
+    Returns:
+        {month: events written}
+    """
+    months: Dict[str, list] = {}
+    for row in rows:
+        record = dict(zip(ARCHIVE_FIELDS, row))
+        record["created_at"] = record["created_at"].isoformat()
+        months.setdefault(record["created_at"][:7], []).append(record)
+
+    Path(archive_dir).mkdir(parents=True, exist_ok=True)
+    for month, records in months.items():
+        with gzip.open(archive_path(archive_dir, month), "at", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    return {month: len(records) for month, records in months.items()}
+
+def read_archive(path) -> Iterable[Dict]:
+    """Stream events back from an archive file"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class RetentionManager:
+    """
+    Tiered analytics storage
+
+    Each chunk is archived first and then rolled up and deleted in one short
+    transaction, so a failure can at worst archive a chunk twice, never lose
+    or double-count it. Events past the lowest delta export cursor are kept
+    raw until every consumer has pulled them.
+    """
+
+    def __init__(self, days: int, chunk_size: int, archive_dir: str):
+        """
+        Args:
+            days: Raw events are kept this many days (0 disables retention)
+            chunk_size: Events per transaction
+            archive_dir: Directory of the per-month archive files
+        """
+        self.days = days
+        self.chunk_size = chunk_size
+        self.archive_dir = archive_dir
+        self._lock = asyncio.Lock()
+
+    def cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Start of the oldest UTC day kept raw; whole days move to the daily tier"""
+        day = (now or datetime.utcnow()).date() - timedelta(days=self.days)
+        return datetime.combine(day, datetime.min.time())
+
+    async def run(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Move expired raw events to the daily and archive tiers
+
+        Returns:
+            Stats dict with events, chunks and per-month archived counts
+        """
+        stats = {"events": 0, "chunks": 0, "months": Counter()}
+        if self.days <= 0:
+            return stats
+
+        async with self._lock:
+            before = self.cutoff(now)
+            # Fold pending clicks into the cohort tables before raw rows go;
+            # clicks logged afterwards are far newer than the cutoff
+            await cohort_tracker.update()
+            # Delta exports page analytics by ID, so events a consumer has not
+            # pulled yet stay raw until its cursor passes them
+            max_id = await db.get_min_export_cursor("analytics")
+
+            after_id = 0
+            while True:
+                rows = await db.get_expired_analytics(before, after_id, limit=self.chunk_size, max_id=max_id)
+                if not rows:
+                    break
+
+                stats["months"].update(archive_events(rows, self.archive_dir))
+                last_id = rows[-1][0]
+                stats["events"] += await db.roll_up_analytics(rollup_counts(rows), before, after_id, last_id)
+                stats["chunks"] += 1
+                after_id = last_id
+
+                if len(rows) < self.chunk_size:
+                    break
+                await asyncio.sleep(CHUNK_PAUSE_SECONDS)
+
+        if stats["events"]:
+            logger.info(
+                f"Retention: rolled up {stats['events']} events older than {before.date()} "
+                f"in {stats['chunks']} chunks, archived months {sorted(stats['months'])}"
+            )
+        return stats
+
+# Global retention manager instance
+retention_manager = RetentionManager(
+    config.ANALYTICS_RETENTION_DAYS, config.ANALYTICS_RETENTION_CHUNK, config.ANALYTICS_ARCHIVE_DIR
+)
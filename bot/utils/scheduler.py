@@ -4,17 +4,40 @@ Manages scheduled post publication using APScheduler
 """
 
 import asyncio
+import html
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from pytz import timezone
+from aiogram.types import InputMediaPhoto, InputMediaVideo
 
 from config import config
 from logging_config import logger
+from metrics import scheduler_lag, posts_published_total, publish_failures_total
 from bot.database.db import db
-from bot.database.models import Post
+from bot.database.models import Post, PostTemplate, Channel, PostDelivery
+from bot.utils.sender import telegram_sender
+from bot.utils.recurring import occurrences, pick_keywords
+from bot.utils.slot_allocator import SlotPolicy, allocate_slots
+from bot.utils.cohorts import cohort_tracker
+from bot.utils.retention import retention_manager
+from bot.ai.openai_client import openai_client
+
+class PublishOutcome:
+    """Result of publishing a post to the active channels"""
+    
+    PUBLISHED = "published"  # Every active channel has the post
+    PARTIAL = "partial"  # Some channels have the post, the others ran out of attempts
+    RETRY = "retry"  # At least one failed channel can still be retried
+    EXHAUSTED = "exhausted"  # No channel has the post and no attempts are left
+    
+    @classmethod
+    def is_published(cls, outcome: str) -> bool:
+        """Whether the post reached its final published state"""
+        return outcome in (cls.PUBLISHED, cls.PARTIAL)
 
 class SchedulerManager:
     """Manages scheduled tasks for the bot"""
@@ -24,7 +47,8 @@ class SchedulerManager:
             timezone=timezone(config.SCHEDULER_TIMEZONE)
         )
         self.bot = None  # Will be set when bot is available
-        self.channel_id = config.CHANNEL_CHAT_ID or config.CHANNEL_ID
+        # Serializes the interval job and /add_template runs, so both never read the same watermark
+        self._materialize_lock = asyncio.Lock()
         
     async def start(self):
         """Start the scheduler"""
@@ -39,6 +63,31 @@ class SchedulerManager:
                 replace_existing=True
             )
             
+            # One job expands all recurring templates over the look-ahead window
+            self.scheduler.add_job(
+                self.materialize_recurring_posts,
+                trigger=IntervalTrigger(minutes=config.RECURRING_CHECK_MINUTES),
+                id="materialize_recurring_posts",
+                next_run_time=datetime.now(self.scheduler.timezone),
+                replace_existing=True
+            )
+            
+            # Incremental cohort tables over new CTA clicks
+            self.scheduler.add_job(
+                self.update_cohorts,
+                trigger=IntervalTrigger(minutes=config.COHORT_REFRESH_MINUTES),
+                id="update_cohorts",
+                replace_existing=True
+            )
+            
+            # Nightly analytics retention, outside publishing hours
+            self.scheduler.add_job(
+                self.apply_retention,
+                trigger=CronTrigger(hour=3, minute=30),
+                id="apply_retention",
+                replace_existing=True
+            )
+            
             logger.info("Scheduler started successfully")
             
         except Exception as e:
@@ -77,15 +126,7 @@ class SchedulerManager:
                 "publish_at": publish_at
             })
             
-            # Add job to scheduler
-            job_id = f"publish_post_{post_id}"
-            self.scheduler.add_job(
-                self.publish_scheduled_post,
-                trigger=DateTrigger(run_date=publish_at),
-                args=[post_id],
-                id=job_id,
-                replace_existing=True
-            )
+            self.add_publish_job(post_id, publish_at)
             
             logger.info(f"Post {post_id} scheduled for {publish_at}")
             return True
@@ -94,6 +135,22 @@ class SchedulerManager:
             logger.error(f"Failed to schedule post {post_id}: {e}")
             return False
     
+    def add_publish_job(self, post_id: int, publish_at: datetime):
+        """
+        Register the publication job of a post already stored as scheduled
+        
+        Args:
+            post_id: ID of the post
+            publish_at: When to publish the post
+        """
+        self.scheduler.add_job(
+            self.publish_scheduled_post,
+            trigger=DateTrigger(run_date=publish_at),
+            args=[post_id],
+            id=f"publish_post_{post_id}",
+            replace_existing=True
+        )
+    
     async def cancel_scheduled_post(self, post_id: int) -> bool:
         """Cancel a scheduled post"""
         try:
@@ -131,6 +188,54 @@ class SchedulerManager:
             logger.error(f"Failed to reschedule post {post_id}: {e}")
             return False
     
+    async def bulk_schedule(self, post_ids: List[int], policy: SlotPolicy,
+                            start: Optional[datetime] = None) -> Dict[int, datetime]:
+        """
+        Schedule drafts into the earliest free slots of a policy
+        
+        Args:
+            post_ids: Drafts in publication order; other posts are skipped
+            policy: Slot grid and limits
+            start: Earliest publication time (default: now)
+            
+        Returns:
+            {post_id: publish_at} of the scheduled posts
+            
+        Raises:
+            ValueError: The policy has no room for all drafts
+        """
+        now = datetime.now(self.scheduler.timezone).replace(tzinfo=None)
+        start = max(start or now, now)
+        
+        drafts = await db.get_post_ids_by_status(post_ids, "draft")
+        # Earlier posts still count against the gap and the first hour's cap
+        hour = start.replace(minute=0, second=0, microsecond=0)
+        existing = await db.get_publish_times(min(start - policy.min_gap, hour))
+        slots = allocate_slots(len(drafts), policy, start, existing)
+        
+        # All status updates commit together, jobs follow the committed rows
+        assignments = dict(zip(drafts, slots))
+        scheduled = await db.bulk_schedule(assignments)
+        for post_id in scheduled:
+            self.add_publish_job(post_id, assignments[post_id])
+        
+        logger.info(f"Bulk scheduled {len(scheduled)} of {len(post_ids)} posts with {policy}")
+        return {post_id: assignments[post_id] for post_id in scheduled}
+    
+    async def update_cohorts(self):
+        """Fold new clicks into the cohort tables"""
+        try:
+            await cohort_tracker.update()
+        except Exception as e:
+            logger.error(f"Error updating cohorts: {e}")
+    
+    async def apply_retention(self):
+        """Move expired analytics events to the daily and archive tiers"""
+        try:
+            await retention_manager.run()
+        except Exception as e:
+            logger.error(f"Error applying analytics retention: {e}")
+    
     async def check_scheduled_posts(self):
         """Check for posts that should be published now"""
         try:
@@ -156,17 +261,27 @@ class SchedulerManager:
                 logger.error("Bot instance not available for publishing")
                 return
             
+            if post.publish_at:
+                # publish_at is naive local wall-clock time in the scheduler timezone
+                now = datetime.now(self.scheduler.timezone).replace(tzinfo=None)
+                lag = (now - post.publish_at).total_seconds()
+                scheduler_lag.observe(max(lag, 0.0))
+            
             # Publish the post
-            success = await self.publish_post_to_channel(post)
+            outcome = await self.publish_post_to_channel(post, source="scheduled")
             
-            if success:
+            if PublishOutcome.is_published(outcome):
                 # Update post status
                 await db.update_post(post_id, {"status": "published"})
                 
                 # Log analytics
-                await db.log_analytics(post_id, "publish", metadata="scheduled")
+                await db.log_analytics(post_id, "publish", extra_data="scheduled")
                 
-                logger.info(f"Successfully published scheduled post {post_id}")
+                logger.info(f"Successfully published scheduled post {post_id} ({outcome})")
+            elif outcome == PublishOutcome.EXHAUSTED:
+                # Every channel ran out of attempts, retrying would only log "Giving up" again
+                await db.update_post(post_id, {"status": "failed"})
+                logger.error(f"Giving up on scheduled post {post_id}: no channel accepted it")
             else:
                 logger.error(f"Failed to publish scheduled post {post_id}")
                 
@@ -177,73 +292,259 @@ class SchedulerManager:
         except Exception as e:
             logger.error(f"Error publishing scheduled post {post_id}: {e}")
     
-    async def publish_post_to_channel(self, post: Post) -> bool:
+    async def publish_post_to_channel(self, post: Post, source: str = "manual") -> str:
         """
-        Publish post to Telegram channel
+        Publish post to all active channels concurrently
+        
+        Channels that already have the post are skipped, so calling this again
+        after a partial failure only retries the failed channels. Channels
+        that used up DELIVERY_MAX_ATTEMPTS are not tried again.
         
         Args:
             post: Post object to publish
+            source: Metrics label (manual or scheduled)
             
         Returns:
-            True if published successfully
+            PublishOutcome: PUBLISHED if every active channel has the post,
+            RETRY while a failed channel has attempts left, otherwise PARTIAL
+            (some channels have the post) or EXHAUSTED (none has it)
         """
         try:
             if not self.bot:
                 logger.error("Bot instance not available")
-                return False
-            
-            # Prepare message text
-            message_text = post.text
-            
-            # Add CTA button if needed
-            reply_markup = None
-            if "CTA:" in message_text.upper() or any(cta in message_text for cta in ["Գնել", "Փնտրել", "Իմանալ"]):
-                from bot.keyboards.common import InlineKeyboardBuilder, InlineKeyboardButton
-                builder = InlineKeyboardBuilder()
-                builder.row(
-                    InlineKeyboardButton(
-                        text="🛍️ Փնտրել նմանատիպը",
-                        callback_data=f"cta_click:{post.id}"
-                    )
-                )
-                reply_markup = builder.as_markup()
-            
-            # Send based on media type
-            if post.media_type and post.file_id:
-                if post.media_type == "photo":
-                    await self.bot.send_photo(
-                        chat_id=self.channel_id,
-                        photo=post.file_id,
-                        caption=message_text,
-                        reply_markup=reply_markup
-                    )
-                elif post.media_type == "video":
-                    await self.bot.send_video(
-                        chat_id=self.channel_id,
-                        video=post.file_id,
-                        caption=message_text,
-                        reply_markup=reply_markup
-                    )
-                elif post.media_type == "gif":
-                    await self.bot.send_animation(
-                        chat_id=self.channel_id,
-                        animation=post.file_id,
-                        caption=message_text,
-                        reply_markup=reply_markup
-                    )
-            else:
-                # Text only message
-                await self.bot.send_message(
-                    chat_id=self.channel_id,
-                    text=message_text,
-                    reply_markup=reply_markup
-                )
+                return PublishOutcome.RETRY
             
-            return True
+            channels = await db.get_channels()
+            if not channels:
+                logger.error("No active channels to publish to")
+                return PublishOutcome.RETRY
+            
+            deliveries = await db.get_deliveries(post.id, [channel.id for channel in channels])
+            
+            already_sent = 0
+            pending = []
+            for channel in channels:
+                delivery = deliveries[channel.id]
+                if delivery.status == "sent":
+                    already_sent += 1
+                elif delivery.attempts >= config.DELIVERY_MAX_ATTEMPTS:
+                    logger.warning(f"Giving up on post {post.id} in channel {channel.chat_id} "
+                                   f"after {delivery.attempts} attempts")
+                else:
+                    pending.append((channel, delivery))
+            
+            # Per-chat throttling in the sender lets channels proceed in parallel
+            results = await asyncio.gather(*[
+                self._deliver(post, channel, delivery, source) for channel, delivery in pending
+            ])
             
+            sent = already_sent + sum(results)
+            logger.info(f"Post {post.id} delivered to {sent}/{len(channels)} channels")
+            if sent == len(channels):
+                return PublishOutcome.PUBLISHED
+            if any(
+                not delivered and delivery.attempts + 1 < config.DELIVERY_MAX_ATTEMPTS
+                for delivered, (_, delivery) in zip(results, pending)
+            ):
+                return PublishOutcome.RETRY
+            return PublishOutcome.PARTIAL if sent else PublishOutcome.EXHAUSTED
+            
+        except Exception as e:
+            publish_failures_total.inc(source=source)
+            logger.error(f"Failed to publish post to channels: {e}")
+            return PublishOutcome.RETRY
+    
+    async def _deliver(self, post: Post, channel: Channel, delivery: PostDelivery, source: str) -> bool:
+        """Send post to one channel and store the delivery outcome"""
+        attempts = delivery.attempts + 1
+        try:
+            message = await self._send_post(post, channel)
         except Exception as e:
-            logger.error(f"Failed to publish post to channel: {e}")
+            publish_failures_total.inc(source=source)
+            logger.error(f"Failed to publish post {post.id} to channel {channel.chat_id}: {e}")
+            await db.update_delivery(delivery.id, {
+                "status": "failed",
+                "attempts": attempts,
+                "error": str(e)[:500]
+            })
             return False
+        
+        posts_published_total.inc(source=source)
+        await db.update_delivery(delivery.id, {
+            "status": "sent",
+            "attempts": attempts,
+            "message_id": message.message_id,
+            "sent_at": datetime.utcnow(),
+            "error": None
+        })
+        return True
+    
+    async def _send_post(self, post: Post, channel: Channel):
+        """Send post content to a channel through the rate-limited sender"""
+        message_text = post.text
+        
+        # Add CTA button if needed; clicks are attributed to the channel
+        reply_markup = None
+        if "CTA:" in message_text.upper() or any(cta in message_text for cta in ["Գնել", "Փնտրել", "Իմանալ"]):
+            from bot.keyboards.common import InlineKeyboardBuilder, InlineKeyboardButton
+            builder = InlineKeyboardBuilder()
+            builder.row(
+                InlineKeyboardButton(
+                    text="🛍️ Փնտրել նմանատիպը",
+                    callback_data=f"cta_click:{post.id}:{channel.id}"
+                )
+            )
+            reply_markup = builder.as_markup()
+        
+        if post.media_type == "album":
+            return await self._send_album(post, channel, reply_markup)
+        
+        # Send based on media type
+        if post.media_type and post.file_id:
+            if post.media_type == "photo":
+                return await telegram_sender.send(
+                    self.bot.send_photo, channel.chat_id,
+                    photo=post.file_id, caption=message_text, reply_markup=reply_markup
+                )
+            if post.media_type == "video":
+                return await telegram_sender.send(
+                    self.bot.send_video, channel.chat_id,
+                    video=post.file_id, caption=message_text, reply_markup=reply_markup
+                )
+            if post.media_type == "gif":
+                return await telegram_sender.send(
+                    self.bot.send_animation, channel.chat_id,
+                    animation=post.file_id, caption=message_text, reply_markup=reply_markup
+                )
+        
+        # Text only message
+        return await telegram_sender.send(
+            self.bot.send_message, channel.chat_id,
+            text=message_text, reply_markup=reply_markup
+        )
+    
+    async def _send_album(self, post: Post, channel: Channel, reply_markup=None):
+        """
+        Send album post as a media group
+        
+        Items are sent by stored file_id, so nothing is uploaded again; file_ids
+        returned by Telegram replace the stored ones.
+        
+        Returns:
+            First message of the album
+        """
+        media = await db.get_post_media(post.id)
+        if not media:
+            raise ValueError(f"Album post {post.id} has no media")
+        
+        # Caption of the first item is shown as the album caption
+        input_media = []
+        for index, item in enumerate(media):
+            media_class = InputMediaVideo if item.media_type == "video" else InputMediaPhoto
+            input_media.append(media_class(media=item.file_id, caption=post.text if index == 0 else None))
+        
+        messages = await telegram_sender.send(self.bot.send_media_group, channel.chat_id, media=input_media)
+        
+        refreshed = {}
+        for item, message in zip(media, messages):
+            sent = message.photo[-1] if message.photo else message.video
+            if sent and sent.file_id != item.file_id:
+                refreshed[item.id] = sent.file_id
+        await db.update_media_file_ids(refreshed)
+        
+        # Media groups cannot carry inline keyboards; CTA goes in a follow-up message
+        if reply_markup:
+            await telegram_sender.send(
+                self.bot.send_message, channel.chat_id,
+                text="👇", reply_markup=reply_markup,
+                reply_to_message_id=messages[0].message_id
+            )
+        
+        return messages[0]
+    
+    async def materialize_recurring_posts(self):
+        """Generate drafts for recurring template occurrences inside the look-ahead window"""
+        try:
+            async with self._materialize_lock:
+                # Templates are read inside the lock to see watermarks advanced by a previous run
+                templates = await db.get_templates()
+                if not templates:
+                    return
+                
+                tz = self.scheduler.timezone
+                now = datetime.now(tz)
+                horizon = now + timedelta(hours=config.RECURRING_LOOKAHEAD_HOURS)
+                
+                for template in templates:
+                    await self._materialize_template(template, now, horizon)
+                
+        except Exception as e:
+            logger.error(f"Error materializing recurring posts: {e}")
+    
+    async def _materialize_template(self, template: PostTemplate, now: datetime, horizon: datetime):
+        """Create AI-generated drafts for upcoming occurrences of one template"""
+        tz = self.scheduler.timezone
+        
+        # Continue after the last materialized occurrence; missed past slots are skipped
+        start = now
+        if template.last_occurrence_at:
+            start = max(now, tz.localize(template.last_occurrence_at) + timedelta(seconds=1))
+        
+        try:
+            upcoming = occurrences(template.cron, tz, start, horizon)
+        except ValueError as e:
+            logger.error(f"Invalid cron '{template.cron}' in template {template.id}: {e}")
+            return
+        
+        occurrence_count = template.occurrences
+        for occurrence in upcoming:
+            keywords = pick_keywords(template.keywords, occurrence_count)
+            text = await openai_client.generate_post_text(template.post_format, keywords, template.details or "")
+            if not text:
+                # Watermark is not advanced, the occurrence is retried on the next run
+                logger.error(f"Generation failed for template {template.id} occurrence {occurrence}")
+                return
+            
+            # Naive local time, like posts scheduled through the calendar
+            publish_at = occurrence.replace(tzinfo=None)
+            post = await db.create_post({
+                "title": template.name[:100],
+                "keywords": keywords,
+                "text": text,
+                "status": "draft",
+                "publish_at": publish_at,
+                "post_format": template.post_format,
+                "created_by": template.created_by,
+                "template_id": template.id
+            })
+            
+            occurrence_count += 1
+            await db.update_template(template.id, {
+                "last_occurrence_at": publish_at,
+                "occurrences": occurrence_count
+            })
+            logger.info(f"Template {template.id} materialized post {post.id} for {publish_at}")
+            
+            await self._notify_recurring_draft(post, template)
+    
+    async def _notify_recurring_draft(self, post: Post, template: PostTemplate):
+        """Ask authorized users to approve a generated recurring draft"""
+        if not self.bot:
+            return
+        
+        from bot.keyboards.common import get_recurring_draft_keyboard
+        text = (
+            f"🔁 <b>{html.escape(template.name)}</b> — պատրաստ է նոր փոստ\n"
+            f"📅 {post.publish_at.strftime('%d.%m.%Y %H:%M')}\n\n{post.text}"
+        )
+        for user_id in config.AUTHORIZED_USERS:
+            try:
+                await telegram_sender.send(
+                    self.bot.send_message, user_id,
+                    text=text, reply_markup=get_recurring_draft_keyboard(post.id)
+                )
+            except Exception as e:
+                logger.error(f"Failed to notify user {user_id} about post {post.id}: {e}")
     
     async def get_scheduled_posts_info(self) -> List[dict]:
         """Get information about all scheduled posts"""
@@ -0,0 +1,73 @@
+"""
+Rate-limited Telegram sender for TimeToShopping_bot
+Throttles outgoing Bot API calls and retries on flood control
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Union
+from asyncio_throttle import Throttler
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+from config import config
+from logging_config import logger
+
+ChatId = Union[int, str]
+
+class RateLimitedSender:
+    """Sends Bot API requests under global and per-chat rate limits"""
+
+    def __init__(self, global_rate: int = 25, per_chat_rate: int = 1, max_retries: int = 3):
+        """
+        Args:
+            global_rate: Maximum requests per second across all chats
+            per_chat_rate: Maximum requests per second to a single chat
+            max_retries: Retries on flood control / network errors
+        """
+        self.global_throttler = Throttler(rate_limit=global_rate, period=1.0)
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+        self._chat_throttlers: Dict[ChatId, Throttler] = {}
+
+    def _chat_throttler(self, chat_id: ChatId) -> Throttler:
+        throttler = self._chat_throttlers.get(chat_id)
+        if throttler is None:
+            throttler = Throttler(rate_limit=self.per_chat_rate, period=1.0)
+            self._chat_throttlers[chat_id] = throttler
+        return throttler
+
+    async def send(self, method: Callable[..., Awaitable[Any]], chat_id: ChatId, **kwargs) -> Any:
+        """
+        Call Bot API method for a chat under rate limits
+
+        Args:
+            method: Bound bot method (e.g. bot.send_document)
+            chat_id: Target chat
+            **kwargs: Method arguments
+
+        Returns:
+            Method result
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self._chat_throttler(chat_id):
+                    async with self.global_throttler:
+                        return await method(chat_id=chat_id, **kwargs)
+
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(f"Flood control for chat {chat_id}, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+
+            except TelegramNetworkError as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Network error sending to chat {chat_id}: {e}, retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+# Global rate-limited sender instance
+telegram_sender = RateLimitedSender(global_rate=config.TELEGRAM_RATE_LIMIT)
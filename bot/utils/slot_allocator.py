@@ -0,0 +1,171 @@
+"""
+Publication slot allocation for TimeToShopping_bot
+Conflict-free slots for bulk scheduling against the existing schedule
+"""
+
+import bisect
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot import MAX_POSTS_PER_HOUR
+
+DEFAULT_INTERVAL = timedelta(hours=2)
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_DAY_END = time(20, 0)
+
+# Give up when the policy cannot place all posts within this many days
+MAX_HORIZON_DAYS = 90
+
+class SlotPolicy:
+    """
+    Where posts may go: a grid of slots every `interval` between `day_start`
+    and `day_end` each day, at most `max_per_hour` posts in a clock hour and
+    no other scheduled post closer than `min_gap` to a slot
+    """
+
+    def __init__(self, interval: timedelta = DEFAULT_INTERVAL, day_start: time = DEFAULT_DAY_START,
+                 day_end: time = DEFAULT_DAY_END, max_per_hour: int = MAX_POSTS_PER_HOUR,
+                 min_gap: Optional[timedelta] = None):
+        if interval <= timedelta(0):
+            raise ValueError("interval must be positive")
+        if day_end < day_start:
+            raise ValueError("day window ends before it starts")
+        if max_per_hour < 1:
+            raise ValueError("max_per_hour must be at least 1")
+
+        self.interval = interval
+        self.day_start = day_start
+        self.day_end = day_end
+        self.max_per_hour = max_per_hour
+        self.min_gap = interval / 2 if min_gap is None else min_gap
+
+    def __repr__(self):
+        return (f"SlotPolicy(every {self.interval}, {self.day_start:%H:%M}-{self.day_end:%H:%M}, "
+                f"max {self.max_per_hour}/h)")
+
+    def slots(self, start: datetime) -> Iterable[datetime]:
+        """Grid slots at or after `start`, in order, up to MAX_HORIZON_DAYS"""
+        day = start.date()
+        for _ in range(MAX_HORIZON_DAYS + 1):
+            moment = datetime.combine(day, self.day_start)
+            end = datetime.combine(day, self.day_end)
+            while moment <= end:
+                if moment >= start:
+                    yield moment
+                moment += self.interval
+            day += timedelta(days=1)
+
+class ScheduleIndex:
+    """Sorted publication times; range counts and inserts by bisection"""
+
+    def __init__(self, times: Iterable[datetime] = ()):
+        self._times = sorted(times)
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def count(self, start: datetime, end: datetime) -> int:
+        """Scheduled times in [start, end)"""
+        return bisect.bisect_left(self._times, end) - bisect.bisect_left(self._times, start)
+
+    def add(self, moment: datetime):
+        bisect.insort(self._times, moment)
+
+    def is_free(self, moment: datetime, policy: SlotPolicy) -> bool:
+        """Slot respects the minimum gap and the hourly cap"""
+        if policy.min_gap and self.count(moment - policy.min_gap, moment + policy.min_gap):
+            return False
+        hour = moment.replace(minute=0, second=0, microsecond=0)
+        return self.count(hour, hour + timedelta(hours=1)) < policy.max_per_hour
+
+def allocate_slots(count: int, policy: SlotPolicy, start: datetime,
+                   existing: Iterable[datetime] = ()) -> List[datetime]:
+    """
+    Pick the earliest conflict-free slots
+
+    Args:
+        count: Number of posts to place
+        policy: Slot grid and limits
+        start: Earliest allowed time (naive, SCHEDULER_TIMEZONE like Post.publish_at)
+        existing: Publication times already taken
+
+    Returns:
+        `count` ascending slots
+
+    Raises:
+        ValueError: The policy has no room for all posts within MAX_HORIZON_DAYS
+    """
+    index = ScheduleIndex(existing)
+    result = []
+    if count <= 0:
+        return result
+
+    for moment in policy.slots(start):
+        if index.is_free(moment, policy):
+            result.append(moment)
+            index.add(moment)
+            if len(result) == count:
+                return result
+
+    raise ValueError(f"only {len(result)} of {count} free slots in the next {MAX_HORIZON_DAYS} days")
+
+_INTERVAL_RE = re.compile(r"^(\d+)(m|h)$")
+_WINDOW_RE = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+def parse_policy_args(args: List[str]) -> Tuple[SlotPolicy, Optional[date]]:
+    """
+    Parse "[2h|90m] [09:00-20:00] [YYYY-MM-DD]" in any order
+
+    Returns:
+        Tuple of (policy, first day or None)
+
+    Raises:
+        ValueError: Unknown argument or invalid values
+    """
+    interval, day_start, day_end, first_day = DEFAULT_INTERVAL, DEFAULT_DAY_START, DEFAULT_DAY_END, None
+
+    for arg in args:
+        arg = arg.lower()
+        interval_match = _INTERVAL_RE.match(arg)
+        window_match = _WINDOW_RE.match(arg)
+        if interval_match:
+            amount = int(interval_match.group(1))
+            interval = timedelta(hours=amount) if interval_match.group(2) == "h" else timedelta(minutes=amount)
+        elif window_match:
+            hours_from, minutes_from, hours_to, minutes_to = map(int, window_match.groups())
+            day_start, day_end = time(hours_from, minutes_from), time(hours_to, minutes_to)
+        else:
+            try:
+                first_day = datetime.strptime(arg, "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError(f"unknown argument: {arg}")
+
+    return SlotPolicy(interval, day_start, day_end), first_day
+
+def parse_id_spec(spec: str, max_ids: Optional[int] = None) -> List[int]:
+    """
+    Parse "12,15,20-25" into ordered unique post IDs
+
+    Args:
+        spec: Comma-separated IDs and inclusive ranges
+        max_ids: Reject specs with more IDs, checked before a range is expanded
+
+    Raises:
+        ValueError: Malformed ID or range, or more than max_ids IDs
+    """
+    ids: Dict[int, None] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (int(value) for value in part.split("-", 1))
+            if last < first:
+                raise ValueError(f"invalid range: {part}")
+        else:
+            first = last = int(part)
+        if max_ids is not None and len(ids) + last - first + 1 > max_ids:
+            raise ValueError(f"more than {max_ids} IDs")
+        ids.update(dict.fromkeys(range(first, last + 1)))
+    return list(ids)
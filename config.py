@@ -23,9 +23,37 @@ class Config:
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "200"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
+    # USD per 1M tokens, used for cost reports (defaults: gpt-4o-mini)
+    OPENAI_PRICE_INPUT_PER_1M: float = float(os.getenv("OPENAI_PRICE_INPUT_PER_1M", "0.15"))
+    OPENAI_PRICE_OUTPUT_PER_1M: float = float(os.getenv("OPENAI_PRICE_OUTPUT_PER_1M", "0.60"))
+    
+    # Background pre-generation: parallel OpenAI calls and batch size cap
+    PREGEN_CONCURRENCY: int = int(os.getenv("PREGEN_CONCURRENCY", "3"))
+    PREGEN_MAX_ITEMS: int = int(os.getenv("PREGEN_MAX_ITEMS", "50"))
+    
+    # Bulk import: rows per insert transaction and rows read per document
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    IMPORT_MAX_ROWS: int = int(os.getenv("IMPORT_MAX_ROWS", "10000"))
+    
+    # Publish-time recommender: seconds between click refreshes, starred slots shown
+    RECOMMENDER_REFRESH_SECONDS: float = float(os.getenv("RECOMMENDER_REFRESH_SECONDS", "60"))
+    RECOMMENDED_SLOTS: int = int(os.getenv("RECOMMENDED_SLOTS", "3"))
+    
+    # Minutes between runs of the incremental cohort job
+    COHORT_REFRESH_MINUTES: int = int(os.getenv("COHORT_REFRESH_MINUTES", "15"))
+    
+    # Near-duplicate warning threshold (estimated Jaccard similarity of shingles)
+    SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.6"))
     
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./bot_database.db")
+    DB_PROFILING: bool = os.getenv("DB_PROFILING", "False").lower() == "true"
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "0"))  # 0 disables slow query log
+    
+    # Analytics retention: raw events older than this move to daily aggregates and archive files
+    ANALYTICS_RETENTION_DAYS: int = int(os.getenv("ANALYTICS_RETENTION_DAYS", "90"))  # 0 keeps raw events forever
+    ANALYTICS_RETENTION_CHUNK: int = int(os.getenv("ANALYTICS_RETENTION_CHUNK", "1000"))  # events per transaction
+    ANALYTICS_ARCHIVE_DIR: str = os.getenv("ANALYTICS_ARCHIVE_DIR", "./archive")
     
     # Security Settings
     AUTHORIZED_USERS: List[int] = [
@@ -37,12 +65,45 @@ class Config:
     # Logging Settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: str = os.getenv("LOG_FILE", "bot.log")
+    # JSON lines and background (enqueued) sinks default on in production
+    LOG_JSON: bool = os.getenv(
+        "LOG_JSON", "True" if os.getenv("ENVIRONMENT") == "production" else "False"
+    ).lower() == "true"
+    LOG_ENQUEUE: bool = os.getenv(
+        "LOG_ENQUEUE", "True" if os.getenv("ENVIRONMENT") == "production" else "False"
+    ).lower() == "true"
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))  # share of sampled high-frequency records kept
     
     # Scheduler Settings
     SCHEDULER_TIMEZONE: str = os.getenv("SCHEDULER_TIMEZONE", "Asia/Yerevan")
+    # Recurring templates: drafts are generated for occurrences within this window
+    RECURRING_LOOKAHEAD_HOURS: int = int(os.getenv("RECURRING_LOOKAHEAD_HOURS", "48"))
+    RECURRING_CHECK_MINUTES: int = int(os.getenv("RECURRING_CHECK_MINUTES", "30"))
+    
+    # Export Settings
+    EXPORT_WORKERS: int = int(os.getenv("EXPORT_WORKERS", "2"))
+    EXPORT_CACHE_TTL: int = int(os.getenv("EXPORT_CACHE_TTL", "300"))  # seconds
+    EXPORT_PART_SIZE: int = int(os.getenv("EXPORT_PART_SIZE", str(45 * 1024 * 1024)))  # bytes, below 50MB bot limit
+    EXPORT_COMPRESSION: str = os.getenv("EXPORT_COMPRESSION", "gzip")  # gzip, zip, none
+    
+    # Telegram Bot API rate limit (requests per second)
+    TELEGRAM_RATE_LIMIT: int = int(os.getenv("TELEGRAM_RATE_LIMIT", "25"))
+    
+    # Publish attempts per channel before a delivery is given up
+    DELIVERY_MAX_ATTEMPTS: int = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "5"))
     
     # Health Check Settings (for deployment)
     HEALTH_CHECK_PORT: int = int(os.getenv("HEALTH_CHECK_PORT", "8000"))
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", "15"))  # seconds
+    HEALTH_PROBE_TIMEOUT: float = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))  # seconds
+    
+    # Event loop monitoring (lag sampler and blocking-call watchdog)
+    LOOP_MONITOR_ENABLED: bool = os.getenv("LOOP_MONITOR_ENABLED", "False").lower() == "true"
+    LOOP_MONITOR_INTERVAL: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))  # seconds
+    LOOP_SLOW_THRESHOLD: float = float(os.getenv("LOOP_SLOW_THRESHOLD", "0.25"))  # seconds
+    
+    # Updates slower than this are logged with their timing breakdown
+    SLOW_UPDATE_MS: int = int(os.getenv("SLOW_UPDATE_MS", "1000"))
     
     # Environment Settings
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
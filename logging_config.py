@@ -4,58 +4,110 @@ Configures loguru for structured logging
 """
 
 import sys
+from collections import defaultdict
 from loguru import logger
 from config import config
 
+# Records below this level bound with a "sample" key are sampled
+SAMPLED_MAX_LEVEL = 30  # WARNING
+
+class SamplingFilter:
+    """
+    Keeps every Nth record of high-frequency events
+
+    Usage: logger.bind(sample="cta_click").info(...). Records without a
+    sample key, and warnings/errors, always pass.
+    """
+
+    def __init__(self, rate: float):
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.counters = defaultdict(int)
+
+    def __call__(self, record) -> bool:
+        key = record["extra"].get("sample")
+        if key is None or record["level"].no >= SAMPLED_MAX_LEVEL:
+            return True
+        if not self.every:
+            return False
+
+        # Keep the first record of every N per key
+        self.counters[key] += 1
+        return (self.counters[key] - 1) % self.every == 0
+
 def setup_logging():
     """Configure logging with loguru"""
     
     # Remove default handler
     logger.remove()
     
-    # Console handler with colors
-    logger.add(
-        sys.stdout,
-        level=config.LOG_LEVEL,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-               "<level>{level: <8}</level> | "
-               "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
-               "<level>{message}</level>",
-        colorize=True,
-        backtrace=True,
-        diagnose=True
-    )
+    # Production: JSON lines written by background threads, no frame
+    # walking for variable values; development: colored text with diagnosis
+    is_dev = config.ENVIRONMENT != "production"
+    
+    text_format = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}"
+    
+    # Console handler
+    if config.LOG_JSON:
+        logger.add(
+            sys.stdout,
+            level=config.LOG_LEVEL,
+            serialize=True,
+            enqueue=config.LOG_ENQUEUE,
+            filter=SamplingFilter(config.LOG_SAMPLE_RATE),
+            backtrace=is_dev,
+            diagnose=is_dev
+        )
+    else:
+        logger.add(
+            sys.stdout,
+            level=config.LOG_LEVEL,
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+                   "<level>{level: <8}</level> | "
+                   "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+                   "<level>{message}</level>",
+            colorize=True,
+            enqueue=config.LOG_ENQUEUE,
+            filter=SamplingFilter(config.LOG_SAMPLE_RATE),
+            backtrace=is_dev,
+            diagnose=is_dev
+        )
     
     # File handler for persistent logging
     logger.add(
         config.LOG_FILE,
         level=config.LOG_LEVEL,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
+        format=text_format,
+        serialize=config.LOG_JSON,
         rotation="10 MB",
         retention="30 days",
         compression="zip",
-        backtrace=True,
-        diagnose=True
+        enqueue=config.LOG_ENQUEUE,
+        filter=SamplingFilter(config.LOG_SAMPLE_RATE),
+        backtrace=is_dev,
+        diagnose=is_dev
     )
     
     # Separate file for errors
     logger.add(
         "errors.log",
         level="ERROR",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
+        format=text_format,
+        serialize=config.LOG_JSON,
         rotation="5 MB",
         retention="60 days",
         compression="zip",
-        backtrace=True,
-        diagnose=True
+        enqueue=config.LOG_ENQUEUE,
+        backtrace=is_dev,
+        diagnose=is_dev
     )
     
     logger.info("Logging configuration initialized")
     logger.info(f"Log level: {config.LOG_LEVEL}")
     logger.info(f"Environment: {config.ENVIRONMENT}")
+    logger.info(f"Log format: {'json' if config.LOG_JSON else 'text'}, enqueue: {config.LOG_ENQUEUE}")
 
 # Initialize logging
 setup_logging()
 
 # Export configured logger
-__all__ = ["logger"]
\ No newline at end of file
+__all__ = ["logger"]
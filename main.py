@@ -4,8 +4,10 @@ Initializes and starts the Telegram bot
 """
 
 import asyncio
+import importlib
 import sys
 import os
+import time
 from contextlib import asynccontextmanager
 from aiohttp import web
 from aiogram import Bot, Dispatcher
@@ -17,9 +19,20 @@ from config import config
 from logging_config import logger
 from bot.database.db import db
 from bot.middlewares.access import AccessMiddleware
-from bot.handlers import admin, analytics, scheduler
+from bot.middlewares.metrics import MetricsMiddleware, HandlerNameMiddleware, TelegramTimingMiddleware
+from bot.handlers import admin, analytics, scheduler, channels
 from bot.utils.scheduler import scheduler_manager
+from bot.utils.export_jobs import export_job_manager
+from bot.utils.health import health_monitor
+from bot.utils.loop_monitor import loop_monitor
 from bot.ai.openai_client import openai_client
+from bot.ai.similarity import similarity_index
+from bot.ai.pregeneration import pregeneration_queue
+from metrics import metrics
+
+startup_step_duration = metrics.gauge(
+    "bot_startup_step_seconds", "Duration of startup steps", ("step",)
+)
 
 class BotApplication:
     """Main bot application class"""
@@ -39,13 +52,26 @@ class BotApplication:
         
         # Register handlers
         self.register_handlers()
+        
+        self._openai_probe = None
+        self._similarity_warmup = None
     
     def setup_middlewares(self):
         """Setup bot middlewares"""
+        # Update metrics (outer, measures every update)
+        self.dp.update.outer_middleware(MetricsMiddleware())
+        
+        # Bot API request timing (telegram span)
+        self.bot.session.middleware(TelegramTimingMiddleware())
+        
         # Access control middleware
         self.dp.message.middleware(AccessMiddleware())
         self.dp.callback_query.middleware(AccessMiddleware())
         
+        # Handler name for per-handler timing
+        self.dp.message.middleware(HandlerNameMiddleware())
+        self.dp.callback_query.middleware(HandlerNameMiddleware())
+        
         logger.info("Middlewares configured")
     
     def register_handlers(self):
@@ -54,43 +80,92 @@ class BotApplication:
         self.dp.include_router(admin.router)
         self.dp.include_router(analytics.router)
         self.dp.include_router(scheduler.router)
+        self.dp.include_router(channels.router)
         
         logger.info("Handlers registered")
     
     async def on_startup(self):
-        """Bot startup tasks"""
+        """
+        Bot startup tasks
+        
+        Independent steps run concurrently; the OpenAI probe runs in the
+        background so it never delays polling.
+        """
+        started = time.perf_counter()
+        timings = {}
+        
+        async def timed(name, step):
+            step_started = time.perf_counter()
+            result = await step
+            timings[name] = time.perf_counter() - step_started
+            startup_step_duration.set(timings[name], step=name)
+            return result
+        
+        async def database_and_scheduler():
+            # Scheduler jobs query the database, so it starts after init_db
+            await timed("database", db.init_db())
+            scheduler_manager.set_bot(self.bot)
+            await timed("scheduler", scheduler_manager.start())
+        
         try:
-            # Initialize database
-            await db.init_db()
-            logger.info("Database initialized")
+            # Watch event loop lag as early as possible
+            if config.LOOP_MONITOR_ENABLED:
+                loop_monitor.start()
             
-            # Test OpenAI connection
-            openai_test = await openai_client.test_connection()
-            if not openai_test:
-                logger.warning("OpenAI connection test failed - text generation may not work")
+            _, _, bot_info = await asyncio.gather(
+                database_and_scheduler(),
+                timed("bot_commands", self.set_bot_commands()),
+                timed("get_me", self.bot.get_me()),
+            )
             
-            # Start scheduler
-            await scheduler_manager.start()
-            logger.info("Scheduler started")
+            # Start background dependency probes for /ready
+            health_monitor.start(self.bot)
             
-            # Set bot commands
-            await self.set_bot_commands()
+            # Test OpenAI connection off the critical path
+            self._openai_probe = asyncio.create_task(self.probe_openai())
             
-            # Get bot info
-            bot_info = await self.bot.get_me()
-            logger.info(f"Bot started: @{bot_info.username}")
+            # Warm near-duplicate index in the background
+            self._similarity_warmup = asyncio.create_task(similarity_index.ensure_loaded())
+            
+            total = time.perf_counter() - started
+            startup_step_duration.set(total, step="total")
+            breakdown = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+            logger.info(f"Bot started: @{bot_info.username} in {total * 1000:.0f}ms ({breakdown})")
             
         except Exception as e:
             logger.error(f"Startup failed: {e}")
             raise
     
+    async def probe_openai(self):
+        """Check OpenAI API availability (free models call)"""
+        # Import the openai package off the event loop before first use
+        await asyncio.to_thread(importlib.import_module, "openai")
+        
+        openai_test = await openai_client.test_connection()
+        if not openai_test:
+            logger.warning("OpenAI connection test failed - text generation may not work")
+    
     async def on_shutdown(self):
         """Bot shutdown tasks"""
         try:
+            # Stop pending OpenAI probe, similarity warmup, pre-generation workers, health probes and loop monitor
+            if self._openai_probe and not self._openai_probe.done():
+                self._openai_probe.cancel()
+            if self._similarity_warmup and not self._similarity_warmup.done():
+                # Awaited so it stops streaming posts before the engine is disposed below
+                self._similarity_warmup.cancel()
+                await asyncio.gather(self._similarity_warmup, return_exceptions=True)
+            await pregeneration_queue.stop()
+            await health_monitor.stop()
+            await loop_monitor.stop()
+            
             # Stop scheduler
             await scheduler_manager.stop()
             logger.info("Scheduler stopped")
             
+            # Stop background export workers
+            await export_job_manager.stop()
+            
             # Close database connections
             await db.close()
             logger.info("Database connections closed")
@@ -99,6 +174,9 @@ class BotApplication:
             await self.bot.session.close()
             logger.info("Bot session closed")
             
+            # Flush enqueued log sinks
+            await logger.complete()
+            
         except Exception as e:
             logger.error(f"Shutdown error: {e}")
     
@@ -111,12 +189,13 @@ class BotApplication:
             BotCommand(command="new_post", description="Ստեղծել նոր փոստ"),
             BotCommand(command="drafts", description="Նախագծեր"),
             BotCommand(command="scheduled", description="Պլանավորված փոստեր"),
+            BotCommand(command="search", description="Փոստերի որոնում"),
             BotCommand(command="stats", description="Վիճակագրություն"),
             BotCommand(command="help", description="Օգնություն"),
         ]
         
         await self.bot.set_my_commands(commands)
-        logger.info("Bot commands set")
+        logger.debug("Bot commands set")
     
     async def start_polling(self):
         """Start bot with polling"""
@@ -137,11 +216,28 @@ async def health_check(request):
     """Health check endpoint for Railway/Render"""
     return web.Response(text="OK", status=200)
 
+async def readiness_check(request):
+    """Readiness endpoint (cached dependency probes, no I/O per request)"""
+    state = health_monitor.readiness()
+    return web.json_response(state, status=200 if state["ready"] else 503)
+
+async def liveness_check(request):
+    """Liveness endpoint (event loop responsive, probe loop running)"""
+    state = health_monitor.liveness()
+    return web.json_response(state, status=200 if state["alive"] else 503)
+
+async def metrics_endpoint(request):
+    """Prometheus metrics endpoint"""
+    return web.Response(text=metrics.render(), content_type="text/plain")
+
 @asynccontextmanager
 async def create_app():
     """Create web application with health check"""
     app = web.Application()
     app.router.add_get("/health", health_check)
+    app.router.add_get("/ready", readiness_check)
+    app.router.add_get("/live", liveness_check)
+    app.router.add_get("/metrics", metrics_endpoint)
     app.router.add_get("/", health_check)  # Root endpoint
     
     yield app
@@ -0,0 +1,305 @@
+"""
+Metrics configuration for TimeToShopping_bot
+In-process counters, gauges and histograms rendered in Prometheus text format
+"""
+
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds (Telegram / DB / OpenAI calls)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric:
+    """
+    Base class for labelled metrics
+
+    Updates are plain dict/list operations without locks: all writers run on
+    the event loop thread, and a single-key update never yields, so readers
+    (the /metrics handler) always see consistent values.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterable[Tuple[str, LabelKey, float, Sequence[str]]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, key, value, extra_names in self._samples():
+            names = self.labelnames + tuple(extra_names)
+            lines.append(f"{self.name}{suffix}{_format_labels(names, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        for key, value in list(self._values.items()):
+            yield "", key, value, ()
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        for key, value in list(self._values.items()):
+            yield "", key, value, ()
+
+class _HistogramValue:
+    """Bucket counts, sum and count of a single label set"""
+
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram (non-cumulative counts, cumulated on render)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[LabelKey, _HistogramValue] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        hist = self._values.get(key)
+        if hist is None:
+            hist = self._values[key] = _HistogramValue(len(self.bounds))
+        hist.buckets[bisect_left(self.bounds, value)] += 1
+        hist.sum += value
+        hist.count += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing elapsed seconds"""
+        return _Timer(self, labels)
+
+    def get_count(self, **labels) -> int:
+        hist = self._values.get(self._key(labels))
+        return hist.count if hist else 0
+
+    def _samples(self):
+        for key, hist in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, hist.buckets):
+                cumulative += count
+                yield "_bucket", key + (_format_value(bound),), cumulative, ("le",)
+            yield "_sum", key, hist.sum, ()
+            yield "_count", key, hist.count, ()
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+# Telegram updates
+updates_total = metrics.counter(
+    "bot_updates_total", "Processed Telegram updates", ("type", "status")
+)
+update_duration = metrics.histogram(
+    "bot_update_duration_seconds", "Telegram update handling time", ("type",)
+)
+
+handler_duration = metrics.histogram(
+    "bot_handler_duration_seconds", "Update handling time by handler", ("handler",)
+)
+handler_span_duration = metrics.histogram(
+    "bot_handler_span_seconds", "Time spent in DB / AI / Telegram calls per handler", ("handler", "span")
+)
+
+# Telegram Bot API
+telegram_request_duration = metrics.histogram(
+    "bot_telegram_request_duration_seconds", "Bot API request latency", ("method",)
+)
+
+# Database
+db_queries_total = metrics.counter(
+    "bot_db_queries_total", "Executed SQL statements", ("operation",)
+)
+db_query_duration = metrics.histogram(
+    "bot_db_query_duration_seconds", "SQL statement execution time", ("operation",)
+)
+
+# OpenAI
+openai_requests_total = metrics.counter(
+    "bot_openai_requests_total", "OpenAI API requests", ("operation", "status")
+)
+openai_request_duration = metrics.histogram(
+    "bot_openai_request_duration_seconds", "OpenAI API request latency", ("operation",)
+)
+openai_tokens_total = metrics.counter(
+    "bot_openai_tokens_total", "OpenAI tokens used", ("operation", "kind")
+)
+
+# Scheduler and publishing
+scheduler_lag = metrics.histogram(
+    "bot_scheduler_lag_seconds", "Delay between planned and actual publication",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800)
+)
+posts_published_total = metrics.counter(
+    "bot_posts_published_total", "Posts published to the channel", ("source",)
+)
+publish_failures_total = metrics.counter(
+    "bot_publish_failures_total", "Failed channel publications", ("source",)
+)
+
+start_time = metrics.gauge(
+    "bot_start_time_seconds", "Unix time the bot process started"
+)
+start_time.set(time.time())
+
+# Per-update timing spans
+
+SPAN_KINDS = ("db", "ai", "telegram")
+
+class UpdateTiming:
+    """Handler name and accumulated DB / AI / Telegram time of one update"""
+
+    __slots__ = ("handler", "prefix", "spans")
+
+    def __init__(self):
+        self.handler = "unhandled"
+        self.prefix = ""
+        self.spans: Dict[str, float] = {}
+
+_update_timing: ContextVar[Optional[UpdateTiming]] = ContextVar("update_timing", default=None)
+
+def begin_update_timing() -> UpdateTiming:
+    """
+    Start collecting spans for the current update
+
+    The object is shared by the handler's task; record_span() calls made
+    anywhere below it (DB hooks, OpenAI client, Bot API session) add to it.
+    """
+    timing = UpdateTiming()
+    _update_timing.set(timing)
+    return timing
+
+def current_update_timing() -> Optional[UpdateTiming]:
+    return _update_timing.get()
+
+def record_span(kind: str, seconds: float):
+    """Add time spent in a DB / AI / Telegram call to the current update"""
+    timing = _update_timing.get()
+    if timing is not None:
+        timing.spans[kind] = timing.spans.get(kind, 0.0) + seconds
@@ -276,13 +276,13 @@ class TestOpenAIClient:
     
     async def test_test_connection_success(self, openai_client, mock_openai_response):
         """Test successful connection test"""
-        with patch.object(openai_client.client.chat.completions, 'create', new=AsyncMock(return_value=mock_openai_response)):
+        with patch.object(openai_client.client.models, 'retrieve', new=AsyncMock(return_value=Mock(id="gpt-4o-mini"))):
             result = await openai_client.test_connection()
             assert result == True
     
     async def test_test_connection_failure(self, openai_client):
         """Test connection test failure"""
-        with patch.object(openai_client.client.chat.completions, 'create', new=AsyncMock(side_effect=Exception("Connection failed"))):
+        with patch.object(openai_client.client.models, 'retrieve', new=AsyncMock(side_effect=Exception("Connection failed"))):
             result = await openai_client.test_connection()
             assert result == False
     
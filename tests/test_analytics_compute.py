@@ -0,0 +1,109 @@
+"""
+Tests for vectorised analytics computation in TimeToShopping_bot
+Tests for per-post counts, format metrics, top posts and rolling windows
+"""
+
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bot.utils.analytics_compute import (
+    PostTable, EventFrame, counts_by_post, format_stats, top_posts, rolling_mean, daily_counts
+)
+
+DAY = datetime(2025, 6, 10, 12, 0)
+
+
+def make_events(rows, weights=None):
+    """EventFrame from (post_id, action, timestamp) tuples"""
+    names = sorted({action for _, action, _ in rows})
+    return EventFrame(
+        [post_id for post_id, _, _ in rows],
+        [names.index(action) for _, action, _ in rows],
+        [timestamp for _, _, timestamp in rows],
+        names,
+        weights
+    )
+
+
+@pytest.fixture
+def posts():
+    # Unsorted on purpose; format codes: 0 = promo, 1 = info, 2 = None
+    return PostTable([3, 1, 2, 4], [0, 0, 1, 2], [True, True, True, False], ["promo", "info", None])
+
+
+@pytest.fixture
+def events():
+    old = datetime(2025, 5, 1)
+    return make_events(
+        [(1, "click_CTA", DAY)] * 4 + [(3, "click_CTA", DAY)] + [(2, "click_CTA", old)] * 2
+        + [(1, "view", DAY)] * 10 + [(99, "click_CTA", DAY)] * 5  # post 99 was deleted
+    )
+
+
+class TestCounts:
+    """Test per-post counting"""
+
+    def test_counts_align_with_requested_ids(self, events):
+        """Test counts follow the input order and unknown posts get zero"""
+        assert counts_by_post(events, [3, 1, 7], "click_CTA").tolist() == [1, 4, 0]
+        assert counts_by_post(events, [2, 1], "click_CTA", since=DAY).tolist() == [0, 4]
+        assert counts_by_post(events, [], "view").tolist() == []
+
+    def test_daily_aggregates_are_weighted(self):
+        """Test rows of the daily tier count as many events as they hold"""
+        events = make_events(
+            [(1, "click_CTA", datetime(2025, 6, 8)), (2, "click_CTA", datetime(2025, 6, 9)), (1, "click_CTA", DAY)],
+            weights=[5, 2, 1]
+        )
+
+        assert counts_by_post(events, [1, 2], "click_CTA").tolist() == [6, 2]
+        assert events.count("click_CTA") == 8
+        assert events.count("click_CTA", since=datetime(2025, 6, 9)) == 3
+        assert daily_counts(events, "click_CTA", days=3, end=DAY)[1].tolist() == [5, 2, 1]
+
+
+class TestFormatStats:
+    """Test per-format report metrics"""
+
+    def test_metrics(self, posts, events):
+        """Test shares, averages, engagement and percentiles per format"""
+        stats = {stat["post_format"]: stat for stat in format_stats(posts, events)}
+
+        promo = stats["promo"]
+        assert (promo["total_posts"], promo["published_posts"], promo["total_clicks"]) == (2, 2, 5)
+        assert promo["posts_percent"] == pytest.approx(50.0)
+        assert promo["clicks_percent"] == pytest.approx(5 / 7 * 100)
+        assert promo["avg_clicks"] == pytest.approx(2.5)
+        assert promo["engagement_rate"] == pytest.approx(50.0)
+        assert (promo["p50_clicks"], promo["p90_clicks"]) == pytest.approx((2.5, 3.7))
+        assert stats[None]["avg_clicks"] == 0.0
+        assert list(stats)[0] == "promo"
+
+    def test_period(self, posts, events):
+        """Test events before the period are ignored"""
+        stats = {stat["post_format"]: stat for stat in format_stats(posts, events, since=DAY)}
+
+        assert stats["info"]["total_clicks"] == 0
+
+
+class TestTopPostsAndWindows:
+    """Test ranking and daily series"""
+
+    def test_top_posts_skip_deleted(self, posts, events):
+        """Test ranking by clicks, deleted posts are left out"""
+        assert top_posts(posts, events, limit=2) == [(1, 4), (2, 2)]
+
+    def test_rolling_mean_partial_windows(self):
+        """Test the first points average the available values"""
+        assert rolling_mean([3, 1, 2, 6], 2).tolist() == [3.0, 2.0, 1.5, 4.0]
+
+    def test_daily_counts(self, events):
+        """Test clicks are bucketed per day ending with the last day"""
+        dates, counts, rolling = daily_counts(events, "click_CTA", days=3, end=DAY, window=2)
+
+        assert [str(day) for day in dates] == ["2025-06-08", "2025-06-09", "2025-06-10"]
+        assert counts.tolist() == [0, 0, 10]
+        assert rolling.tolist() == [0.0, 0.0, 5.0]
@@ -0,0 +1,74 @@
+"""
+Tests for subscriber cohort analytics in TimeToShopping_bot
+Tests for click aggregation, cohort retention and repeat-click rates
+"""
+
+from datetime import date, datetime
+
+from bot.utils.cohorts import week_start, aggregate_clicks, build_cohort_table, repeat_rates
+
+MONDAY = date(2025, 6, 2)
+
+
+class TestAggregateClicks:
+    """Test folding click events into weekly counts"""
+
+    def test_week_start(self):
+        """Test moments map to the Monday of their week"""
+        assert week_start(datetime(2025, 6, 8, 23, 59)) == MONDAY
+        assert week_start(datetime(2025, 6, 9, 0, 0)) == date(2025, 6, 9)
+
+    def test_counts_per_user_format_week(self):
+        """Test clicks are grouped and anonymous clicks skipped"""
+        counts = aggregate_clicks([
+            ("1", "promo", datetime(2025, 6, 2, 10)),
+            ("1", "promo", datetime(2025, 6, 6, 18)),
+            ("1", None, datetime(2025, 6, 3, 9)),
+            ("2", "promo", datetime(2025, 6, 10, 12)),
+            (None, "promo", datetime(2025, 6, 3, 9)),
+        ])
+
+        assert counts == {
+            ("1", "promo", MONDAY): 2,
+            ("1", "", MONDAY): 1,
+            ("2", "promo", date(2025, 6, 9)): 1,
+        }
+
+
+class TestCohortTable:
+    """Test the retention matrix"""
+
+    def test_retention_percentages(self):
+        """Test retention relative to the cohort size, unobserved weeks omitted"""
+        second = date(2025, 6, 9)
+        table = build_cohort_table([
+            (MONDAY, MONDAY, 4),
+            (MONDAY, second, 2),
+            (MONDAY, date(2025, 6, 23), 1),
+            (second, second, 5),
+        ], weeks=4)
+
+        assert table == [
+            (MONDAY, 4, [100.0, 50.0, 0.0, 25.0]),
+            (second, 5, [100.0, 0.0, 0.0]),
+        ]
+
+    def test_keeps_latest_cohorts(self):
+        """Test only the latest cohorts and offsets within range are kept"""
+        cohorts = [date(2025, 6, 2 + 7 * i) for i in range(3)]
+        table = build_cohort_table([(cohort, cohort, 1) for cohort in cohorts], weeks=2)
+
+        assert [cohort for cohort, _, _ in table] == cohorts[1:]
+        assert build_cohort_table([]) == []
+
+
+class TestRepeatRates:
+    """Test per-format repeat-click rates"""
+
+    def test_rates(self):
+        """Test repeat and return shares, empty format maps to None"""
+        rates = repeat_rates([("promo", 4, 3, 1), ("", 2, None, 0)])
+
+        assert rates[0] == {"post_format": "promo", "users": 4, "repeat_rate": 75.0, "return_rate": 25.0}
+        assert rates[1]["post_format"] is None
+        assert rates[1]["repeat_rate"] == 0.0
@@ -0,0 +1,151 @@
+"""
+Tests for incremental (delta) exports in TimeToShopping_bot
+Tests for cursor paging, progress, cursor commit and the job manager path
+"""
+
+import gzip
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import bot.utils.delta_export as delta_export
+from bot.utils.delta_export import DeltaExporter
+from bot.utils.export_jobs import ExportJobManager
+
+START = datetime(2025, 6, 1, 12, 0)
+
+
+class FakeCursorStore:
+    """Stands in for the export cursor operations of Database"""
+
+    def __init__(self):
+        self.cursors = {}
+
+    async def get_export_cursor(self, consumer, stream):
+        return self.cursors.get((consumer, stream))
+
+    async def save_export_cursor(self, consumer, stream, last_id, last_updated_at=None, rows=0):
+        self.cursors[(consumer, stream)] = SimpleNamespace(last_id=last_id, last_updated_at=last_updated_at)
+
+
+class FakeDeltaExporter(DeltaExporter):
+    """Delta exporter over in-memory analytics and posts"""
+
+    def __init__(self, consumer, analytics=(), posts=(), **kwargs):
+        super().__init__(consumer, **kwargs)
+        self.analytics = list(analytics)
+        self.posts = list(posts)
+
+    def _pending_posts(self, after_ts, after_id):
+        return [
+            post for post in sorted(self.posts, key=lambda post: (post.updated_at, post.id))
+            if after_ts is None or (post.updated_at, post.id) > (after_ts, after_id)
+        ]
+
+    async def _count_pending(self, stream, after_ts, after_id):
+        if stream == "analytics":
+            return sum(1 for row in self.analytics if row.id > after_id)
+        return len(self._pending_posts(after_ts, after_id))
+
+    async def _fetch_analytics(self, after_id, limit):
+        return [row for row in self.analytics if row.id > after_id][:limit]
+
+    async def _fetch_posts(self, after_ts, after_id, limit):
+        return self._pending_posts(after_ts, after_id)[:limit]
+
+
+def click(event_id):
+    return SimpleNamespace(
+        id=event_id, post_id=1, action="click_CTA", user_id="42",
+        created_at=START, extra_data=None, channel_id=None
+    )
+
+
+def post(post_id, updated_at):
+    return SimpleNamespace(
+        id=post_id, title=f"Post {post_id}", post_format="promo", status="published", keywords=None,
+        media_type=None, created_at=START, updated_at=updated_at, publish_at=None, text="text"
+    )
+
+
+def exported_ids(artifact):
+    """First column of every data row across all parts"""
+    ids = []
+    for part in artifact.parts:
+        lines = gzip.decompress(part.data).decode("utf-8-sig").splitlines()[1:]
+        ids.extend(int(line.split(",")[0]) for line in lines)
+    return ids
+
+
+@pytest.fixture(autouse=True)
+def cursor_store(monkeypatch):
+    store = FakeCursorStore()
+    monkeypatch.setattr(delta_export, "db", store)
+    monkeypatch.setattr(delta_export.config, "EXPORT_COMPRESSION", "gzip")
+    return store
+
+
+@pytest.mark.asyncio
+class TestDeltaExporter:
+    """Test delta pulls and cursor handling"""
+
+    async def test_cursor_advances_only_on_commit(self):
+        """Test an uncommitted pull is repeated and a committed one is not"""
+        exporter = FakeDeltaExporter("bi", analytics=[click(i) for i in range(1, 6)], batch_size=2)
+
+        first = await exporter.export()
+        again = await exporter.export()
+        assert exported_ids(first) == exported_ids(again) == [1, 2, 3, 4, 5]
+        assert first.meta["complete"]
+
+        await exporter.commit(first)
+        exporter.analytics.append(click(6))
+        assert exported_ids(await exporter.export()) == [6]
+
+    async def test_row_cap_and_progress(self):
+        """Test a capped pull is incomplete and progress is relative to its rows"""
+        exporter = FakeDeltaExporter("bi", analytics=[click(i) for i in range(1, 11)], batch_size=2, max_rows=4)
+        reported = []
+
+        artifact = await exporter.export(progress=reported.append)
+
+        assert exported_ids(artifact) == [1, 2, 3, 4]
+        assert not artifact.meta["complete"]
+        assert reported == [0.5, 1.0]
+
+    async def test_posts_stream_picks_up_edits(self):
+        """Test posts are keyed on (updated_at, id) so edited posts come again"""
+        posts = [post(1, START), post(2, START), post(3, START + timedelta(minutes=1))]
+        exporter = FakeDeltaExporter("bi", posts=posts)
+
+        await exporter.commit(await exporter.export(stream="posts"))
+        posts[0].updated_at = START + timedelta(hours=1)
+
+        assert exported_ids(await exporter.export(stream="posts")) == [1]
+
+    async def test_consumers_have_separate_cursors(self):
+        """Test one consumer's commit does not move another's cursor"""
+        analytics = [click(i) for i in range(1, 4)]
+        bi = FakeDeltaExporter("bi", analytics=analytics)
+        await bi.commit(await bi.export())
+
+        assert exported_ids(await FakeDeltaExporter("crm", analytics=analytics).export()) == [1, 2, 3]
+
+    async def test_unknown_stream(self):
+        """Test unknown streams are rejected"""
+        with pytest.raises(ValueError):
+            await FakeDeltaExporter("bi").export(stream="users")
+
+    async def test_through_job_manager(self):
+        """Test the handler's submit call reaches the exporter"""
+        manager = ExportJobManager(max_workers=1)
+        exporter = FakeDeltaExporter("bi", analytics=[click(1), click(2)])
+        try:
+            job = manager.submit("delta_analytics_bi", exporter.export, cacheable=False, stream="analytics")
+            artifact = await job.wait()
+        finally:
+            await manager.stop()
+
+        assert exported_ids(artifact) == [1, 2]
+        assert artifact.meta["stream"] == "analytics"
@@ -0,0 +1,122 @@
+"""
+Tests for background export jobs in TimeToShopping_bot
+Tests for deduplication, caching, progress listeners and queue limits
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from bot.utils.export_jobs import ExportArtifact, ExportJob, ExportJobManager, ExportQueueFull
+
+
+class Builder:
+    """Export builder that counts calls and can be held until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, progress, **params):
+        self.calls += 1
+        progress(0.5)
+        await self.release.wait()
+        return ExportArtifact.from_bytes(repr(sorted(params.items())).encode(), "export.csv", rows=1)
+
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = ExportJobManager(max_workers=1, cache_ttl=60, max_queue=2)
+    yield manager
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+class TestExportJobManager:
+    """Test the deduplicating export queue"""
+
+    async def test_identical_requests_share_a_job(self, manager):
+        """Test a second request with the same parameters joins the running job"""
+        builder = Builder()
+        builder.release.clear()
+
+        first = manager.submit("csv", builder, days=7)
+        second = manager.submit("csv", builder, days=7)
+        other = manager.submit("csv", builder, days=30)
+        builder.release.set()
+
+        assert first is second and first is not other
+        assert (await first.wait()).rows == 1
+        await other.wait()
+        assert builder.calls == 2
+
+    async def test_finished_artifact_is_cached(self, manager):
+        """Test repeats within the TTL are served from cache, expired ones rebuild"""
+        builder = Builder()
+        artifact = await manager.submit("csv", builder, days=7).wait()
+
+        cached = manager.submit("csv", builder, days=7)
+        assert cached.cached and cached.status == ExportJob.DONE
+        assert await cached.wait() is artifact
+        assert builder.calls == 1
+
+        manager.cache_ttl = 0
+        manager.clear_cache()
+        await manager.submit("csv", builder, days=7).wait()
+        await manager.submit("csv", builder, days=7).wait()
+        assert builder.calls == 3
+
+    async def test_uncacheable_jobs_rebuild(self, manager):
+        """Test cacheable=False jobs always run"""
+        builder = Builder()
+        await manager.submit("delta", builder, cacheable=False).wait()
+        await manager.submit("delta", builder, cacheable=False).wait()
+
+        assert builder.calls == 2
+
+    async def test_listeners_of_joined_job_are_notified(self, manager):
+        """Test every requester of a shared job receives its updates"""
+        builder = Builder()
+        builder.release.clear()
+        seen = {"a": [], "b": []}
+
+        async def listener_a(job):
+            seen["a"].append(job.status)
+
+        async def listener_b(job):
+            seen["b"].append(job.status)
+
+        job = manager.submit("csv", builder, listener=listener_a)
+        manager.submit("csv", builder, listener=listener_b)
+        await asyncio.sleep(0.01)
+        builder.release.set()
+        await job.wait()
+
+        assert seen["a"] == seen["b"] == [ExportJob.RUNNING]
+
+    async def test_failure_reaches_waiters(self, manager):
+        """Test builder errors fail the job and are not cached"""
+        async def failing(progress):
+            raise RuntimeError("boom")
+
+        job = manager.submit("broken", failing)
+        with pytest.raises(RuntimeError):
+            await job.wait()
+        assert job.status == ExportJob.FAILED and job.error == "boom"
+        assert not manager.submit("broken", failing).cached
+
+    async def test_full_queue_is_rejected(self, manager):
+        """Test submissions beyond max_queue raise ExportQueueFull and leave no stale job"""
+        builder = Builder()
+        builder.release.clear()
+        manager.submit("csv", builder, n=0)
+        await asyncio.sleep(0.01)  # The worker takes the first job
+        manager.submit("csv", builder, n=1)
+        manager.submit("csv", builder, n=2)
+
+        with pytest.raises(ExportQueueFull):
+            manager.submit("csv", builder, n=3)
+        assert manager.make_key("csv", {"n": 3}) not in manager._active
+        builder.release.set()
@@ -0,0 +1,79 @@
+"""
+Tests for export packaging in TimeToShopping_bot
+Tests for compressed, size-limited export parts
+"""
+
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from bot.utils.export_parts import PartWriter, split_bytes
+
+
+def make_chunk(index, rows=200):
+    """Generate record-aligned CSV chunk with poorly compressible data"""
+    return "".join(
+        f"{index},{row},{hash((index, row)) & 0xFFFFFFFF:08x}{(index * row) ** 3}\n"
+        for row in range(rows)
+    ).encode("utf-8")
+
+
+def read_part(part, compression):
+    """Decompress part back to CSV bytes"""
+    if compression == "gzip":
+        return gzip.decompress(part.data)
+    if compression == "zip":
+        archive = zipfile.ZipFile(io.BytesIO(part.data))
+        return archive.read(archive.namelist()[0])
+    return part.data
+
+
+class TestPartWriter:
+    """Test streaming compression and splitting"""
+    
+    @pytest.mark.parametrize("compression", ["gzip", "zip", "none"])
+    def test_parts_stay_under_budget(self, compression):
+        """Test every part fits the budget and keeps all rows"""
+        part_size = 400 * 1024
+        writer = PartWriter("export", ".csv", part_size, compression=compression, header=b"a,b,c\n")
+        
+        for index in range(300):
+            writer.write(make_chunk(index))
+        parts = writer.close()
+        
+        assert len(parts) > 1
+        assert all(part.size <= part_size for part in parts)
+        
+        total_rows = 0
+        for part in parts:
+            content = read_part(part, compression)
+            assert content.startswith(b"a,b,c\n")  # Header repeated in each part
+            total_rows += content.count(b"\n") - 1
+        assert total_rows == 300 * 200
+    
+    def test_single_part_has_plain_name(self):
+        """Test small export is not numbered"""
+        writer = PartWriter("export", ".csv", 1024 * 1024, compression="gzip", header=b"a\n")
+        writer.write(b"1\n2\n")
+        parts = writer.close()
+        
+        assert len(parts) == 1
+        assert parts[0].filename == "export.csv.gz"
+        assert gzip.decompress(parts[0].data) == b"a\n1\n2\n"
+        assert writer.raw_size == 4
+    
+    def test_invalid_compression(self):
+        """Test unsupported compression is rejected"""
+        with pytest.raises(ValueError):
+            PartWriter("export", ".csv", 1024 * 1024, compression="bz2")
+
+
+def test_split_bytes():
+    """Test raw split of binary exports"""
+    parts = split_bytes(b"x" * 10, "data.parquet", 4)
+    
+    assert [part.filename for part in parts] == ["data.parquet.001", "data.parquet.002", "data.parquet.003"]
+    assert b"".join(part.data for part in parts) == b"x" * 10
+    assert split_bytes(b"x", "data.parquet", 4)[0].filename == "data.parquet"
@@ -0,0 +1,94 @@
+"""
+Tests for full-text post search in TimeToShopping_bot
+Tests for query building, ranked cursors and the SQLite FTS5 index
+"""
+
+import pytest
+import pytest_asyncio
+
+from bot.database.db import Database
+from bot.database.fulltext import query_terms, build_match_query
+from bot.database.pagination import encode_rank_cursor, decode_rank_cursor, CALLBACK_DATA_LIMIT
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    database = Database()
+    database.db_url = f"sqlite+aiosqlite:///{tmp_path / 'search.db'}"
+    await database.init_db()
+    yield database
+    await database.close()
+
+
+async def search_all(database, query, limit=2):
+    """Follow next cursors until the last page, returning post IDs in order"""
+    ids, cursor = [], None
+    while True:
+        posts, cursor = await database.search_posts(query, limit=limit, cursor=cursor)
+        ids.extend(post.id for post in posts)
+        if cursor is None:
+            return ids
+
+
+class TestSearchCursor:
+    """Test ranked search cursors and query building"""
+
+    def test_rank_round_trip(self):
+        """Test rank survives encoding exactly, so keyset comparison is stable"""
+        rank = -1.5438596491228069e-06
+        token = encode_rank_cursor(rank, 4242)
+
+        assert decode_rank_cursor(token) == (rank, 4242)
+        assert len(f"page:search:{token}".encode("utf-8")) <= CALLBACK_DATA_LIMIT
+
+    def test_invalid_rank_token(self):
+        """Test malformed tokens start from the first page"""
+        assert decode_rank_cursor(None) is None
+        assert decode_rank_cursor("abc_1") is None
+
+    def test_query_syntax_is_stripped(self):
+        """Test FTS operators in user input become plain prefix terms"""
+        terms = query_terms('Կոշիկ" OR *(պայուսակ')
+
+        assert terms == ["կոշիկ", "or", "պայուսակ"]
+        assert build_match_query(terms) == '"կոշիկ"* "or"* "պայուսակ"*'
+        assert build_match_query(terms, "postgresql") == "կոշիկ:* & or:* & պայուսակ:*"
+
+
+@pytest.mark.asyncio
+class TestSearchPosts:
+    """Test Database.search_posts against a SQLite FTS5 index"""
+
+    async def test_pages_have_no_duplicates_or_gaps(self, database):
+        """Test paging by rank cursor returns every match once, ties included"""
+        matching = []
+        for index in range(5):
+            post = await database.create_post({"title": f"Կոշիկներ {index}", "text": "Զեղչ"})
+            matching.append(post.id)
+        for index in range(2):
+            post = await database.create_post({"title": "Զեղչ", "text": f"Նոր կոշիկ {index} " + "բառ " * 20})
+            matching.append(post.id)
+        await database.create_post({"title": "Պայուսակ", "text": "Զեղչ"})
+
+        ids = await search_all(database, "կոշիկ")
+
+        assert len(ids) == len(set(ids))
+        assert sorted(ids) == sorted(matching)
+        assert set(ids[:5]) == set(matching[:5])
+
+    async def test_index_follows_updates_and_deletes(self, database):
+        """Test triggers keep the index in sync with post edits and deletes"""
+        post = await database.create_post({"title": "Պայուսակ", "text": "Զեղչ"})
+        assert await search_all(database, "կոշիկ") == []
+
+        await database.update_post(post.id, {"text": "Ամառային կոշիկներ"})
+        assert await search_all(database, "կոշիկ") == [post.id]
+        assert await search_all(database, "զեղչ") == []
+
+        await database.delete_post(post.id)
+        assert await search_all(database, "կոշիկ") == []
+        assert await search_all(database, "պայուսակ") == []
+
+    async def test_empty_query(self, database):
+        """Test input without words returns nothing"""
+        assert await database.search_posts('"*()') == ([], None)
@@ -0,0 +1,85 @@
+"""
+Tests for media group collection in TimeToShopping_bot
+Tests for album debounce buffer and album item extraction
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot.utils.media_group import MediaGroupCollector, album_item, MAX_ALBUM_SIZE
+
+
+def album_message(message_id, group_id="g1", photo=True):
+    """Fake album message with a photo or video"""
+    media = SimpleNamespace(file_id=f"file{message_id}", file_unique_id=f"uniq{message_id}")
+    return SimpleNamespace(
+        message_id=message_id,
+        media_group_id=group_id,
+        photo=[SimpleNamespace(file_id="thumb", file_unique_id="thumb"), media] if photo else None,
+        video=None if photo else media,
+    )
+
+
+@pytest.mark.asyncio
+class TestMediaGroupCollector:
+    """Test album coalescing"""
+
+    async def test_one_caller_gets_whole_group(self):
+        """Test only the last arrival returns the group, ordered by message ID"""
+        collector = MediaGroupCollector(delay=0.05)
+
+        results = await asyncio.gather(*[
+            collector.collect(album_message(message_id)) for message_id in (3, 1, 2)
+        ])
+
+        groups = [result for result in results if result is not None]
+        assert len(groups) == 1
+        assert [message.message_id for message in groups[0]] == [1, 2, 3]
+        assert collector._groups == {}
+
+    async def test_groups_are_separate(self):
+        """Test concurrent albums do not mix"""
+        collector = MediaGroupCollector(delay=0.05)
+
+        results = await asyncio.gather(
+            collector.collect(album_message(1, "a")),
+            collector.collect(album_message(2, "b")),
+            collector.collect(album_message(3, "a")),
+        )
+
+        groups = sorted(
+            ([message.message_id for message in result] for result in results if result),
+            key=len
+        )
+        assert groups == [[2], [1, 3]]
+
+    async def test_group_is_capped(self):
+        """Test albums are limited to Telegram's maximum size"""
+        collector = MediaGroupCollector(delay=0.05)
+
+        results = await asyncio.gather(*[
+            collector.collect(album_message(message_id)) for message_id in range(MAX_ALBUM_SIZE + 2)
+        ])
+
+        group = next(result for result in results if result)
+        assert len(group) == MAX_ALBUM_SIZE
+
+
+class TestAlbumItem:
+    """Test album item extraction"""
+
+    def test_photo_uses_largest_size(self):
+        """Test photo item takes the last (largest) size"""
+        assert album_item(album_message(5)) == {
+            "media_type": "photo", "file_id": "file5", "file_unique_id": "uniq5"
+        }
+
+    def test_video(self):
+        """Test video item"""
+        assert album_item(album_message(6, photo=False))["media_type"] == "video"
+
+    def test_unsupported(self):
+        """Test messages without photo or video are skipped"""
+        assert album_item(SimpleNamespace(photo=None, video=None)) is None
@@ -0,0 +1,44 @@
+"""
+Tests for metrics registry in TimeToShopping_bot
+Tests for Prometheus text rendering
+"""
+
+import pytest
+
+from metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test counters, histograms and rendering"""
+    
+    def test_counter_render(self):
+        """Test labelled counter exposition"""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "Test counter", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        
+        text = registry.render()
+        assert "# TYPE test_total counter" in text
+        assert 'test_total{kind="a"} 3' in text
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Test histogram", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        
+        text = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 2' in text
+        assert 'test_seconds_bucket{le="1"} 3' in text
+        assert 'test_seconds_bucket{le="+Inf"} 4' in text
+        assert "test_seconds_count 4" in text
+        assert "test_seconds_sum 3.65" in text
+    
+    def test_label_mismatch(self):
+        """Test wrong label set is rejected"""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "Test counter", ("kind",))
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
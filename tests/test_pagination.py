@@ -0,0 +1,31 @@
+"""
+Tests for keyset pagination in TimeToShopping_bot
+Tests for cursor tokens used in paged listings
+"""
+
+from datetime import datetime
+
+from bot.database.pagination import encode_cursor, decode_cursor, CALLBACK_DATA_LIMIT
+
+
+class TestCursorTokens:
+    """Test cursor encoding and decoding"""
+    
+    def test_round_trip(self):
+        """Test token decodes back to the same position"""
+        created_at = datetime(2025, 3, 14, 15, 9, 26, 535897)
+        token = encode_cursor(created_at, 123456)
+        
+        assert decode_cursor(token) == (created_at, 123456)
+    
+    def test_fits_callback_data(self):
+        """Test navigation callback data stays under Telegram limit"""
+        token = encode_cursor(datetime(2099, 12, 31, 23, 59, 59, 999999), 2 ** 63 - 1)
+        
+        assert len(f"page:scheduled:{token}".encode("utf-8")) <= CALLBACK_DATA_LIMIT
+    
+    def test_invalid_token(self):
+        """Test empty and malformed tokens start from the first page"""
+        assert decode_cursor(None) is None
+        assert decode_cursor("") is None
+        assert decode_cursor("not-a-token") is None
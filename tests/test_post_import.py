@@ -0,0 +1,98 @@
+"""
+Tests for bulk post import in TimeToShopping_bot
+Tests for document parsing, row validation and batching
+"""
+
+import io
+from datetime import datetime
+
+import pytest
+from pytz import timezone
+
+from bot.utils.post_import import ImportReport, iter_document_rows, normalize_row, validated_batches
+
+TEXT = "Ձմեռային կոշիկներ 30% զեղչով"
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def document(content: str) -> io.BytesIO:
+    return io.BytesIO(content.encode("utf-8"))
+
+
+class TestDocumentRows:
+    """Test CSV and JSON readers"""
+
+    def test_csv_with_bom_and_semicolons(self):
+        """Test delimiter sniffing and BOM-prefixed header"""
+        rows = list(iter_document_rows(document(f"\ufefftext;post_format\n{TEXT};promo\n"), "posts.csv"))
+
+        assert rows == [(1, {"text": TEXT, "post_format": "promo"})]
+
+    def test_csv_requires_text_column(self):
+        """Test documents without a text column are rejected"""
+        with pytest.raises(ValueError):
+            list(iter_document_rows(document("title\nx\n"), "posts.csv"))
+
+    def test_json_array_and_lines(self):
+        """Test a JSON array and JSON Lines give the same rows"""
+        array = list(iter_document_rows(document(f' [{{"text": "{TEXT}"}}]'), "posts.json"))
+        lines = list(iter_document_rows(document(f'{{"text": "{TEXT}"}}\n\nnot json\n'), "posts.jsonl"))
+
+        assert array == [(1, {"text": TEXT})]
+        assert lines[0] == array[0]
+        assert lines[1][0] == 2 and "__error__" in lines[1][1]
+
+    def test_unsupported_extension(self):
+        """Test other documents are rejected"""
+        with pytest.raises(ValueError):
+            list(iter_document_rows(document(TEXT), "posts.xlsx"))
+
+
+class TestNormalizeRow:
+    """Test row validation and scheduling"""
+
+    def test_draft_by_default(self):
+        """Test publish_at is ignored unless scheduling and title falls back to keywords"""
+        post_data, errors = normalize_row(
+            {"text": TEXT, "keywords": "կոշիկ", "publish_at": "2025-06-02 10:00", "extra": "x"}, now=NOW
+        )
+
+        assert errors == []
+        assert post_data["status"] == "draft"
+        assert "publish_at" not in post_data and "extra" not in post_data
+        assert post_data["title"] == "կոշիկ"
+
+    def test_scheduled_row(self):
+        """Test aware ISO times are converted to naive local time"""
+        post_data, errors = normalize_row(
+            {"text": TEXT, "publish_at": "2025-06-02T06:00:00+00:00"},
+            schedule=True, now=NOW, tz=timezone("Asia/Yerevan")
+        )
+
+        assert errors == []
+        assert (post_data["status"], post_data["publish_at"]) == ("scheduled", datetime(2025, 6, 2, 10, 0))
+
+    def test_errors_are_collected(self):
+        """Test validator and publish_at errors are reported together"""
+        post_data, errors = normalize_row(
+            {"text": "short", "post_format": "unknown", "publish_at": "2025-05-01 10:00"},
+            schedule=True, now=NOW
+        )
+
+        assert post_data is None
+        assert len(errors) == 3
+
+
+class TestValidatedBatches:
+    """Test streaming validation into insert batches"""
+
+    def test_batches_and_row_limit(self):
+        """Test valid rows are batched and rows past the limit are skipped"""
+        rows = [(1, {"text": TEXT}), (2, {"text": ""}), (3, {"text": TEXT}), (4, {"text": TEXT}), (5, {"text": TEXT})]
+        report = ImportReport()
+
+        batches = list(validated_batches(rows, report, batch_size=2, max_rows=4, now=NOW))
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert report.rows == 4
+        assert [number for number, _ in report.errors] == [2, 5]
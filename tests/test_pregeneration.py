@@ -0,0 +1,56 @@
+"""
+Tests for ahead-of-time generation in TimeToShopping_bot
+Tests for batch parsing and token cost accounting
+"""
+
+import pytest
+
+from config import config
+from bot.ai.openai_client import TokenUsage
+from bot.ai.pregeneration import PregenBatch, PregenItem, parse_pregen_lines
+
+
+class TestParsePregenLines:
+    """Test batch input parsing"""
+
+    def test_valid_lines(self):
+        """Test format, keywords and optional details are split"""
+        items, errors = parse_pregen_lines("selling | կաշվե պայուսակ | 25% զեղչ\n\npromo | կոշիկներ")
+
+        assert errors == []
+        assert [(item.post_format, item.keywords, item.details) for item in items] == [
+            ("selling", "կաշվե պայուսակ", "25% զեղչ"),
+            ("promo", "կոշիկներ", ""),
+        ]
+
+    def test_rejected_lines_are_numbered(self):
+        """Test unknown formats and missing keywords are reported by line"""
+        items, errors = parse_pregen_lines("unknown | x\ninfo |\ninfo | ok")
+
+        assert len(items) == 1
+        assert [error.split(":")[0] for error in errors] == ["1", "2"]
+
+
+class TestBatchAccounting:
+    """Test per-batch counters and cost"""
+
+    def test_cost_uses_configured_prices(self, monkeypatch):
+        """Test cost is tokens times price per 1M tokens"""
+        monkeypatch.setattr(config, "OPENAI_PRICE_INPUT_PER_1M", 0.15)
+        monkeypatch.setattr(config, "OPENAI_PRICE_OUTPUT_PER_1M", 0.60)
+        usage = TokenUsage()
+        usage.add(1_000_000, 500_000)
+
+        assert usage.requests == 1
+        assert usage.cost == pytest.approx(0.45)
+
+    def test_completion_state(self):
+        """Test a batch is complete once every item is done or failed"""
+        items = [PregenItem("info", "a"), PregenItem("info", "b")]
+        batch = PregenBatch(1, items)
+        items[0].status, items[0].post_id = "done", 7
+
+        assert not batch.is_complete
+        items[1].status = "failed"
+        assert batch.is_complete
+        assert (batch.done, batch.failed, batch.post_ids) == (1, 1, [7])
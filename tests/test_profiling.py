@@ -0,0 +1,49 @@
+"""
+Tests for query profiling in TimeToShopping_bot
+Tests for statement normalization and aggregation
+"""
+
+from bot.database.profiling import QueryProfiler, normalize_statement
+
+
+class TestQueryProfiler:
+    """Test SQL normalization and per-statement stats"""
+    
+    def test_normalize_literals_and_in_lists(self):
+        """Test literals and IN-lists collapse to one statement"""
+        first = normalize_statement("SELECT * FROM posts_1\n WHERE id IN (?, ?, ?) AND status = 'draft' LIMIT 10")
+        second = normalize_statement("SELECT * FROM posts_1 WHERE id IN (?) AND status = 'scheduled' LIMIT 5")
+        
+        assert first == second == "SELECT * FROM posts_1 WHERE id IN (...) AND status = ? LIMIT ?"
+    
+    def test_aggregation_and_top(self):
+        """Test count, total, max and rows per statement"""
+        profiler = QueryProfiler(enabled=True)
+        profiler.record("SELECT 1", 0.002)
+        profiler.record("SELECT 2", 0.004)
+        profiler.record("UPDATE posts SET status = ?", 0.001, rowcount=3)
+        
+        top = profiler.top(limit=1)
+        assert top[0].statement == "SELECT ?"
+        assert top[0].count == 2
+        assert abs(top[0].max - 0.004) < 1e-9
+        assert profiler.top(order_by="count")[1].rows == 3
+    
+    def test_unknown_rowcount(self):
+        """Test statements without a rowcount report unknown rows, not 0"""
+        profiler = QueryProfiler(enabled=True)
+        profiler.record("SELECT * FROM posts", 0.002, rowcount=-1)
+        profiler.record("UPDATE posts SET status = ?", 0.001, rowcount=0)
+        
+        select, update = profiler.top(order_by="total")
+        assert select.rows is None
+        assert update.rows == 0
+        assert "rows –" in profiler.report().split("\n")[0]
+        assert "rows 0" in profiler.report()
+    
+    def test_disabled_profiler_collects_nothing(self):
+        """Test disabled profiler is a no-op"""
+        profiler = QueryProfiler(enabled=False)
+        profiler.record("SELECT 1", 0.5)
+        
+        assert profiler.stats == {}
@@ -0,0 +1,59 @@
+"""
+Tests for recurring post templates in TimeToShopping_bot
+Tests for cron occurrence expansion and keyword rotation
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from pytz import timezone
+
+from bot.utils.recurring import occurrences, next_occurrence, pick_keywords, split_keyword_pool
+
+YEREVAN = timezone("Asia/Yerevan")
+
+
+class TestOccurrences:
+    """Test cron expansion over the look-ahead window"""
+
+    def test_window_is_bounded(self):
+        """Test only occurrences inside the window are returned, in local time"""
+        start = YEREVAN.localize(datetime(2025, 6, 2, 9, 0))  # Monday
+        end = start + timedelta(days=14)
+
+        result = occurrences("0 10 * * fri", YEREVAN, start, end, limit=10)
+
+        assert [moment.replace(tzinfo=None) for moment in result] == [
+            datetime(2025, 6, 6, 10, 0), datetime(2025, 6, 13, 10, 0)
+        ]
+
+    def test_limit(self):
+        """Test a dense schedule is capped per run"""
+        start = YEREVAN.localize(datetime(2025, 6, 2, 0, 0))
+
+        result = occurrences("*/5 * * * *", YEREVAN, start, start + timedelta(days=1), limit=3)
+
+        assert len(result) == 3
+        assert result[0] == start
+
+    def test_invalid_expression(self):
+        """Test malformed cron is rejected"""
+        with pytest.raises(ValueError):
+            next_occurrence("every friday", YEREVAN, datetime.now(YEREVAN))
+
+
+class TestKeywordRotation:
+    """Test keyword sets rotate between occurrences"""
+
+    def test_rotation(self):
+        """Test consecutive occurrences use consecutive keyword sets"""
+        pool = "կոշիկ զեղչ; պայուսակ\nժամացույց"
+
+        assert [pick_keywords(pool, index) for index in range(4)] == [
+            "կոշիկ զեղչ", "պայուսակ", "ժամացույց", "կոշիկ զեղչ"
+        ]
+
+    def test_empty_pool(self):
+        """Test blank entries are dropped"""
+        assert split_keyword_pool(" ; \n") == []
+        assert pick_keywords("", 3) == ""
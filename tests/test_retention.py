@@ -0,0 +1,101 @@
+"""
+Tests for analytics retention in TimeToShopping_bot
+Tests for daily rollups, per-month archives and the retention cutoff
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+import bot.utils.retention as retention
+from bot.database.db import Database
+from bot.utils.retention import RetentionManager, rollup_counts, archive_events, archive_path, read_archive
+
+
+class NoCohorts:
+    """Stands in for the cohort tracker folded in before each run"""
+
+    async def update(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path, monkeypatch):
+    database = Database()
+    database.db_url = f"sqlite+aiosqlite:///{tmp_path / 'retention.db'}"
+    await database.init_db()
+    monkeypatch.setattr(retention, "db", database)
+    monkeypatch.setattr(retention, "cohort_tracker", NoCohorts())
+    yield database
+    await database.close()
+
+
+def event(event_id, post_id, action, created_at, channel_id=None):
+    """Row shaped like Database.get_expired_analytics output"""
+    return (event_id, post_id, action, "42", created_at, None, channel_id)
+
+
+ROWS = [
+    event(1, 7, "click_CTA", datetime(2025, 1, 31, 23, 59), channel_id=3),
+    event(2, 7, "click_CTA", datetime(2025, 1, 31, 8, 0), channel_id=3),
+    event(3, 7, "click_CTA", datetime(2025, 2, 1, 0, 0)),
+    event(4, 8, "view", datetime(2025, 2, 1, 10, 0)),
+]
+
+
+class TestRollup:
+    """Test daily aggregation of raw events"""
+
+    def test_counts_per_day_post_action_channel(self):
+        """Test grouping, events outside channels use channel 0"""
+        assert rollup_counts(ROWS) == {
+            (date(2025, 1, 31), 7, "click_CTA", 3): 2,
+            (date(2025, 2, 1), 7, "click_CTA", 0): 1,
+            (date(2025, 2, 1), 8, "view", 0): 1,
+        }
+
+    def test_cutoff_is_start_of_day(self):
+        """Test whole UTC days move to the daily tier"""
+        manager = RetentionManager(days=30, chunk_size=100, archive_dir="unused")
+
+        assert manager.cutoff(datetime(2025, 3, 3, 15, 30)) == datetime(2025, 2, 1)
+
+
+class TestArchive:
+    """Test per-month gzip archives"""
+
+    def test_split_by_month_and_append(self, tmp_path):
+        """Test events land in their month's file and later chunks are appended"""
+        written = archive_events(ROWS[:2], str(tmp_path))
+        written.update(archive_events(ROWS[2:], str(tmp_path)))
+        archive_events(ROWS[3:], str(tmp_path))
+
+        assert written == {"2025-01": 2, "2025-02": 2}
+        january = list(read_archive(archive_path(str(tmp_path), "2025-01")))
+        february = list(read_archive(archive_path(str(tmp_path), "2025-02")))
+        assert [record["id"] for record in january] == [1, 2]
+        assert [record["id"] for record in february] == [3, 4, 4]
+        assert january[0] == {
+            "id": 1, "post_id": 7, "action": "click_CTA", "user_id": "42",
+            "created_at": "2025-01-31T23:59:00", "extra_data": None, "channel_id": 3,
+        }
+
+
+@pytest.mark.asyncio
+class TestRetentionRun:
+    """Test a retention run against a SQLite database"""
+
+    async def test_keeps_events_past_delta_cursor(self, database, tmp_path):
+        """Test events a delta consumer has not pulled yet stay raw"""
+        post = await database.create_post({"title": "promo", "text": "text"})
+        events = [await database.log_analytics(post.id, "click_CTA") for _ in range(4)]
+        await database.save_export_cursor("bi", "analytics", events[1].id)
+        await database.save_export_cursor("_jobs", "analytics", 0)
+
+        manager = RetentionManager(days=30, chunk_size=100, archive_dir=str(tmp_path / "archive"))
+        stats = await manager.run(now=datetime.utcnow() + timedelta(days=60))
+
+        assert stats["events"] == 2
+        remaining = await database.get_expired_analytics(datetime.utcnow() + timedelta(days=1))
+        assert [row[0] for row in remaining] == [event.id for event in events[2:]]
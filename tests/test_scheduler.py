@@ -0,0 +1,70 @@
+"""
+Tests for scheduled publication in TimeToShopping_bot
+Tests for the scheduler lag metric
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from pytz import timezone
+
+import bot.utils.scheduler as scheduler_module
+from bot.utils.scheduler import SchedulerManager, PublishOutcome
+
+YEREVAN = timezone("Asia/Yerevan")
+
+
+class FakePostStore:
+    """Stands in for the post operations of Database"""
+
+    def __init__(self, post):
+        self.post = post
+        self.updates = []
+
+    async def get_post(self, post_id):
+        return self.post
+
+    async def update_post(self, post_id, data):
+        self.updates.append(data)
+
+    async def log_analytics(self, post_id, action, extra_data=None):
+        pass
+
+
+class LagRecorder:
+    """Collects observed scheduler lag values"""
+
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value, **labels):
+        self.values.append(value)
+
+
+@pytest.mark.asyncio
+class TestSchedulerLag:
+    """Test lag is measured on the clock posts are scheduled in"""
+
+    async def test_lag_uses_scheduler_timezone(self, monkeypatch):
+        """Test a post due seconds ago in local time reports seconds of lag"""
+        manager = SchedulerManager()
+        manager.scheduler.configure(timezone=YEREVAN)
+        manager.bot = object()
+
+        publish_at = datetime.now(YEREVAN).replace(tzinfo=None) - timedelta(seconds=5)
+        store = FakePostStore(SimpleNamespace(id=1, publish_at=publish_at))
+        recorder = LagRecorder()
+        monkeypatch.setattr(scheduler_module, "db", store)
+        monkeypatch.setattr(scheduler_module, "scheduler_lag", recorder)
+
+        async def publish(post, source="manual"):
+            return PublishOutcome.PUBLISHED
+
+        monkeypatch.setattr(manager, "publish_post_to_channel", publish)
+
+        await manager.publish_scheduled_post(1)
+
+        assert len(recorder.values) == 1
+        assert 0 < recorder.values[0] < 3600
+        assert store.updates == [{"status": "published"}]
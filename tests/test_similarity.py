@@ -0,0 +1,59 @@
+"""
+Tests for near-duplicate detection in TimeToShopping_bot
+Tests for MinHash / LSH similarity index
+"""
+
+import bot.ai.similarity as similarity
+from bot.ai.similarity import SimilarityIndex, minhash, shingles
+
+SHOES = (
+    "🔥 Նոր հավաքածու կանացի կոշիկների։ Հարմարավետ, նորաձև և որակյալ մոդելներ "
+    "ամեն օրվա համար։ Զեղչ 30% մինչև ամսվա վերջ։ Գնել հիմա!"
+)
+SHOES_REWORDED = (
+    "🔥 Նոր հավաքածու կանացի կոշիկների։ Հարմարավետ, նորաձև և որակյալ մոդելներ "
+    "ամեն օրվա համար։ Զեղչ 20% մինչև շաբաթվա վերջ։ Գնել հիմա!"
+)
+BAGS = "💡 Ինչպես ընտրել ճիշտ պայուսակ։ 3 խորհուրդ՝ գույն, չափ և նյութ։ Իմանալ ավելին"
+
+
+class TestSimilarityIndex:
+    """Test indexing and near-duplicate lookups"""
+    
+    def test_near_duplicate_found(self):
+        """Test reworded text is flagged, unrelated text is not"""
+        index = SimilarityIndex(threshold=0.6)
+        index.add(1, SHOES)
+        index.add(2, BAGS)
+        
+        matches = index.query(SHOES_REWORDED)
+        assert [post_id for post_id, _ in matches] == [1]
+        assert matches[0][1] >= 0.6
+    
+    def test_excludes_post_itself(self):
+        """Test lookup of an indexed post skips the post"""
+        index = SimilarityIndex()
+        index.add(1, SHOES)
+        index.add(2, SHOES_REWORDED)
+        
+        assert [post_id for post_id, _ in index.query(SHOES, exclude_id=1)] == [2]
+    
+    def test_update_and_remove(self):
+        """Test re-adding replaces old text and remove drops buckets"""
+        index = SimilarityIndex()
+        index.add(1, SHOES)
+        index.add(1, BAGS)
+        
+        assert index.query(SHOES_REWORDED) == []
+        assert len(index) == 1
+        
+        index.remove(1)
+        assert len(index) == 0
+        assert all(not bucket for bucket in index.buckets)
+    
+    def test_pure_python_matches_numpy(self, monkeypatch):
+        """Test fallback signature equals the vectorized one"""
+        vectorized = minhash(shingles(SHOES))
+        monkeypatch.setattr(similarity, "_numpy", False)
+        
+        assert minhash(shingles(SHOES)) == vectorized
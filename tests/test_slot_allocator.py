@@ -0,0 +1,94 @@
+"""
+Tests for bulk scheduling slot allocation in TimeToShopping_bot
+Tests for slot grid, conflict detection and argument parsing
+"""
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from bot.utils.slot_allocator import (
+    SlotPolicy, ScheduleIndex, allocate_slots, parse_id_spec, parse_policy_args, MAX_HORIZON_DAYS
+)
+
+START = datetime(2025, 6, 2, 8, 0)
+
+
+class TestAllocateSlots:
+    """Test conflict-free slot selection"""
+
+    def test_grid_wraps_to_next_day(self):
+        """Test slots follow the interval inside the daily window"""
+        policy = SlotPolicy(timedelta(hours=4), time(9, 0), time(18, 0))
+
+        slots = allocate_slots(4, policy, START)
+
+        assert slots == [
+            datetime(2025, 6, 2, 9, 0), datetime(2025, 6, 2, 13, 0),
+            datetime(2025, 6, 2, 17, 0), datetime(2025, 6, 3, 9, 0)
+        ]
+
+    def test_existing_posts_block_nearby_slots(self):
+        """Test slots within the minimum gap of scheduled posts are skipped"""
+        policy = SlotPolicy(timedelta(hours=2), time(9, 0), time(15, 0))
+        existing = [datetime(2025, 6, 2, 9, 30), datetime(2025, 6, 2, 13, 0)]
+
+        slots = allocate_slots(2, policy, START, existing)
+
+        assert slots == [datetime(2025, 6, 2, 11, 0), datetime(2025, 6, 2, 15, 0)]
+
+    def test_hourly_cap(self):
+        """Test a dense grid respects max posts per hour"""
+        policy = SlotPolicy(timedelta(minutes=10), time(9, 0), time(10, 50), max_per_hour=2, min_gap=timedelta(0))
+
+        slots = allocate_slots(3, policy, START, [datetime(2025, 6, 2, 9, 45)])
+
+        assert slots == [datetime(2025, 6, 2, 9, 0), datetime(2025, 6, 2, 10, 0), datetime(2025, 6, 2, 10, 10)]
+
+    def test_no_room(self):
+        """Test allocation fails when the horizon is full"""
+        policy = SlotPolicy(timedelta(hours=1), time(9, 0), time(9, 0))
+
+        with pytest.raises(ValueError):
+            allocate_slots(MAX_HORIZON_DAYS + 2, policy, START)
+
+    def test_index_range_count(self):
+        """Test half-open range counts"""
+        index = ScheduleIndex([START, START + timedelta(hours=1)])
+        index.add(START + timedelta(minutes=30))
+
+        assert index.count(START, START + timedelta(hours=1)) == 2
+        assert len(index) == 3
+
+
+class TestArguments:
+    """Test /bulk_schedule argument parsing"""
+
+    def test_policy_args(self):
+        """Test interval, window and start day in any order"""
+        policy, first_day = parse_policy_args(["2025-06-10", "90m", "10:00-18:30"])
+
+        assert policy.interval == timedelta(minutes=90)
+        assert (policy.day_start, policy.day_end) == (time(10, 0), time(18, 30))
+        assert first_day == date(2025, 6, 10)
+
+    def test_invalid_policy_args(self):
+        """Test unknown arguments and inverted windows are rejected"""
+        with pytest.raises(ValueError):
+            parse_policy_args(["weekly"])
+        with pytest.raises(ValueError):
+            parse_policy_args(["20:00-09:00"])
+
+    def test_id_spec(self):
+        """Test lists and ranges keep order and drop duplicates"""
+        assert parse_id_spec("5,1-3,2") == [5, 1, 2, 3]
+        with pytest.raises(ValueError):
+            parse_id_spec("3-1")
+
+    def test_id_spec_limit(self):
+        """Test oversized specs are rejected before ranges are expanded"""
+        assert parse_id_spec("1-3,7", max_ids=4) == [1, 2, 3, 7]
+        with pytest.raises(ValueError):
+            parse_id_spec("1-100000000", max_ids=100)
+        with pytest.raises(ValueError):
+            parse_id_spec("1-3,7,8", max_ids=4)
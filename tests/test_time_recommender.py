@@ -0,0 +1,69 @@
+"""
+Tests for publish-time recommendations in TimeToShopping_bot
+Tests for hour-of-week histograms, ranking and caching
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from pytz import timezone
+
+from bot.ai import time_recommender as recommender_module
+from bot.ai.time_recommender import TimeRecommender, hours_of_week, MIN_EVENTS
+
+YEREVAN = timezone("Asia/Yerevan")  # UTC+4
+MONDAY = date(2025, 6, 2)
+
+
+def clicks(utc_hour: int, count: int, post_format=None):
+    """Monday clicks at a UTC hour"""
+    moment = datetime(2025, 6, 2, utc_hour, 15)
+    return [(moment + timedelta(weeks=week), post_format) for week in range(count)]
+
+
+class TestHoursOfWeek:
+    """Test local hour-of-week conversion"""
+
+    def test_utc_offset_and_week_wrap(self):
+        """Test UTC timestamps are shifted to local time, Sunday night wraps to Monday"""
+        result = hours_of_week([datetime(2025, 6, 2, 6, 30), datetime(2025, 6, 8, 22, 0)], YEREVAN)
+
+        assert result == [10, 2]
+
+
+class TestRecommender:
+    """Test ranking of hours"""
+
+    @pytest.fixture(params=["numpy", "python"])
+    def recommender(self, request, monkeypatch):
+        if request.param == "python":
+            monkeypatch.setattr(recommender_module, "_numpy", False)
+        elif not recommender_module._get_numpy():
+            pytest.skip("NumPy not installed")
+        return TimeRecommender(YEREVAN)
+
+    def test_format_clicks_outrank_prior(self, recommender):
+        """Test a format's own peak wins over the channel-wide peak"""
+        recommender.add_events(clicks(6, 30) + clicks(14, 20, "promo"))
+
+        assert recommender.recommend(None, MONDAY, top=2) == ["10:00", "18:00"]
+        assert recommender.recommend("promo", MONDAY, top=1) == ["18:00"]
+        assert recommender.recommend("promo", MONDAY + timedelta(days=1)) == []
+
+    def test_incremental_updates_invalidate_cache(self, recommender):
+        """Test new clicks change a cached ranking"""
+        recommender.add_events(clicks(6, MIN_EVENTS))
+        assert recommender.recommend("info", MONDAY, top=1) == ["10:00"]
+
+        recommender.add_events(clicks(8, MIN_EVENTS * 2, "info"))
+
+        assert recommender.recommend("info", MONDAY, top=1) == ["12:00"]
+        assert recommender.total == MIN_EVENTS * 3
+
+    def test_cold_start_and_past_hours(self, recommender):
+        """Test no recommendations below MIN_EVENTS and past hours are skipped"""
+        recommender.add_events(clicks(6, MIN_EVENTS - 1))
+        assert recommender.recommend(None, MONDAY) == []
+
+        recommender.add_events(clicks(10, 1))
+        assert recommender.recommend(None, MONDAY, after=datetime(2025, 6, 2, 12, 0)) == ["14:00"]